@@ -0,0 +1,31 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from hydra.core.config_store import ConfigStore
+
+
+@dataclass
+class SlotsLauncherConf:
+    _target_: str = "hydra_plugins.optimum_benchmark_launcher.slots_launcher.SlotsLauncher"
+
+    # physical cores per slot, slots never span numa nodes. if null, one slot per numa node
+    cores_per_slot: Optional[int] = None
+    # whether a slot includes the hyperthreads of its physical cores
+    use_smt: bool = False
+    # whether to set the backend's intra_op_num_threads to the number of cpus of the slot
+    set_num_threads: bool = True
+
+    # memory (MB) shared by the concurrent experiments. if null, the available memory at launch
+    memory_budget: Optional[int] = None
+    # an experiment's memory is estimated as memory_factor times its model's weights size,
+    # or as default_memory (MB) when that size is unknown
+    memory_factor: float = 2.0
+    default_memory: int = 4000
+
+
+ConfigStore.instance().store(
+    group="hydra/launcher",
+    name="slots",
+    node=SlotsLauncherConf,
+    provider="optimum_benchmark",
+)
@@ -0,0 +1,230 @@
+import json
+import logging
+import multiprocessing
+import os
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import cloudpickle
+import psutil
+from hydra.core.hydra_config import HydraConfig
+from hydra.core.singleton import Singleton
+from hydra.core.utils import JobReturn, JobStatus, configure_log, filter_overrides, run_job, setup_globals
+from hydra.plugins.launcher import Launcher
+from hydra.types import HydraContext, TaskFunction
+from omegaconf import DictConfig, open_dict
+
+from optimum_benchmark.env_utils import bytes_to_mega_bytes, format_cpu_list, get_numa_nodes, get_physical_cores
+
+log = logging.getLogger(__name__)
+
+WEIGHTS_EXTENSIONS = [".safetensors", ".bin", ".onnx", ".pt", ".pth"]
+
+
+def get_slots(cores_per_slot: Optional[int], use_smt: bool) -> List[Dict[str, Any]]:
+    # disjoint sets of cpus, each one made of whole physical cores of a single numa node
+    slots = []
+    for numa_node, node_cpus in enumerate(get_numa_nodes()):
+        physical_cores = get_physical_cores(node_cpus)
+        if not use_smt:
+            physical_cores = [core_cpus[:1] for core_cpus in physical_cores]
+
+        slot_size = cores_per_slot or len(physical_cores)
+        if slot_size > len(physical_cores):
+            raise ValueError(
+                f"`cores_per_slot` ({slot_size}) is larger than the {len(physical_cores)} "
+                f"available physical cores of numa node {numa_node}."
+            )
+
+        for start in range(0, len(physical_cores) - slot_size + 1, slot_size):
+            cpus = [cpu for core_cpus in physical_cores[start : start + slot_size] for cpu in core_cpus]
+            slots.append({"slot": len(slots), "numa_node": numa_node, "cpus": cpus})
+
+    return slots
+
+
+def get_model_weights_size(model: str, hub_kwargs: Dict[str, Any]) -> Optional[int]:
+    # safetensors weights are preferred over the others when a repo has both
+    if os.path.isdir(model):
+        files = {
+            path.name: path.stat().st_size
+            for path in Path(model).rglob("*")
+            if path.suffix in WEIGHTS_EXTENSIONS and path.is_file()
+        }
+    else:
+        try:
+            from huggingface_hub import HfApi
+
+            model_info = HfApi().model_info(model, revision=hub_kwargs.get("revision"), files_metadata=True)
+        except Exception as e:
+            log.warning(f"Could not get the weights size of {model}: {e}")
+            return None
+        files = {
+            sibling.rfilename: sibling.size
+            for sibling in model_info.siblings
+            if os.path.splitext(sibling.rfilename)[1] in WEIGHTS_EXTENSIONS and sibling.size is not None
+        }
+
+    for extension in WEIGHTS_EXTENSIONS:
+        sizes = [size for name, size in files.items() if name.endswith(extension)]
+        if sizes:
+            return sum(sizes)
+
+    return None
+
+
+def execute_job(
+    connection: Connection,
+    idx: int,
+    overrides: Sequence[str],
+    slot: Dict[str, Any],
+    pickled_job_context: bytes,
+) -> None:
+    # threads created from now on (intra-op pools, etc.) inherit the slot's affinity
+    os.sched_setaffinity(0, slot["cpus"])
+
+    # like joblib's loky backend, cloudpickle is needed for the task function decorated by hydra.main
+    hydra_context, config, task_function, singleton_state = cloudpickle.loads(pickled_job_context)
+
+    setup_globals()
+    Singleton.set_state(singleton_state)
+
+    sweep_config = hydra_context.config_loader.load_sweep_config(config, list(overrides))
+    with open_dict(sweep_config):
+        sweep_config.hydra.job.id = "{}_{}".format(sweep_config.hydra.job.name, idx)
+        sweep_config.hydra.job.num = idx
+    HydraConfig.instance().set_config(sweep_config)
+
+    ret = run_job(
+        hydra_context=hydra_context,
+        config=sweep_config,
+        task_function=task_function,
+        job_dir_key="hydra.sweep.dir",
+        job_subdir_key="hydra.sweep.subdir",
+    )
+
+    with open(os.path.join(ret.hydra_cfg.hydra.runtime.output_dir, "slot.json"), "w") as f:
+        json.dump({**slot, "cpus": format_cpu_list(slot["cpus"])}, f, indent=4)
+
+    connection.send_bytes(cloudpickle.dumps(ret))
+    connection.close()
+
+
+class SlotsLauncher(Launcher):
+    def __init__(self, **kwargs: Any) -> None:
+        """
+        Runs sweep points concurrently, each one in a freshly spawned process pinned to its own slot of cpus.
+        Slots are disjoint sets of whole physical cores that never span numa nodes. Points are scheduled
+        largest estimated memory first, and only while the running ones fit in the memory budget.
+        """
+        self.config: Optional[DictConfig] = None
+        self.task_function: Optional[TaskFunction] = None
+        self.hydra_context: Optional[HydraContext] = None
+
+        self.cores_per_slot: Optional[int] = kwargs["cores_per_slot"]
+        self.use_smt: bool = kwargs["use_smt"]
+        self.set_num_threads: bool = kwargs["set_num_threads"]
+        self.memory_budget: Optional[int] = kwargs["memory_budget"]
+        self.memory_factor: float = kwargs["memory_factor"]
+        self.default_memory: int = kwargs["default_memory"]
+
+    def setup(self, *, hydra_context: HydraContext, task_function: TaskFunction, config: DictConfig) -> None:
+        self.config = config
+        self.task_function = task_function
+        self.hydra_context = hydra_context
+
+    def estimate_memory(self, overrides: Sequence[str]) -> int:
+        sweep_config = self.hydra_context.config_loader.load_sweep_config(self.config, list(overrides))
+        weights_size = get_model_weights_size(sweep_config.model, sweep_config.get("hub_kwargs", {}))
+        if weights_size is None:
+            return self.default_memory
+        return int(self.memory_factor * bytes_to_mega_bytes(weights_size))
+
+    def get_job_overrides(self, overrides: Sequence[str], slot: Dict[str, Any]) -> List[str]:
+        overrides = list(overrides)
+        # explicit thread counts in the sweep take precedence over the slot's
+        if self.set_num_threads and not any(o.startswith("backend.intra_op_num_threads=") for o in overrides):
+            overrides.append(f"backend.intra_op_num_threads={len(slot['cpus'])}")
+        return overrides
+
+    def launch(self, job_overrides: Sequence[Sequence[str]], initial_job_idx: int) -> Sequence[JobReturn]:
+        setup_globals()
+        assert self.config is not None
+        assert self.task_function is not None
+        assert self.hydra_context is not None
+
+        configure_log(self.config.hydra.hydra_logging, self.config.hydra.verbose)
+        sweep_dir = Path(str(self.config.hydra.sweep.dir))
+        sweep_dir.mkdir(parents=True, exist_ok=True)
+
+        slots = get_slots(self.cores_per_slot, self.use_smt)
+        memory_budget = self.memory_budget or bytes_to_mega_bytes(psutil.virtual_memory().available)
+        log.info(f"SlotsLauncher is launching {len(job_overrides)} jobs on {len(slots)} slots")
+        for slot in slots:
+            log.info(f"\tslot #{slot['slot']} : numa node {slot['numa_node']}, cpus {format_cpu_list(slot['cpus'])}")
+        log.info(f"Launching jobs, sweep output dir : {sweep_dir}")
+
+        memory_estimates = [self.estimate_memory(overrides) for overrides in job_overrides]
+        for idx, overrides in enumerate(job_overrides):
+            log.info(f"\t#{idx} : {' '.join(filter_overrides(overrides))} (~{memory_estimates[idx]} MB)")
+
+        # largest first, so that the big jobs don't end up running alone at the end of the sweep
+        pending = sorted(range(len(job_overrides)), key=lambda idx: memory_estimates[idx], reverse=True)
+        free_slots = list(slots)
+        running: Dict[int, Dict[str, Any]] = {}
+        runs: Dict[int, JobReturn] = {}
+
+        context = multiprocessing.get_context("spawn")
+        pickled_job_context = cloudpickle.dumps(
+            (self.hydra_context, self.config, self.task_function, Singleton.get_state())
+        )
+
+        while pending or running:
+            used_memory = sum(memory_estimates[idx] for idx in running)
+            for idx in list(pending):
+                if not free_slots:
+                    break
+                # a job that doesn't fit in the budget on its own still runs, but alone
+                if running and used_memory + memory_estimates[idx] > memory_budget:
+                    continue
+
+                slot = free_slots.pop(0)
+                parent_connection, child_connection = context.Pipe(duplex=False)
+                process = context.Process(
+                    target=execute_job,
+                    args=(
+                        child_connection,
+                        initial_job_idx + idx,
+                        self.get_job_overrides(job_overrides[idx], slot),
+                        slot,
+                        pickled_job_context,
+                    ),
+                )
+                process.start()
+                child_connection.close()
+                log.info(f"\tstarted #{idx} on slot #{slot['slot']}")
+
+                pending.remove(idx)
+                used_memory += memory_estimates[idx]
+                running[idx] = {"process": process, "connection": parent_connection, "slot": slot}
+
+            # the result is received before joining, a large one would otherwise block the child on send
+            ready = wait([job["connection"] for job in running.values()])
+            for idx, job in list(running.items()):
+                if job["connection"] not in ready:
+                    continue
+
+                try:
+                    runs[idx] = cloudpickle.loads(job["connection"].recv_bytes())
+                except EOFError:
+                    job["process"].join()
+                    runs[idx] = JobReturn(overrides=list(job_overrides[idx]), status=JobStatus.FAILED)
+                    runs[idx]._return_value = RuntimeError(
+                        f"Job #{idx} exited with code {job['process'].exitcode} before returning"
+                    )
+                job["process"].join()
+                free_slots.append(job["slot"])
+                del running[idx]
+
+        return [runs[idx] for idx in range(len(job_overrides))]
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..env_utils import bytes_to_mega_bytes
+from ..metadata_cache import get_cached_metadata
+
+LOGGER = getLogger("artifact_cache")
+
+ARTIFACT_CACHE_DIR = os.environ.get(
+    "OPTIMUM_BENCHMARK_ARTIFACT_CACHE",
+    os.path.join(os.path.expanduser("~/.cache"), "optimum-benchmark", "artifacts"),
+)
+
+
+def get_artifact_key(params: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def get_model_revision(model: str, hub_kwargs: Dict[str, Any]) -> Optional[str]:
+    # branches move, the commit they point to at the time of the run is what identifies the weights
+    if os.path.isdir(model):
+        return None
+
+    try:
+        from huggingface_hub import HfApi
+
+        # resolved once per revision, until it expires or is refreshed with `hub_kwargs.force_download`
+        return get_cached_metadata(
+            model,
+            hub_kwargs.get("revision"),
+            "commit",
+            lambda: HfApi().model_info(model, revision=hub_kwargs.get("revision")).sha,
+            refresh=hub_kwargs.get("force_download", False),
+        )
+    except Exception as e:
+        LOGGER.warning(f"\t+ Could not resolve the commit of {model}, keying its artifacts by revision: {e}")
+        return hub_kwargs.get("revision")
+
+
+def get_directory_size(path: Path) -> int:
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+class ArtifactCache:
+    """
+    An on-disk cache of the models produced by a backend's preparation stages (export, optimization, etc.).
+    Each stage's output is stored in its own directory, keyed by the key of the stage that produced its input and
+    the stage's parameters, so that stages are reused independently. Entries are written elsewhere and moved in
+    place once complete, and the least recently used ones are evicted when the cache exceeds `max_size` (MB).
+    """
+
+    def __init__(self, cache_dir: str = ARTIFACT_CACHE_DIR, max_size: Optional[int] = None):
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size
+
+    def get_entry_dir(self, stage: str, key: str) -> Path:
+        return self.cache_dir / f"{stage}-{key}"
+
+    def get_metadata_path(self, stage: str, key: str) -> Path:
+        return self.cache_dir / f"{stage}-{key}.json"
+
+    def get(self, stage: str, key: str) -> Optional[str]:
+        metadata_path = self.get_metadata_path(stage, key)
+        if not metadata_path.exists():
+            return None
+
+        with open(metadata_path) as f:
+            metadata = json.load(f)
+        metadata["last_used"] = time.time()
+        with open(metadata_path, "w") as f:
+            json.dump(metadata, f, indent=4)
+
+        return str(self.get_entry_dir(stage, key))
+
+    def get_or_build(
+        self, stage: str, key: str, params: Dict[str, Any], build: Callable[[str], None]
+    ) -> Tuple[str, bool]:
+        # returns the stage's model directory and whether it was found in the cache
+        cached_dir = self.get(stage, key)
+        if cached_dir is not None:
+            LOGGER.info(f"\t+ Reusing the {stage} stage's model from the artifact cache: {cached_dir}")
+            return cached_dir, True
+
+        with self.build(stage, key, params) as output_dir:
+            build(output_dir)
+        cached_dir = str(self.get_entry_dir(stage, key))
+        LOGGER.info(f"\t+ Cached the {stage} stage's model in the artifact cache: {cached_dir}")
+
+        return cached_dir, False
+
+    @contextmanager
+    def build(self, stage: str, key: str, params: Dict[str, Any]):
+        # concurrent runs may build the same entry, the first one to finish wins
+        tmp_dir = self.cache_dir / f".{stage}-{key}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        try:
+            yield str(tmp_dir)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        entry_dir = self.get_entry_dir(stage, key)
+        try:
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self.track(stage, key, params)
+
+    def track(self, stage: str, key: str, params: Dict[str, Any]) -> None:
+        # (re)computes the size of an entry, also used for directories filled by a library's own cache
+        entry_dir = self.get_entry_dir(stage, key)
+        metadata_path = self.get_metadata_path(stage, key)
+        try:
+            with open(metadata_path) as f:
+                created_at = json.load(f)["created_at"]
+        except (OSError, ValueError, KeyError):
+            created_at = time.time()
+
+        with open(metadata_path, "w") as f:
+            json.dump(
+                {
+                    "stage": stage,
+                    "key": key,
+                    "params": params,
+                    "size": get_directory_size(entry_dir),
+                    "created_at": created_at,
+                    "last_used": time.time(),
+                },
+                f,
+                indent=4,
+                default=str,
+            )
+
+        self.evict(keep=[entry_dir.name])
+
+    def list_entries(self) -> List[Dict[str, Any]]:
+        entries = []
+        for metadata_path in self.cache_dir.glob("*.json"):
+            try:
+                with open(metadata_path) as f:
+                    entries.append(json.load(f))
+            except (OSError, ValueError):
+                # being written or evicted by another run
+                continue
+
+        return entries
+
+    def evict(self, keep: Optional[List[str]] = None) -> None:
+        if self.max_size is None:
+            return
+
+        keep = keep or []
+        entries = sorted(self.list_entries(), key=lambda entry: entry["last_used"])
+        total_size = sum(entry["size"] for entry in entries)
+        for entry in entries:
+            if bytes_to_mega_bytes(total_size) <= self.max_size:
+                break
+
+            name = f"{entry['stage']}-{entry['key']}"
+            if name in keep:
+                continue
+
+            LOGGER.info(f"\t+ Evicting {name} from the artifact cache")
+            self.get_metadata_path(entry["stage"], entry["key"]).unlink(missing_ok=True)
+            shutil.rmtree(self.get_entry_dir(entry["stage"], entry["key"]), ignore_errors=True)
+            total_size -= entry["size"]
@@ -20,7 +20,6 @@ from typing import (
 import numpy as np
 import torch
 from optimum.exporters import TasksManager
-from transformers import AutoConfig, AutoProcessor
 
 if TYPE_CHECKING:
     from datasets import Dataset
@@ -35,7 +34,9 @@ if TYPE_CHECKING:
 
     from .utils import PreTrainedProcessor
 
+from ..metadata_cache import load_pretrained_config, load_pretrained_processor
 from ..task_utils import DIFFUSION_TASKS, TEXT_GENERATION_TASKS
+from ..trackers.startup import track_startup_phase
 from .config import BackendConfigT
 from .utils import (
     check_no_process_is_running_on_cuda_device,
@@ -71,20 +72,17 @@ class Backend(Generic[BackendConfigT], ABC):
         else:
             # for models
             self.library = "transformers"
-            self.pretrained_config = AutoConfig.from_pretrained(
-                pretrained_model_name_or_path=self.model, **self.hub_kwargs
-            )
+            # served from the metadata cache after the first run, see `load_pretrained_config`
+            with track_startup_phase("config_fetch"):
+                self.pretrained_config = load_pretrained_config(self.model, self.hub_kwargs)
             self.model_type = self.pretrained_config.model_type
 
-            try:
-                # the processor sometimes contains information about the model's input shapes that's not available in the config
-                self.pretrained_processor = AutoProcessor.from_pretrained(
-                    pretrained_model_name_or_path=self.model, **self.hub_kwargs
-                )
-            except ValueError:
+            # the processor sometimes contains information about the model's input shapes that's not available in the config
+            with track_startup_phase("processor_fetch"):
+                self.pretrained_processor = load_pretrained_processor(self.model, self.hub_kwargs)
+            if self.pretrained_processor is None:
                 # sometimes the processor is not available or can't be determined/detected
                 LOGGER.warning("Could not find the model's preprocessor")
-                self.pretrained_processor = None
 
         self.automodel_class = TasksManager.get_model_class_for_task(
             task=self.task, library=self.library, model_type=self.model_type
@@ -154,13 +152,15 @@ class Backend(Generic[BackendConfigT], ABC):
             # torch.backends.cudnn.deterministic = True # same as above
             # torch.backends.cudnn.benchmark = False  # might reduce performance
 
-    def prepare_input(self, input: Dict[str, Any]) -> Dict[str, Any]:
+    def prepare_input(self, input: Dict[str, Any], mode: str = "forward") -> Dict[str, Any]:
         if self.is_diffusion_pipeline():
             # diffusion pipelines expect a list of strings as input
             return input
         else:
-            # models expect tensors on the target device as input
+            # models expect tensors on the target device as input, on cpu they share the memory of the numpy arrays
             for key, value in input.items():
+                if isinstance(value, np.ndarray):
+                    value = torch.from_numpy(value)
                 input[key] = value.to(self.device)
 
         return input
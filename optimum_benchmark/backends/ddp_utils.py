@@ -2,16 +2,24 @@
 
 import logging.config
 import os
+from dataclasses import dataclass
 from logging import getLogger
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Type, Union
 
 from omegaconf import OmegaConf
 
 if TYPE_CHECKING:
-    from transformers import TrainerState
+    from datasets import Dataset
+    from transformers import PreTrainedModel, TrainerState
 
+    from .base import Backend
+    from .config import BackendConfig
+
+from ..env_utils import format_cpu_list, get_numa_nodes, get_physical_cores
 from ..import_utils import is_torch_distributed_available
 
+LOGGER = getLogger("ddp")
+
 # from launchConfig in https://github.com/pytorch/pytorch/blob/v2.0.0/torch/distributed/launcher/api.py#L29 adjusted
 # to defaults of torch.distributed.run in https://github.com/pytorch/pytorch/blob/v2.0.0/torch/distributed/run.py#L770
 DDP_CONFIG = {
@@ -33,6 +41,85 @@ DDP_CONFIG = {
     "metrics_cfg": {},
     "local_addr": None,
 }
+# on cpu, one rank per numa node by default
+GLOO_DDP_CONFIG = {
+    **DDP_CONFIG,
+    "nproc_per_node": "${numa_node_count:}",
+}
+# the collective communication backend of the ranks, gloo on cpu
+DDP_BACKENDS = ["nccl", "gloo"]
+
+OmegaConf.register_new_resolver("infer_ddp_backend", lambda device: "gloo" if device == "cpu" else "nccl")
+OmegaConf.register_new_resolver("numa_node_count", lambda: len(get_numa_nodes()))
+
+
+def get_available_physical_cores() -> List[List[int]]:
+    # numa node by numa node, so that consecutive cores share a node
+    return [core_cpus for node_cpus in get_numa_nodes() for core_cpus in get_physical_cores(node_cpus)]
+
+
+def get_cores_per_rank(nproc_per_node: int, cores_per_rank: Optional[int] = None) -> Optional[int]:
+    """
+    The number of physical cores each cpu ddp rank is pinned to, by default the available ones split evenly.
+    Returns None when there are more ranks than physical cores, in which case the ranks aren't pinned.
+    """
+    num_physical_cores = len(get_available_physical_cores())
+
+    if cores_per_rank is None:
+        if num_physical_cores < nproc_per_node:
+            LOGGER.warning(
+                f"\t+ {nproc_per_node} ranks share {num_physical_cores} physical cores, they won't be pinned to cores"
+            )
+            return None
+        cores_per_rank = num_physical_cores // nproc_per_node
+
+    if cores_per_rank * nproc_per_node > num_physical_cores:
+        raise ValueError(
+            f"Can't pin {nproc_per_node} ranks to {cores_per_rank} physical cores each, "
+            f"only {num_physical_cores} physical cores are available."
+        )
+
+    return cores_per_rank
+
+
+def pin_worker_to_cores(local_rank: int, cores_per_rank: int) -> List[int]:
+    """
+    Pins the worker's process to the `local_rank`-th group of `cores_per_rank` physical cores, which only spans several
+    numa nodes when a node has less cores than that, and sets pytorch's number of threads to its number of cores.
+    """
+    import torch
+
+    rank_cores = get_available_physical_cores()[local_rank * cores_per_rank : (local_rank + 1) * cores_per_rank]
+    rank_cpus = [cpu for core_cpus in rank_cores for cpu in core_cpus]
+    os.sched_setaffinity(0, rank_cpus)
+    torch.set_num_threads(len(rank_cores))
+
+    return rank_cpus
+
+
+@dataclass
+class ModelBuilder:
+    """
+    Builds the backend's model inside a ddp worker, from the model's name/path and the backend's config, so that the
+    materialized model doesn't have to be pickled and sent to each worker at launch.
+    """
+
+    backend_class: Type["Backend"]
+    model: str
+    task: str
+    device: str
+    hub_kwargs: Dict[str, Any]
+    config: "BackendConfig"
+
+    def build(self, local_rank: int) -> "PreTrainedModel":
+        # each rank builds its model on its own device
+        device = f"cuda:{local_rank}" if self.device.startswith("cuda") else self.device
+        backend = self.backend_class(model=self.model, task=self.task, device=device, hub_kwargs=self.hub_kwargs)
+        backend.config = self.config
+        backend.seed()
+        backend.load_model()
+
+        return backend.pretrained_model
 
 
 def get_worker_logger(name: Optional[str] = None, log_all: bool = False) -> logging.Logger:
@@ -59,6 +146,8 @@ def training_worker(args) -> "TrainerState":
     training_data_collator = args[7]
     training_callbacks = args[8]
     pretrained_model = args[9]
+    # only set for ddp on cpu
+    cores_per_rank = args[10]
 
     if use_ddp:
         LOGGER_WORKER = get_worker_logger("pytorch-ddp-worker", log_all=False)
@@ -69,6 +158,19 @@ def training_worker(args) -> "TrainerState":
     else:
         LOGGER_WORKER = backend_logger
 
+    if cores_per_rank is not None:
+        rank_cpus = pin_worker_to_cores(int(os.environ["LOCAL_RANK"]), cores_per_rank)
+        LOGGER_WORKER.info(f"\t+ Pinned worker to cpus {format_cpu_list(rank_cpus)}")
+
+    if isinstance(training_dataset, str):
+        from datasets import Dataset
+
+        LOGGER_WORKER.info(f"\t+ Memory-mapping the training dataset {training_dataset}")
+        training_dataset = Dataset.from_file(training_dataset)
+    if isinstance(pretrained_model, ModelBuilder):
+        LOGGER_WORKER.info("\t+ Building the model in the worker")
+        pretrained_model = pretrained_model.build(int(os.environ["LOCAL_RANK"]))
+
     LOGGER_WORKER.info(f"\t+ Setting dataset format to `{dataset_format}`.")
     training_dataset.set_format(type=dataset_format, columns=list(training_dataset.features.keys()))
     LOGGER_WORKER.info("\t+ Wrapping training arguments with transformers.TrainingArguments")
@@ -87,6 +189,32 @@ def training_worker(args) -> "TrainerState":
     return trainer.state
 
 
+def get_worker_dataset(training_dataset: "Dataset") -> Union["Dataset", str]:
+    """
+    The arrow file of a memory-mapped dataset, which each worker maps again instead of unpickling its own copy of
+    the dataset, and which they all share through the page cache. The dataset itself when it's in memory.
+    """
+    # a dataset with an indices mapping (e.g. after a shuffle or a select) isn't its arrow file anymore
+    if len(training_dataset.cache_files) == 1 and training_dataset._indices is None:
+        return training_dataset.cache_files[0]["filename"]
+
+    return training_dataset
+
+
+def gather_worker_states(worker_states: Dict[int, "TrainerState"]) -> "TrainerState":
+    """
+    Returns the state of the first worker, like transformers logs it, since its throughput is already computed with
+    the batch size of the whole world. The memory is tracked by each worker for its own process though, so the memory
+    timelines of all the workers are gathered in it.
+    """
+    trainer_state = worker_states[0]
+    if hasattr(trainer_state, "memory_timelines"):
+        for worker_state in worker_states.values():
+            trainer_state.memory_timelines.update(worker_state.memory_timelines)
+
+    return trainer_state
+
+
 # a conditional decorator that is only applied if torch.distributed.elastic.multiprocessing.errors.record is available
 def record_if_available(func):
     if is_torch_distributed_available():
@@ -10,6 +10,7 @@ from neural_compressor.config import (
 )
 from optimum.intel.neural_compressor.quantization import INCQuantizer
 
+from ...trackers.startup import track_startup_phase
 from ..base import Backend
 from .config import INCConfig
 from .utils import TASKS_TO_INCMODELS
@@ -50,14 +51,17 @@ class INCBackend(Backend[INCConfig]):
 
         self.load_incmodel_from_pretrained()
 
+    @track_startup_phase("weights_loading")
     def load_automodel_from_pretrained(self) -> None:
         LOGGER.info("\t+ Loading AutoModel")
         self.pretrained_model = self.automodel_class.from_pretrained(self.model, **self.hub_kwargs)
 
+    @track_startup_phase("incmodel_loading")
     def load_incmodel_from_pretrained(self) -> None:
         LOGGER.info("\t+ Loading INCModel")
         self.pretrained_model = self.incmodel_class.from_pretrained(self.model, **self.hub_kwargs)
 
+    @track_startup_phase("quantization")
     def quantize_automodel(self) -> None:
         LOGGER.info("\t+ Attempting to quantize model")
         quantized_model_path = f"{self.tmpdir.name}/quantized"
@@ -1,5 +1,6 @@
 import gc
 import os
+import shutil
 from logging import getLogger
 from tempfile import TemporaryDirectory
 from typing import TYPE_CHECKING, Any, Callable, Dict, List
@@ -8,6 +9,7 @@ import torch
 from hydra.utils import get_class
 from onnxruntime import SessionOptions
 from optimum.onnxruntime import (
+    ONNX_DECODER_MERGED_NAME,
     ONNX_DECODER_NAME,
     ONNX_DECODER_WITH_PAST_NAME,
     ORTOptimizer,
@@ -27,9 +29,19 @@ if TYPE_CHECKING:
     from datasets import Dataset
     from transformers import TrainerCallback, TrainerState
 
+from ...import_utils import onnxruntime_version, optimum_version
 from ...profilers.ort_profiler import ORTProfilingWrapper
+from ...trackers.startup import track_startup_phase
+from ..artifact_cache import ArtifactCache, get_artifact_key, get_model_revision
 from ..base import Backend
-from ..ddp_utils import record_if_available, training_worker
+from ..ddp_utils import (
+    ModelBuilder,
+    gather_worker_states,
+    get_cores_per_rank,
+    get_worker_dataset,
+    record_if_available,
+    training_worker,
+)
 from ..optimum_utils import main_export
 from ..pytorch.utils import randomize_weights
 from .config import ORTConfig
@@ -73,20 +85,11 @@ class ORTBackend(Backend[ORTConfig]):
         ###### Training with ORTModule ######
         # ort-training is basically a different package so we might need to seperate these two backends in the future
         if not self.config.use_inference_session:
-            if self.config.no_weights:
-                self.load_automodel_from_config()
+            if self.config.use_ddp:
+                # each ddp worker builds its own model, a copy in this process would never be used
+                LOGGER.info("\t+ Deferring the model loading to the ddp workers")
             else:
-                self.load_automodel_from_pretrained()
-
-            if self.config.peft_strategy is not None:
-                LOGGER.info("\t+ Applying PEFT")
-                from peft import get_peft_model
-
-                from ..peft_utils import get_peft_config_class
-
-                peft_config_class = get_peft_config_class(self.config.peft_strategy)
-                peft_config = peft_config_class(**self.config.peft_config)
-                self.pretrained_model = get_peft_model(self.pretrained_model, peft_config=peft_config)
+                self.load_model()
             # early exit because nothing of the following can be applied to training
             return
 
@@ -102,6 +105,25 @@ class ORTBackend(Backend[ORTConfig]):
         # Some statefullness to handle the different combinations of options
         self.export = self.config.export
         self.use_merged = self.config.use_merged
+        self.merging_config = None
+
+        if self.config.cache_artifacts:
+            self.artifact_cache = ArtifactCache(max_size=self.config.artifact_cache_max_size)
+            # every stage's key is derived from this one and the keys of the stages before it
+            self.artifact_key = get_artifact_key(
+                {
+                    "model": self.model,
+                    "revision": get_model_revision(self.model, self.hub_kwargs),
+                    "task": self.true_task,
+                    "device": self.device.type,
+                    "torch_dtype": self.config.torch_dtype,
+                    "no_weights": self.config.no_weights,
+                    # random weights are seeded
+                    "seed": self.config.seed if self.config.no_weights else None,
+                    "optimum_version": optimum_version(),
+                    "onnxruntime_version": onnxruntime_version(),
+                }
+            )
 
         if self.is_diffusion_pipeline():
             self.load_ortmodel()
@@ -109,31 +131,81 @@ class ORTBackend(Backend[ORTConfig]):
             return
 
         if self.config.no_weights:
-            self.load_automodel_from_config()  # creates dummy automodel
-            self.export_automodel()  # exports automodel
+            self.run_stage("export", {}, self.export_automodel)  # creates dummy automodel, exports it
             self.export = False
         else:
             if self.config.export:
                 self.use_merged = False  # merging is handeled seperately
-                self.load_automodel_from_pretrained()  # creates automodel from pretrained
-                self.export_automodel()  # exports automodel
+                self.run_stage("export", {}, self.export_automodel)  # creates automodel, exports it
                 self.export = False
 
         self.delete_pretrained_model()  # deletes automodel
 
         if self.config.auto_optimization or self.config.optimization:
-            self.optimize_onnx_files()
+            self.run_stage(
+                "optimize",
+                {
+                    "auto_optimization": self.config.auto_optimization,
+                    "auto_optimization_config": self.config.auto_optimization_config,
+                    "optimization": self.config.optimization,
+                    "optimization_config": self.config.optimization_config,
+                },
+                self.optimize_onnx_files,
+            )
 
         if self.config.use_merged:
-            self.merge_onnx_files()
+            self.run_stage("merge", {}, self.merge_onnx_files)
             self.use_merged = True
 
         if self.config.auto_quantization or self.config.quantization:
-            self.quantize_onnx_files()
+            self.run_stage(
+                "quantize",
+                {
+                    "auto_quantization": self.config.auto_quantization,
+                    "auto_quantization_config": self.config.auto_quantization_config,
+                    "quantization": self.config.quantization,
+                    "quantization_config": self.config.quantization_config,
+                    "calibration": self.config.calibration,
+                    "calibration_config": self.config.calibration_config,
+                    "use_merged": self.config.use_merged,
+                },
+                self.quantize_onnx_files,
+            )
 
         self.load_ortmodel()
         self.tmpdir.cleanup()
 
+    def run_stage(self, stage: str, params: Dict[str, Any], build: Callable[[str], None]) -> None:
+        # a stage builds its onnx model(s) in the given directory, from the ones in self.model
+        if not self.config.cache_artifacts:
+            output_dir = f"{self.tmpdir.name}/{stage}"
+            build(output_dir)
+            self.model = output_dir
+            return
+
+        self.artifact_key = get_artifact_key({"input": self.artifact_key, "stage": stage, **params})
+        self.model, _ = self.artifact_cache.get_or_build(stage, self.artifact_key, params, build)
+
+    def load_model(self) -> None:
+        # the model trained with ORTModule, also called by each ddp worker to build its own, see `ModelBuilder`
+        self.torch_dtype = getattr(torch, self.config.torch_dtype) if self.config.torch_dtype is not None else None
+
+        if self.config.no_weights:
+            self.load_automodel_from_config()
+        else:
+            self.load_automodel_from_pretrained()
+
+        if self.config.peft_strategy is not None:
+            LOGGER.info("\t+ Applying PEFT")
+            from peft import get_peft_model
+
+            from ..peft_utils import get_peft_config_class
+
+            peft_config_class = get_peft_config_class(self.config.peft_strategy)
+            peft_config = peft_config_class(**self.config.peft_config)
+            self.pretrained_model = get_peft_model(self.pretrained_model, peft_config=peft_config)
+
+    @track_startup_phase("weights_loading")
     def load_automodel_from_config(self) -> None:
         # TODO: create no_weights tests
         from accelerate import init_empty_weights
@@ -148,6 +220,7 @@ class ORTBackend(Backend[ORTConfig]):
         self.pretrained_model.to_empty(device=self.device)
         randomize_weights(self.pretrained_model)
 
+    @track_startup_phase("weights_loading")
     def load_automodel_from_pretrained(self) -> None:
         LOGGER.info("\t+ Loading AutoModel from pretrained")
         with self.device:
@@ -157,6 +230,7 @@ class ORTBackend(Backend[ORTConfig]):
                 **self.hub_kwargs,
             )
 
+    @track_startup_phase("session_creation")
     def load_ortmodel(self) -> None:
         LOGGER.info("\t+ Loading ORTModel")
         self.pretrained_model = self.ortmodel_class.from_pretrained(
@@ -183,9 +257,14 @@ class ORTBackend(Backend[ORTConfig]):
     def true_task(self) -> str:
         return self.task + "-with-past" if self.config.use_cache and self.is_text_generation_model() else self.task
 
-    def export_automodel(self) -> None:
+    @track_startup_phase("export")
+    def export_automodel(self, exported_model_dir: str) -> None:
+        if self.config.no_weights:
+            self.load_automodel_from_config()
+        else:
+            self.load_automodel_from_pretrained()
+
         LOGGER.info("\t+ Exporting AutoModel to ONNX")
-        exported_model_dir = f"{self.tmpdir.name}/exported_model"
         self.merging_config, self.models_and_onnx_configs = main_export(
             self.model,
             output=exported_model_dir,
@@ -196,20 +275,32 @@ class ORTBackend(Backend[ORTConfig]):
             # we hijack the model instantiation and use our random weights model
             model=self.pretrained_model,
         )
-        self.model = exported_model_dir
 
-    def merge_onnx_files(self) -> None:
+    @track_startup_phase("merging")
+    def merge_onnx_files(self, merged_model_dir: str) -> None:
         LOGGER.info("\t+ Post-processing the exported model")
-        self.merging_config.post_process_exported_models(self.model, self.models_and_onnx_configs, None)
+        shutil.copytree(self.model, merged_model_dir, dirs_exist_ok=True)
+        if self.merging_config is not None:
+            self.merging_config.post_process_exported_models(merged_model_dir, self.models_and_onnx_configs, None)
+        else:
+            # the exported model comes from the artifact cache, without the configs used to export it
+            from optimum.onnx import merge_decoders
+
+            merge_decoders(
+                decoder=os.path.join(merged_model_dir, ONNX_DECODER_NAME),
+                decoder_with_past=os.path.join(merged_model_dir, ONNX_DECODER_WITH_PAST_NAME),
+                save_path=os.path.join(merged_model_dir, ONNX_DECODER_MERGED_NAME),
+                strict=False,
+            )
 
     @property
     def onnx_files_names(self):
         assert os.path.isdir(self.model), f"{self.model} is not a directory"
         return [file for file in os.listdir(self.model) if file.endswith(".onnx")]
 
-    def optimize_onnx_files(self) -> None:
+    @track_startup_phase("optimization")
+    def optimize_onnx_files(self, optimized_model_path: str) -> None:
         LOGGER.info("\t+ Attempting optimization")
-        optimized_model_path = f"{self.tmpdir.name}/optimized"
         LOGGER.info("\t+ Processing optimization config")
         if self.config.auto_optimization is not None:
             optimization_config = AutoOptimizationConfig.with_optimization_level(
@@ -232,7 +323,6 @@ class ORTBackend(Backend[ORTConfig]):
             use_external_data_format=None,
             one_external_file=True,
         )
-        self.model = optimized_model_path
 
     @property
     def onnx_files_names_to_quantize(self):
@@ -248,9 +338,9 @@ class ORTBackend(Backend[ORTConfig]):
         else:
             return self.onnx_files_names
 
-    def quantize_onnx_files(self) -> None:
+    @track_startup_phase("quantization")
+    def quantize_onnx_files(self, quantized_model_path: str) -> None:
         LOGGER.info("\t+ Attempting quantization")
-        quantized_model_path = f"{self.tmpdir.name}/quantized"
         LOGGER.info("\t+ Processing quantization config")
         if self.config.calibration and len(self.onnx_files_names_to_quantize) > 1:
             raise NotImplementedError("Calibration is not supported for models with multiple components")
@@ -309,7 +399,14 @@ class ORTBackend(Backend[ORTConfig]):
                     use_external_data_format=False,
                     preprocessor=None,
                 )
-        self.model = quantized_model_path
+
+    def prepare_input(self, input: Dict[str, Any], mode: str = "forward") -> Dict[str, Any]:
+        if mode == "forward" and self.device.type == "cpu" and not self.config.use_io_binding:
+            # the session runs on the numpy arrays as they are, without going through torch tensors
+            return input
+
+        # io binding binds the memory of torch tensors on the device and generation loops over torch tensors
+        return super().prepare_input(input, mode)
 
     def prepare_for_profiling(self, input_names: List[str]) -> None:
         LOGGER.info("Preparing model for profiling")
@@ -324,6 +421,27 @@ class ORTBackend(Backend[ORTConfig]):
         training_callbacks: List["TrainerCallback"],
         training_data_collator: Callable,
     ) -> "TrainerState":
+        cores_per_rank = None
+        if self.config.use_ddp:
+            training_arguments = {"ddp_backend": self.config.ddp_backend, **training_arguments}
+            if self.device.type == "cpu":
+                cores_per_rank = get_cores_per_rank(
+                    self.config.ddp_config["nproc_per_node"], self.config.ddp_cores_per_rank
+                )
+            # the workers share the dataset's file and build their own model, instead of each one
+            # unpickling a copy of them, which would multiply the launch time and memory by the world size
+            training_dataset = get_worker_dataset(training_dataset)
+            pretrained_model = ModelBuilder(
+                backend_class=type(self),
+                model=self.model,
+                task=self.task,
+                device=str(self.device),
+                hub_kwargs=self.hub_kwargs,
+                config=self.config,
+            )
+        else:
+            pretrained_model = self.pretrained_model
+
         worker_args = (
             "torch",
             LOGGER,
@@ -334,7 +452,8 @@ class ORTBackend(Backend[ORTConfig]):
             training_arguments,
             training_data_collator,
             training_callbacks,
-            self.pretrained_model,
+            pretrained_model,
+            cores_per_rank,
         )
 
         if self.config.use_ddp:
@@ -343,7 +462,7 @@ class ORTBackend(Backend[ORTConfig]):
             # For DDP, we log only the state of the first rank as transformers does.
             # since the batch size used in measuring the throughput is the one of world size.
             ddp_config = LaunchConfig(**self.config.ddp_config)
-            results = elastic_launch(config=ddp_config, entrypoint=training_worker)(worker_args)[0]
+            results = gather_worker_states(elastic_launch(config=ddp_config, entrypoint=training_worker)(worker_args))
         else:
             # For DP, we can still use training_worker, simply not wrapped by the elastic_launch class.
             results = training_worker(worker_args)
@@ -6,7 +6,7 @@ from omegaconf import OmegaConf
 
 from ...import_utils import onnxruntime_version
 from ..config import BackendConfig
-from ..ddp_utils import DDP_CONFIG
+from ..ddp_utils import DDP_BACKENDS, DDP_CONFIG, GLOO_DDP_CONFIG
 from ..peft_utils import PEFT_CONFIGS, PEFT_TASKS_TYPES
 
 
@@ -112,6 +112,10 @@ class ORTConfig(BackendConfig):
     use_merged: bool = False
     torch_dtype: Optional[str] = None
 
+    # artifact cache options, in MB
+    cache_artifacts: bool = False
+    artifact_cache_max_size: Optional[int] = None
+
     # provider options
     provider: str = "${infer_provider:${device}}"
     device_id: Optional[int] = "${oc.deprecated:backend.provider_options.device_id}"
@@ -150,6 +154,10 @@ class ORTConfig(BackendConfig):
     # training options
     use_ddp: bool = False
     ddp_config: Dict[str, Any] = field(default_factory=dict)
+    # nccl or gloo (default on cpu), on cpu each rank is pinned to its own `ddp_cores_per_rank` physical cores,
+    # by default the available ones split evenly between the ranks
+    ddp_backend: str = "${infer_ddp_backend:${device}}"
+    ddp_cores_per_rank: Optional[int] = None
 
     # peft options
     peft_strategy: Optional[str] = None
@@ -161,6 +169,11 @@ class ORTConfig(BackendConfig):
         if not self.no_weights and not self.export and self.torch_dtype is not None:
             raise NotImplementedError("Can't convert an exported model's weights to a different dtype.")
 
+        if self.artifact_cache_max_size is not None and self.artifact_cache_max_size <= 0:
+            raise ValueError(
+                f"`artifact_cache_max_size` must be positive. Got {self.artifact_cache_max_size} instead."
+            )
+
         if self.optimization:
             self.optimization_config = OmegaConf.to_object(
                 OmegaConf.merge(OPTIMIZATION_CONFIG, self.optimization_config)
@@ -192,10 +205,16 @@ class ORTConfig(BackendConfig):
             self.calibration_config = OmegaConf.to_object(OmegaConf.merge(CALIBRATION_CONFIG, self.calibration_config))
 
         if self.use_ddp:
-            if CUDA_VISIBLE_DEVICES is None:
-                raise ValueError("`use_ddp` can only be used when CUDA_VISIBLE_DEVICES is set.")
+            if self.ddp_backend not in DDP_BACKENDS:
+                raise ValueError(f"`ddp_backend` must be one of {DDP_BACKENDS}. Got {self.ddp_backend} instead.")
+
+            if self.ddp_backend == "gloo":
+                self.ddp_config = OmegaConf.to_object(OmegaConf.merge(GLOO_DDP_CONFIG, self.ddp_config))
+            else:
+                if CUDA_VISIBLE_DEVICES is None:
+                    raise ValueError("`use_ddp` can only be used when CUDA_VISIBLE_DEVICES is set.")
 
-            self.ddp_config = OmegaConf.to_object(OmegaConf.merge(DDP_CONFIG, self.ddp_config))
+                self.ddp_config = OmegaConf.to_object(OmegaConf.merge(DDP_CONFIG, self.ddp_config))
             # TODO: check if it's not possible to use DDP with multiple nodes
             if self.ddp_config["max_nodes"] > 1 or self.ddp_config["min_nodes"] > 1:
                 raise NotImplementedError("Currently, PyTorch DDP benchmark only supports training on a single node.")
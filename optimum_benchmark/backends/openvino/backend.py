@@ -1,12 +1,18 @@
 import inspect
+import json
+import os
+import time
 from logging import getLogger
 from tempfile import TemporaryDirectory
-from typing import Any, Dict
+from typing import Any, Callable, Dict
 
 from hydra.utils import get_class
 from optimum.intel.openvino import OVConfig as OVQuantizationConfig  # naming conflict
 from optimum.intel.openvino import OVQuantizer
 
+from ...import_utils import openvino_version, optimum_version
+from ...trackers.startup import track_startup_phase
+from ..artifact_cache import ArtifactCache, get_artifact_key, get_model_revision
 from ..base import Backend
 from .config import OVConfig
 from .utils import TASKS_TO_OVMODEL
@@ -38,18 +44,62 @@ class OVBackend(Backend[OVConfig]):
         super().configure(config)
 
         self.tmpdir = TemporaryDirectory()
+        self.load_times = {}
+
+        if self.config.cache_artifacts or self.config.compile_cache:
+            self.artifact_cache = ArtifactCache(max_size=self.config.artifact_cache_max_size)
+            self.artifact_key = get_artifact_key(
+                {
+                    "model": self.model,
+                    "revision": get_model_revision(self.model, self.hub_kwargs),
+                    "task": self.task,
+                    **self.ovmodel_kwargs,
+                    "optimum_version": optimum_version(),
+                    "openvino_version": openvino_version(),
+                }
+            )
 
         if self.config.quantization:
-            self.load_automodel()
-            self.quantize_automodel()
-            self.delete_pretrained_model()  # deletes automodel
+            self.run_stage(
+                "quantize",
+                {
+                    "quantization_config": self.config.quantization_config,
+                    "calibration_config": self.config.calibration_config,
+                    "seed": self.config.seed,
+                },
+                self.quantize_automodel,
+            )
             self.export = False  # quantized model is already exported
+        elif self.config.export and self.config.cache_artifacts:
+            self.run_stage("export", {}, self.export_ovmodel)
+            self.export = False  # exported model is in the cache
         else:
             self.export = self.config.export  # to not change the config's values
 
+        if self.config.compile_cache:
+            os.makedirs(self.compile_cache_dir, exist_ok=True)
+
         self.load_ovmodel()
+        self.save_load_times()
         self.tmpdir.cleanup()
 
+    def run_stage(self, stage: str, params: Dict[str, Any], build: Callable[[str], None]) -> None:
+        # a stage builds its openvino IR in the given directory
+        start = time.perf_counter()
+        if self.config.cache_artifacts or self.config.compile_cache:
+            # also keys the model's compiled blobs, see `compile_cache_dir`
+            self.artifact_key = get_artifact_key({"input": self.artifact_key, "stage": stage, **params})
+
+        if not self.config.cache_artifacts:
+            output_dir = f"{self.tmpdir.name}/{stage}"
+            build(output_dir)
+            self.model = output_dir
+        else:
+            self.model, cache_hit = self.artifact_cache.get_or_build(stage, self.artifact_key, params, build)
+            self.load_times[f"{stage}.artifact_cache"] = "hit" if cache_hit else "miss"
+        self.load_times[f"{stage}(s)"] = time.perf_counter() - start
+
+    @track_startup_phase("weights_loading")
     def load_automodel(self) -> None:
         self.pretrained_model = self.automodel_class.from_pretrained(self.model, **self.hub_kwargs)
 
@@ -60,17 +110,80 @@ class OVBackend(Backend[OVConfig]):
         else:
             return {}
 
+    @property
+    def compile_cache_dir(self) -> str:
+        # openvino's own cache of compiled blobs, stored as an entry of the artifact cache to be counted and evicted
+        return str(self.artifact_cache.get_entry_dir("compile", self.artifact_key))
+
+    @property
+    def ov_config(self) -> Dict[str, Any]:
+        if self.config.compile_cache:
+            return {"ov_config": {"CACHE_DIR": self.compile_cache_dir}}
+        else:
+            return {}
+
     def load_ovmodel(self) -> None:
-        self.pretrained_model = self.ovmodel_class.from_pretrained(
+        LOGGER.info("\t+ Loading OVModel")
+        start = time.perf_counter()
+        # compiled separately to tell the loading time from the compilation time
+        with track_startup_phase("loading"):
+            self.pretrained_model = self.ovmodel_class.from_pretrained(
+                self.model,
+                export=self.export,
+                compile=False,
+                **self.ov_config,
+                **self.ovmodel_kwargs,
+                **self.hub_kwargs,
+            )
+        self.load_times["loading(s)"] = time.perf_counter() - start
+        self.compile_ovmodel("compilation")
+
+    def compile_ovmodel(self, name: str) -> None:
+        LOGGER.info("\t+ Compiling model")
+        compiled_blobs = self.get_compiled_blobs()
+        start = time.perf_counter()
+        with track_startup_phase(name):
+            self.pretrained_model.compile()
+        self.load_times[f"{name}(s)"] = time.perf_counter() - start
+
+        # a cold compilation adds its blob to the cache, a cache hit only imports it
+        if not self.config.compile_cache:
+            self.load_times[f"{name}.compile_cache"] = "disabled"
+        else:
+            if self.get_compiled_blobs() - compiled_blobs:
+                self.load_times[f"{name}.compile_cache"] = "miss"
+            else:
+                self.load_times[f"{name}.compile_cache"] = "hit"
+            # counts the new blobs in the artifact cache's size and marks the entry as used
+            self.artifact_cache.track("compile", self.artifact_key, {"device": self.device.type})
+        LOGGER.info(f"\t+ Compiled in {self.load_times[f'{name}(s)']:.3f}s")
+
+    def get_compiled_blobs(self) -> set:
+        if not self.config.compile_cache or not os.path.isdir(self.compile_cache_dir):
+            return set()
+        return set(os.listdir(self.compile_cache_dir))
+
+    def save_load_times(self) -> None:
+        LOGGER.info("\t+ Saving load times to openvino_load_times.json")
+        with open("openvino_load_times.json", "w") as f:
+            json.dump(self.load_times, f, indent=4)
+
+    @track_startup_phase("export")
+    def export_ovmodel(self, exported_model_path: str) -> None:
+        LOGGER.info("\t+ Exporting model to OpenVINO IR")
+        ovmodel = self.ovmodel_class.from_pretrained(
             self.model,
-            export=self.export,
+            export=True,
+            compile=False,
             **self.ovmodel_kwargs,
             **self.hub_kwargs,
         )
+        ovmodel.save_pretrained(exported_model_path)
 
-    def quantize_automodel(self) -> None:
+    @track_startup_phase("quantization")
+    def quantize_automodel(self, quantized_model_path: str) -> None:
+        self.load_automodel()
         LOGGER.info("\t+ Attempting quantization")
-        quantized_model_path = f"{self.tmpdir.name}/quantized"
         LOGGER.info("\t+ Processing quantization config")
         quantization_config = OVQuantizationConfig(**self.config.quantization_config)
         LOGGER.info("\t+ Creating quantizer")
@@ -93,7 +206,7 @@ class OVBackend(Backend[OVConfig]):
             file_name=None,
             batch_size=1,
         )
-        self.model = quantized_model_path
+        self.delete_pretrained_model()  # deletes automodel
 
     def prepare_for_inference(self, input_shapes: Dict[str, int]) -> None:
         if self.config.reshape:
@@ -110,8 +223,16 @@ class OVBackend(Backend[OVConfig]):
             self.pretrained_model.half()
 
         if self.config.reshape or self.config.half:
-            LOGGER.info("\t+ Compiling model")
-            self.pretrained_model.compile()
+            self.compile_ovmodel("recompilation")
+            self.save_load_times()
+
+    def prepare_input(self, input: Dict[str, Any], mode: str = "forward") -> Dict[str, Any]:
+        if mode == "forward" and not self.is_diffusion_pipeline():
+            # the infer request shares the memory of numpy arrays, torch tensors would be copied to numpy on every call
+            return input
+
+        # generation loops over torch tensors
+        return super().prepare_input(input, mode)
 
     def clean(self) -> None:
         super().clean()
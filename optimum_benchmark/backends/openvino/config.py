@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from omegaconf import OmegaConf
 
@@ -36,9 +36,14 @@ class OVConfig(BackendConfig):
     use_cache: bool = True
     use_merged: bool = False
 
+    # artifact cache options, in MB
+    cache_artifacts: bool = False
+    artifact_cache_max_size: Optional[int] = None
+
     # compiling options
     reshape: bool = False
     half: bool = False
+    compile_cache: bool = False
 
     # quantization options
     quantization: bool = False
@@ -49,6 +54,11 @@ class OVConfig(BackendConfig):
     calibration_config: Dict[str, Any] = field(default_factory=dict)
 
     def __post_init__(self):
+        if self.artifact_cache_max_size is not None and self.artifact_cache_max_size <= 0:
+            raise ValueError(
+                f"`artifact_cache_max_size` must be positive. Got {self.artifact_cache_max_size} instead."
+            )
+
         if self.quantization:
             self.quantization_config = OmegaConf.to_object(
                 OmegaConf.merge(QUANTIZATION_CONFIG, self.quantization_config)
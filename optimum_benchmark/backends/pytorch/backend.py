@@ -1,6 +1,7 @@
 import gc
+from contextlib import contextmanager
 from logging import getLogger
-from typing import TYPE_CHECKING, Any, Callable, Dict, List
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
 
 import torch
 from transformers import BitsAndBytesConfig, GPTQConfig, Trainer, TrainingArguments
@@ -12,8 +13,17 @@ if TYPE_CHECKING:
     from transformers.utils import ModelOutput
 
 from ...profilers.fx_profiler import FXProfilingWrapper
+from ...profilers.torch_profiler import TorchProfiler
+from ...trackers.startup import track_startup_phase
 from ..base import Backend
-from ..ddp_utils import record_if_available, training_worker
+from ..ddp_utils import (
+    ModelBuilder,
+    gather_worker_states,
+    get_cores_per_rank,
+    get_worker_dataset,
+    record_if_available,
+    training_worker,
+)
 from .config import PyTorchConfig
 from .utils import DTYPES_MAPPING, randomize_weights
 
@@ -41,10 +51,26 @@ class PyTorchBackend(Backend[PyTorchConfig]):
         # Threading options
         if self.config.inter_op_num_threads is not None:
             LOGGER.info(f"\t+ Setting pytorch inter_op_num_threads({self.config.inter_op_num_threads}))")
-            torch.set_num_threads(self.config.inter_op_num_threads)
+            torch.set_num_interop_threads(self.config.inter_op_num_threads)
         if self.config.intra_op_num_threads is not None:
             LOGGER.info(f"\t+ Setting pytorch intra_op_num_threads({self.config.intra_op_num_threads}))")
-            torch.set_num_interop_threads(self.config.intra_op_num_threads)
+            torch.set_num_threads(self.config.intra_op_num_threads)
+
+        if self.config.use_ddp:
+            # each ddp worker builds its own model, a copy in this process would never be used
+            LOGGER.info("\t+ Deferring the model loading to the ddp workers")
+        else:
+            self.load_model()
+
+        # Profiler
+        self.torch_profiler: Optional[TorchProfiler] = None
+        if self.config.torch_profiler:
+            LOGGER.info("\t+ Starting torch.profiler")
+            self.torch_profiler = TorchProfiler(device=self.device, config=self.config.torch_profiler_config)
+            self.torch_profiler.start()
+
+    def load_model(self) -> None:
+        # also called by each ddp worker to build its own model, see `ModelBuilder`
 
         # Dtypes options
         self.torch_dtype = getattr(torch, self.config.torch_dtype) if self.config.torch_dtype is not None else None
@@ -69,26 +95,15 @@ class PyTorchBackend(Backend[PyTorchConfig]):
             LOGGER.info("\t+ Using optimum.bettertransformer")
             from optimum.bettertransformer import BetterTransformer
 
-            self.pretrained_model = BetterTransformer.transform(
-                self.pretrained_model,
-                keep_original_model=False,
-            )
+            with track_startup_phase("bettertransformer"):
+                self.pretrained_model = BetterTransformer.transform(
+                    self.pretrained_model,
+                    keep_original_model=False,
+                )
 
         # Compile model
         if self.config.torch_compile:
-            if self.is_diffusion_pipeline():
-                LOGGER.info("\t+ Using torch.compile on unet forward pass")
-                # TODO: should we compile vae and/or clip as well ?
-                self.pretrained_model.unet.forward = torch.compile(
-                    self.pretrained_model.unet.forward,
-                    **self.config.torch_compile_config,
-                )
-            else:
-                LOGGER.info("\t+ Using torch.compile on forward pass")
-                self.pretrained_model.forward = torch.compile(
-                    self.pretrained_model.forward,
-                    **self.config.torch_compile_config,
-                )
+            self.compile_model()
 
         if self.config.peft_strategy is not None:
             LOGGER.info("\t+ Applying PEFT")
@@ -100,6 +115,24 @@ class PyTorchBackend(Backend[PyTorchConfig]):
             peft_config = peft_config_class(**self.config.peft_config)
             self.pretrained_model = get_peft_model(self.pretrained_model, peft_config=peft_config)
 
+    @track_startup_phase("torch_compile")
+    def compile_model(self) -> None:
+        # compilation itself is lazy, it happens during the first forward pass
+        if self.is_diffusion_pipeline():
+            LOGGER.info("\t+ Using torch.compile on unet forward pass")
+            # TODO: should we compile vae and/or clip as well ?
+            self.pretrained_model.unet.forward = torch.compile(
+                self.pretrained_model.unet.forward,
+                **self.config.torch_compile_config,
+            )
+        else:
+            LOGGER.info("\t+ Using torch.compile on forward pass")
+            self.pretrained_model.forward = torch.compile(
+                self.pretrained_model.forward,
+                **self.config.torch_compile_config,
+            )
+
+    @track_startup_phase("weights_loading")
     def load_model_from_pretrained(self) -> None:
         if self.config.quantization_scheme == "gptq":
             LOGGER.info("\t+ Processing GPTQ config")
@@ -155,6 +188,7 @@ class PyTorchBackend(Backend[PyTorchConfig]):
         else:
             return {}
 
+    @track_startup_phase("weights_loading")
     def load_model_from_config(self) -> None:
         # TODO: create no_weights tests
         from accelerate import init_empty_weights
@@ -222,21 +256,36 @@ class PyTorchBackend(Backend[PyTorchConfig]):
         LOGGER.info("\t+ Wrapping model with FXProfilingWrapper")
         self.pretrained_model = FXProfilingWrapper(self.pretrained_model)
 
-    def forward(self, input: Dict[str, Any], kwargs: Dict[str, Any]) -> "ModelOutput":
-        if self.is_diffusion_pipeline():
-            return super().forward(input, kwargs)
+    @contextmanager
+    def profiling_step(self, name: str):
+        # each forward/generate call is a torch.profiler step
+        if self.torch_profiler is None:
+            yield
         else:
-            # TODO: autocast as whole can be managed by one config/kwargs ?
-            with torch.autocast(device_type=self.device.type, dtype=self.amp_dtype, enabled=self.config.amp_autocast):
+            with self.torch_profiler.step(name):
+                yield
+
+    def forward(self, input: Dict[str, Any], kwargs: Dict[str, Any]) -> "ModelOutput":
+        with self.profiling_step("forward"):
+            if self.is_diffusion_pipeline():
                 return super().forward(input, kwargs)
+            else:
+                # TODO: autocast as whole can be managed by one config/kwargs ?
+                with torch.autocast(
+                    device_type=self.device.type, dtype=self.amp_dtype, enabled=self.config.amp_autocast
+                ):
+                    return super().forward(input, kwargs)
 
     def generate(self, input: Dict[str, Any], kwargs: Dict[str, Any]) -> "ModelOutput":
-        if self.is_diffusion_pipeline():
-            return super().generate(input, kwargs)
-        else:
-            # TODO: autocast as whole can be managed by one config/kwargs ?
-            with torch.autocast(device_type=self.device.type, dtype=self.amp_dtype, enabled=self.config.amp_autocast):
+        with self.profiling_step("generate"):
+            if self.is_diffusion_pipeline():
                 return super().generate(input, kwargs)
+            else:
+                # TODO: autocast as whole can be managed by one config/kwargs ?
+                with torch.autocast(
+                    device_type=self.device.type, dtype=self.amp_dtype, enabled=self.config.amp_autocast
+                ):
+                    return super().generate(input, kwargs)
 
     @record_if_available
     def train(
@@ -246,6 +295,27 @@ class PyTorchBackend(Backend[PyTorchConfig]):
         training_callbacks: List["TrainerCallback"],
         training_data_collator: Callable,
     ) -> "TrainerState":
+        cores_per_rank = None
+        if self.config.use_ddp:
+            training_arguments = {"ddp_backend": self.config.ddp_backend, **training_arguments}
+            if self.device.type == "cpu":
+                cores_per_rank = get_cores_per_rank(
+                    self.config.ddp_config["nproc_per_node"], self.config.ddp_cores_per_rank
+                )
+            # the workers share the dataset's file and build their own model, instead of each one
+            # unpickling a copy of them, which would multiply the launch time and memory by the world size
+            training_dataset = get_worker_dataset(training_dataset)
+            pretrained_model = ModelBuilder(
+                backend_class=type(self),
+                model=self.model,
+                task=self.task,
+                device=str(self.device),
+                hub_kwargs=self.hub_kwargs,
+                config=self.config,
+            )
+        else:
+            pretrained_model = self.pretrained_model
+
         worker_args = (
             "torch",
             LOGGER,
@@ -256,7 +326,8 @@ class PyTorchBackend(Backend[PyTorchConfig]):
             training_arguments,
             training_data_collator,
             training_callbacks,
-            self.pretrained_model,
+            pretrained_model,
+            cores_per_rank,
         )
         if self.config.use_ddp:
             from torch.distributed.launcher.api import LaunchConfig, elastic_launch
@@ -264,7 +335,7 @@ class PyTorchBackend(Backend[PyTorchConfig]):
             # For DDP, we log only the state of the first rank as transformers does.
             # since the batch size used in measuring the throughput is the one of world size.
             ddp_config = LaunchConfig(**self.config.ddp_config)
-            results = elastic_launch(config=ddp_config, entrypoint=training_worker)(worker_args)[0]
+            results = gather_worker_states(elastic_launch(config=ddp_config, entrypoint=training_worker)(worker_args))
         else:
             # For DP, we can still use training_worker, simply not wrapped by the elastic_launch class.
             results = training_worker(worker_args)
@@ -272,6 +343,11 @@ class PyTorchBackend(Backend[PyTorchConfig]):
         return results
 
     def clean(self) -> None:
+        if getattr(self, "torch_profiler", None) is not None:
+            LOGGER.info("\t+ Stopping torch.profiler")
+            self.torch_profiler.stop()
+            self.torch_profiler = None
+
         super().clean()
 
         if self.device.type == "cuda":
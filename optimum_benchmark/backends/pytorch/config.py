@@ -6,11 +6,14 @@ from omegaconf import OmegaConf
 
 from ...import_utils import torch_version
 from ..config import BackendConfig
-from ..ddp_utils import DDP_CONFIG
+from ..ddp_utils import DDP_BACKENDS, DDP_CONFIG, GLOO_DDP_CONFIG
 from ..peft_utils import PEFT_CONFIGS, PEFT_TASKS_TYPES
 
+# benchmarks that only run the model in inference mode
+INFERENCE_BENCHMARKS = ["inference", "load", "profiling", "startup"]
+
 OmegaConf.register_new_resolver("device_count", lambda: len(os.environ.get("CUDA_VISIBLE_DEVICES", "").split(",")))
-OmegaConf.register_new_resolver("is_inference", lambda benchmark_name: benchmark_name == "inference")
+OmegaConf.register_new_resolver("is_inference", lambda benchmark_name: benchmark_name in INFERENCE_BENCHMARKS)
 OmegaConf.register_new_resolver("pytorch_version", torch_version)
 
 DEVICE_MAPS = ["auto", "sequential"]
@@ -38,6 +41,28 @@ COMPILE_CONFIG = {
     "options": None,
     "disable": False,
 }
+TORCH_PROFILER_CONFIG = {
+    # forward/generate calls skipped, then profiled but discarded, then recorded, for `repeat` cycles (0 for all)
+    "wait": 1,
+    "warmup": 1,
+    "active": 3,
+    "repeat": 1,
+    "record_shapes": False,
+    "profile_memory": False,
+    "with_stack": False,
+    # key averages table options
+    "sort_by": "self_cpu_time_total",
+    "row_limit": 50,
+}
+TORCH_PROFILER_SORT_KEYS = [
+    "self_cpu_time_total",
+    "cpu_time_total",
+    "self_cuda_time_total",
+    "cuda_time_total",
+    "self_cpu_memory_usage",
+    "self_cuda_memory_usage",
+    "count",
+]
 
 
 @dataclass
@@ -66,6 +91,10 @@ class PyTorchConfig(BackendConfig):
     # optimization options
     bettertransformer: bool = False
 
+    # profiling options
+    torch_profiler: bool = False
+    torch_profiler_config: Dict[str, Any] = field(default_factory=dict)
+
     # quantization options
     quantization_scheme: Optional[str] = None
     quantization_config: Dict[str, Any] = field(default_factory=dict)
@@ -73,6 +102,10 @@ class PyTorchConfig(BackendConfig):
     # training options
     use_ddp: bool = False
     ddp_config: Dict[str, Any] = field(default_factory=dict)
+    # nccl or gloo (default on cpu), on cpu each rank is pinned to its own `ddp_cores_per_rank` physical cores,
+    # by default the available ones split evenly between the ranks
+    ddp_backend: str = "${infer_ddp_backend:${device}}"
+    ddp_cores_per_rank: Optional[int] = None
 
     # peft options
     peft_strategy: Optional[str] = None
@@ -84,6 +117,16 @@ class PyTorchConfig(BackendConfig):
         if self.torch_compile:
             self.torch_compile_config = OmegaConf.to_object(OmegaConf.merge(COMPILE_CONFIG, self.torch_compile_config))
 
+        if self.torch_profiler:
+            self.torch_profiler_config = OmegaConf.to_object(
+                OmegaConf.merge(TORCH_PROFILER_CONFIG, self.torch_profiler_config)
+            )
+            if self.torch_profiler_config["sort_by"] not in TORCH_PROFILER_SORT_KEYS:
+                raise ValueError(
+                    f"`torch_profiler_config.sort_by` must be one of {TORCH_PROFILER_SORT_KEYS}. "
+                    f"Got {self.torch_profiler_config['sort_by']} instead."
+                )
+
         if self.device_map is not None:
             assert CUDA_VISIBLE_DEVICES is not None, "`device_map` can only be used when CUDA_VISIBLE_DEVICES is set."
 
@@ -109,10 +152,16 @@ class PyTorchConfig(BackendConfig):
             )
 
         if self.use_ddp:
-            if CUDA_VISIBLE_DEVICES is None:
-                raise ValueError("`use_ddp` can only be used when CUDA_VISIBLE_DEVICES is set.")
+            if self.ddp_backend not in DDP_BACKENDS:
+                raise ValueError(f"`ddp_backend` must be one of {DDP_BACKENDS}. Got {self.ddp_backend} instead.")
+
+            if self.ddp_backend == "gloo":
+                self.ddp_config = OmegaConf.to_object(OmegaConf.merge(GLOO_DDP_CONFIG, self.ddp_config))
+            else:
+                if CUDA_VISIBLE_DEVICES is None:
+                    raise ValueError("`use_ddp` can only be used when CUDA_VISIBLE_DEVICES is set.")
 
-            self.ddp_config = OmegaConf.to_object(OmegaConf.merge(DDP_CONFIG, self.ddp_config))
+                self.ddp_config = OmegaConf.to_object(OmegaConf.merge(DDP_CONFIG, self.ddp_config))
             # TODO: check if it's not possible to use DDP with multiple nodes
             if self.ddp_config["max_nodes"] > 1 or self.ddp_config["min_nodes"] > 1:
                 raise NotImplementedError("Currently, PyTorch DDP benchmark only supports training on a single node.")
@@ -1,5 +1,7 @@
 import torch
 
+from ...trackers.startup import track_startup_phase
+
 DTYPES_MAPPING = {
     "float32": "fp32",
     "float16": "fp16",
@@ -7,6 +9,7 @@ DTYPES_MAPPING = {
 }
 
 
+@track_startup_phase("weights_randomization")
 def randomize_weights(model):
     for param in model.parameters():
         if torch.cuda.is_available() and param.device.type == "cpu":
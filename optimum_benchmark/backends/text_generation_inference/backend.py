@@ -15,6 +15,7 @@ import docker
 import docker.errors
 import docker.types
 
+from ...trackers.startup import track_startup_phase
 from ..base import Backend
 from ..pytorch.utils import randomize_weights
 from .config import TGIConfig
@@ -87,30 +88,32 @@ class TGIBackend(Backend[TGIConfig]):
             LOGGER.info("\t+ Starting TGI container on CPU device")
             device_requests = None
 
-        self.tgi_container = self.docker_client.containers.run(
-            image=f"{self.config.image}:{self.config.version}",
-            command=self.command,
-            shm_size=self.config.shm_size,
-            volumes={self.config.volume: {"bind": "/data", "mode": "rw"}},
-            ports={"80/tcp": (self.config.address, self.config.port)},
-            device_requests=device_requests,
-            detach=True,
-        )
-
-        LOGGER.info("\t+ Waiting for TGI server to be ready")
-        for line in self.tgi_container.logs(stream=True):
-            tgi_log = line.decode("utf-8").strip()
-            if not tgi_log:
-                continue
-            elif "Connected" in tgi_log:
-                LOGGER.info("\t+ TGI server is ready")
-                break
-            else:
-                LOGGER.info(f"\t {tgi_log}")
+        with track_startup_phase("server_startup"):
+            self.tgi_container = self.docker_client.containers.run(
+                image=f"{self.config.image}:{self.config.version}",
+                command=self.command,
+                shm_size=self.config.shm_size,
+                volumes={self.config.volume: {"bind": "/data", "mode": "rw"}},
+                ports={"80/tcp": (self.config.address, self.config.port)},
+                device_requests=device_requests,
+                detach=True,
+            )
+
+            LOGGER.info("\t+ Waiting for TGI server to be ready")
+            for line in self.tgi_container.logs(stream=True):
+                tgi_log = line.decode("utf-8").strip()
+                if not tgi_log:
+                    continue
+                elif "Connected" in tgi_log:
+                    LOGGER.info("\t+ TGI server is ready")
+                    break
+                else:
+                    LOGGER.info(f"\t {tgi_log}")
 
         LOGGER.info("\t+ Creating InferenceClient")
         self.client = InferenceClient(model=f"http://{self.config.address}:{self.config.port}")
 
+    @track_startup_phase("weights_loading")
     def load_model_from_config(self) -> None:
         LOGGER.info("\t+ Initializing empty weights model on device: meta")
         with init_empty_weights():
@@ -138,6 +141,7 @@ class TGIBackend(Backend[TGIConfig]):
         LOGGER.info("\t+ Saving pretrained model snapshot")
         self.pretrained_model.save_pretrained(self.model_snapshot_path, safe_serialization=True)
 
+    @track_startup_phase("weights_loading")
     def load_model_from_pretrained(self) -> None:
         LOGGER.info("\t+ Downloading pretrained model")
         with init_empty_weights():
@@ -151,7 +155,7 @@ class TGIBackend(Backend[TGIConfig]):
         generation_config.pad_token_id = -101
         generation_config.save_pretrained(self.model_snapshot_path)
 
-    def prepare_input(self, input: Dict[str, Any]) -> Dict[str, Any]:
+    def prepare_input(self, input: Dict[str, Any], mode: str = "forward") -> Dict[str, Any]:
         return {"prompt": self.pretrained_processor.batch_decode(input["input_ids"].tolist())}
 
     def forward(self, input: Dict[str, Any], kwargs: Dict[str, Any]) -> List["TextGenerationResponse"]:
@@ -1,10 +1,14 @@
 from abc import ABC
 from dataclasses import dataclass
 from logging import getLogger
-from typing import TYPE_CHECKING, ClassVar, Generic, TypeVar
+from typing import TYPE_CHECKING, ClassVar, Generic, Optional, TypeVar
 
 if TYPE_CHECKING:
+    from pandas import DataFrame
+
     from ..backends.base import Backend
+    from ..trackers.memory import MemoryTimelineTracker
+    from ..trackers.startup import StartupTracker
 
 LOGGER = getLogger("benchmark")
 
@@ -14,6 +18,10 @@ class BenchmarkConfig(ABC):
     name: str
     _target_: str
 
+    # sample the process' memory throughout the experiment and save it to memory_timeline.csv
+    memory_timeline: bool = False
+    memory_timeline_interval: float = 0.01
+
 
 BenchmarkConfigT = TypeVar("BenchmarkConfigT", bound=BenchmarkConfig)
 
@@ -22,6 +30,8 @@ class Benchmark(Generic[BenchmarkConfigT], ABC):
     NAME: ClassVar[str]
 
     config: BenchmarkConfigT
+    memory_timeline_tracker: Optional["MemoryTimelineTracker"] = None
+    startup_tracker: Optional["StartupTracker"] = None
 
     def __init__(self) -> None:
         pass
@@ -30,8 +40,16 @@ class Benchmark(Generic[BenchmarkConfigT], ABC):
         LOGGER.info(f"Configuring {self.NAME} benchmark")
         self.config = config
 
+    def set_phase(self, phase: str) -> None:
+        # marks the start of a new phase on the memory timeline, if it's tracked
+        if self.memory_timeline_tracker is not None:
+            self.memory_timeline_tracker.set_phase(phase)
+
     def run(self, backend: "Backend") -> None:
         raise NotImplementedError("Benchmark must implement run method")
 
+    def get_results_df(self) -> "DataFrame":
+        raise NotImplementedError("Benchmark must implement get_results_df method")
+
     def save(self) -> None:
         raise NotImplementedError("Benchmark must implement save method")
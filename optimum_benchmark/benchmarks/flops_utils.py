@@ -0,0 +1,121 @@
+from dataclasses import dataclass
+from logging import getLogger
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from transformers import PretrainedConfig
+
+LOGGER = getLogger("flops")
+
+# model types whose mlp has a gate projection (three matrices instead of two)
+GATED_MLP_MODEL_TYPES = ["llama", "mistral", "mixtral", "qwen2", "gemma", "phi3"]
+
+DTYPES_BYTES = {
+    "float32": 4,
+    "float16": 2,
+    "bfloat16": 2,
+}
+
+
+@dataclass
+class TransformerDimensions:
+    hidden_size: int
+    num_layers: int
+    num_heads: int
+    num_kv_heads: int
+    intermediate_size: int
+    vocab_size: int
+    gated_mlp: bool
+
+    @property
+    def kv_size(self) -> int:
+        # with grouped query attention, keys and values are smaller than queries
+        return self.hidden_size * self.num_kv_heads // self.num_heads
+
+    @property
+    def layer_parameters(self) -> int:
+        attention = 2 * self.hidden_size * self.hidden_size + 2 * self.hidden_size * self.kv_size
+        mlp = (3 if self.gated_mlp else 2) * self.hidden_size * self.intermediate_size
+        return attention + mlp
+
+    @property
+    def embedding_parameters(self) -> int:
+        return self.vocab_size * self.hidden_size
+
+
+@dataclass
+class Cost:
+    flops: float
+    bytes: float
+
+    @property
+    def arithmetic_intensity(self) -> float:
+        return self.flops / self.bytes
+
+
+def get_transformer_dimensions(pretrained_config: Optional["PretrainedConfig"]) -> Optional[TransformerDimensions]:
+    # attribute_map takes care of most naming differences (e.g. n_embd, d_model -> hidden_size)
+    if pretrained_config is None:
+        return None
+
+    hidden_size = getattr(pretrained_config, "hidden_size", None)
+    num_layers = getattr(pretrained_config, "num_hidden_layers", None)
+    num_heads = getattr(pretrained_config, "num_attention_heads", None)
+    vocab_size = getattr(pretrained_config, "vocab_size", None)
+    if None in [hidden_size, num_layers, num_heads, vocab_size]:
+        LOGGER.warning("Could not infer the transformer dimensions from the model's config")
+        return None
+
+    num_kv_heads = getattr(pretrained_config, "num_key_value_heads", None) or num_heads
+    intermediate_size = (
+        getattr(pretrained_config, "intermediate_size", None)
+        or getattr(pretrained_config, "n_inner", None)
+        or getattr(pretrained_config, "ffn_dim", None)
+        or getattr(pretrained_config, "d_ff", None)
+        or 4 * hidden_size
+    )
+
+    return TransformerDimensions(
+        hidden_size=hidden_size,
+        num_layers=num_layers,
+        num_heads=num_heads,
+        num_kv_heads=num_kv_heads,
+        intermediate_size=intermediate_size,
+        vocab_size=vocab_size,
+        gated_mlp=pretrained_config.model_type in GATED_MLP_MODEL_TYPES,
+    )
+
+
+def get_forward_cost(
+    dims: TransformerDimensions, batch_size: int, sequence_length: int, dtype_bytes: int, lm_head: bool, kv_cache: bool
+) -> Cost:
+    """
+    Theoretical cost of a forward pass over `sequence_length` tokens, which is also the cost of a prefill.
+    A matmul costs 2 FLOPs per multiply-accumulate, attention is counted without causal masking savings and
+    the memory traffic only accounts for reading the weights once and, with `kv_cache` (decoders), writing the keys
+    and values, activations are assumed to stay in cache.
+    """
+    num_tokens = batch_size * sequence_length
+    linear_flops = 2 * num_tokens * dims.num_layers * dims.layer_parameters
+    # attention scores (QK^T) and their weighted sum (AV)
+    attention_flops = 4 * batch_size * dims.num_layers * sequence_length * sequence_length * dims.hidden_size
+    head_flops = 2 * num_tokens * dims.embedding_parameters if lm_head else 0
+
+    weights = dims.num_layers * dims.layer_parameters + (dims.embedding_parameters if lm_head else 0)
+    kv_cache = 2 * num_tokens * dims.num_layers * dims.kv_size if kv_cache else 0
+
+    return Cost(flops=linear_flops + attention_flops + head_flops, bytes=(weights + kv_cache) * dtype_bytes)
+
+
+def get_decode_cost(dims: TransformerDimensions, batch_size: int, context_length: int, dtype_bytes: int) -> Cost:
+    """
+    Theoretical cost of decoding one token (per sequence) attending to `context_length` cached tokens.
+    Every decoding step reads all the weights and the whole key/value cache.
+    """
+    linear_flops = 2 * batch_size * (dims.num_layers * dims.layer_parameters + dims.embedding_parameters)
+    attention_flops = 4 * batch_size * dims.num_layers * context_length * dims.hidden_size
+
+    weights = dims.num_layers * dims.layer_parameters + dims.embedding_parameters
+    kv_cache = 2 * batch_size * (context_length + 1) * dims.num_layers * dims.kv_size
+
+    return Cost(flops=linear_flops + attention_flops, bytes=(weights + kv_cache) * dtype_bytes)
@@ -1,52 +1,127 @@
+import gc
+import itertools
 import os
 import statistics
 from logging import getLogger
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
 
-from pandas import DataFrame
+import numpy as np
+import torch
+from pandas import DataFrame, concat
 
 from ...generators.input_generator import InputGenerator
-from ...trackers.energy import EnergyTracker
-from ...trackers.latency import LatencyTracker
+from ...trackers.energy import get_energy_tracker
+from ...trackers.latency import LatencyTracker, TokenLatencyTracker
 from ...trackers.memory import MemoryTracker
 from ..base import Benchmark
-from ..utils import extract_three_significant_digits, three_significant_digits_wrapper
-from .config import InferenceConfig
+from ..flops_utils import (
+    DTYPES_BYTES,
+    Cost,
+    TransformerDimensions,
+    get_decode_cost,
+    get_forward_cost,
+    get_transformer_dimensions,
+)
+from ..utils import (
+    extract_three_significant_digits,
+    get_batch_size_search_df,
+    get_knee_batch_size,
+    get_latency_statistics,
+    get_max_fitting_batch_size,
+    get_relative_confidence_interval,
+    is_out_of_memory_error,
+    is_steady_state,
+    search_batch_sizes,
+    three_significant_digits_wrapper,
+)
+from .config import InferenceConfig, get_scenario_config
 
 if TYPE_CHECKING:
     from ...backends.base import Backend
 
 LOGGER = getLogger("inference")
 
+# number of tracked runs per batch size during the automatic batch size search
+AUTO_BATCH_SIZE_RUNS = 3
+
 
 class InferenceBenchmark(Benchmark[InferenceConfig]):
     NAME = "inference"
 
     def __init__(self):
+        self.reset_results()
+
+        # one results row per scenario, the model stays loaded across them
+        self.scenarios_results_dfs: List[DataFrame] = []
+        # static shapes backends are only prepared again when the input shapes change
+        self.prepared_input_shapes: Optional[Dict[str, int]] = None
+
+    def reset_results(self) -> None:
         # initialize inference results
         self.forward_energy: float = 0
-        self.forward_emissions: float = 0
+        self.forward_emissions: Optional[float] = 0
         self.forward_peak_memory: int = 0
         self.forward_latencies: List[float] = []
 
         self.generate_energy: float = 0
-        self.generate_emissions: float = 0
+        self.generate_emissions: Optional[float] = 0
         self.generate_peak_memory: int = 0
         self.generate_latencies: List[float] = []
 
+        self.generate_prefill_latencies: List[float] = []
+        self.generate_decode_latencies: List[float] = []
+        self.generate_inter_token_latencies: List[float] = []
+
+        self.batch_size_measurements: Dict[int, Optional[Dict[str, float]]] = {}
+
+        self.transformer_dimensions: Optional[TransformerDimensions] = None
+        self.dtype_bytes: int = DTYPES_BYTES["float32"]
+
     def configure(self, config: "InferenceConfig"):
         super().configure(config)
 
     def run(self, backend: "Backend") -> None:
         LOGGER.info("Running inference benchmark")
+        if not self.config.scenarios:
+            self.run_scenario(backend)
+            return
+
+        base_config = self.config
+        for idx, scenario in enumerate(base_config.scenarios):
+            LOGGER.info(f"\t+ Running scenario {idx}: {scenario}")
+            self.config = get_scenario_config(base_config, scenario)
+            self.reset_results()
+            self.run_scenario(backend)
+
+            scenario_df = self.get_scenario_results_df()
+            scenario_columns = {"scenario": idx}
+            for key, value in scenario.items():
+                scenario_columns.update({f"{key}.{name}": scenario_value for name, scenario_value in value.items()})
+            for position, (column, value) in enumerate(scenario_columns.items()):
+                scenario_df.insert(position, column, [value])
+            self.scenarios_results_dfs.append(scenario_df)
+            self.save_raw_latencies(suffix=f"_scenario_{idx}")
+
+        self.config = base_config
+
+    def run_scenario(self, backend: "Backend") -> None:
         self.config.input_shapes.update(backend.model_shapes)
 
+        if self.config.auto_batch_size:
+            self.set_phase("auto_batch_size")
+            self.run_batch_size_search(backend)
+
         self.input_generator = InputGenerator(
             task=backend.task,
             pretrained_config=backend.pretrained_config,
             input_shapes=self.config.input_shapes,
         )
 
+        if self.config.flops:
+            self.transformer_dimensions = get_transformer_dimensions(backend.pretrained_config)
+            # only the pytorch backend exposes the weights' dtype, others are assumed to run in float32
+            self.dtype_bytes = DTYPES_BYTES.get(getattr(backend.config, "torch_dtype", None), DTYPES_BYTES["float32"])
+
         # run forward pass tracking
         self.run_forward_tracking(backend)
 
@@ -54,25 +129,107 @@ class InferenceBenchmark(Benchmark[InferenceConfig]):
             # if possible, run generation pass tracking
             self.run_generate_tracking(backend)
 
-    def run_forward_tracking(self, backend: "Backend") -> None:
-        forward_input = self.input_generator.generate(mode="forward")
+    def run_batch_size_search(self, backend: "Backend") -> None:
+        LOGGER.info("\t+ Searching for the maximum batch size and the throughput knee")
+        self.batch_size_measurements = search_batch_sizes(
+            lambda batch_size: self.measure_batch_size(backend, batch_size),
+            max_batch_size=self.config.max_batch_size,
+        )
+        knee_batch_size = get_knee_batch_size(self.batch_size_measurements, threshold=self.config.knee_threshold)
+        LOGGER.info(f"\t+ Maximum batch size: {get_max_fitting_batch_size(self.batch_size_measurements)}")
+        LOGGER.info(f"\t+ Throughput knee batch size: {knee_batch_size}")
+        self.config.input_shapes["batch_size"] = knee_batch_size
+
+    def measure_batch_size(self, backend: "Backend", batch_size: int) -> Optional[Dict[str, float]]:
+        LOGGER.info(f"\t+ Trying batch size {batch_size}")
+        input_shapes = {**self.config.input_shapes, "batch_size": batch_size}
+        input_generator = InputGenerator(
+            task=backend.task,
+            pretrained_config=backend.pretrained_config,
+            input_shapes=input_shapes,
+        )
+        measurement = {}
+        try:
+            backend.prepare_for_inference(input_shapes=input_shapes)
+            self.prepared_input_shapes = input_shapes
+            forward_input = backend.prepare_input(input_generator.generate(mode="forward"))
+            # the memory tracked run also serves as warmup
+            memory_tracker = MemoryTracker(device=backend.device)
+            with memory_tracker.track():
+                _ = backend.forward(forward_input, self.config.forward_kwargs)
+            measurement["peak_memory(MB)"] = memory_tracker.get_peak_memory()
+            latency_tracker = LatencyTracker(device=backend.device, backend=backend.NAME)
+            for _ in range(AUTO_BATCH_SIZE_RUNS):
+                with latency_tracker.track():
+                    _ = backend.forward(forward_input, self.config.forward_kwargs)
+            measurement["forward.latency(s)"] = latency_tracker.get_mean_latency()
+            measurement["forward.throughput(samples/s)"] = batch_size / latency_tracker.get_mean_latency()
+            measurement["throughput"] = measurement["forward.throughput(samples/s)"]
+
+            if self.config.can_generate:
+                generate_input = backend.prepare_input(input_generator.generate(mode="generate"), mode="generate")
+                memory_tracker = MemoryTracker(device=backend.device)
+                with memory_tracker.track():
+                    _ = backend.generate(generate_input, self.config.generate_kwargs)
+                measurement["peak_memory(MB)"] = max(measurement["peak_memory(MB)"], memory_tracker.get_peak_memory())
+                latency_tracker = LatencyTracker(device=backend.device, backend=backend.NAME)
+                with latency_tracker.track():
+                    _ = backend.generate(generate_input, self.config.generate_kwargs)
+                measurement["generate.latency(s)"] = latency_tracker.get_mean_latency()
+                measurement["generate.throughput(tokens/s)"] = (
+                    self.config.generate_kwargs["min_new_tokens"] * batch_size / latency_tracker.get_mean_latency()
+                )
+                measurement["throughput"] = measurement["generate.throughput(tokens/s)"]
+        except Exception as e:
+            if not is_out_of_memory_error(e):
+                raise e
+            LOGGER.info(f"\t+ Batch size {batch_size} ran out of memory")
+            measurement = None
+        finally:
+            forward_input = generate_input = None
+            gc.collect()
+            if backend.device.type == "cuda":
+                torch.cuda.empty_cache()
+
+        if measurement is None:
+            return None
+
+        if self.config.memory_budget is not None and measurement["peak_memory(MB)"] > self.config.memory_budget:
+            LOGGER.info(f"\t+ Batch size {batch_size} exceeds the memory budget of {self.config.memory_budget} (MB)")
+            return None
+
+        return measurement
+
+    def generate_input_pool(self, backend: "Backend", mode: str) -> List[Dict[str, Any]]:
+        # inputs are generated and moved to the device once, outside of the measurements
+        return [
+            backend.prepare_input(self.input_generator.generate(mode=mode), mode=mode)
+            for _ in range(self.config.input_pool_size)
+        ]
 
-        LOGGER.info("\t+ Preparing input for the forward pass")
-        forward_input = backend.prepare_input(forward_input)
+    def run_forward_tracking(self, backend: "Backend") -> None:
+        LOGGER.info(f"\t+ Preparing {self.config.input_pool_size} input(s) for the forward pass")
+        forward_inputs = self.generate_input_pool(backend, mode="forward")
+        forward_input = forward_inputs[0]
+        forward_inputs_cycle = itertools.cycle(forward_inputs)
 
         # for backends that require compilation with static shapes
-        backend.prepare_for_inference(input_shapes=self.config.input_shapes)
+        if self.prepared_input_shapes != self.config.input_shapes:
+            backend.prepare_for_inference(input_shapes=self.config.input_shapes)
+            self.prepared_input_shapes = dict(self.config.input_shapes)
+
+        def forward() -> Any:
+            return backend.forward(next(forward_inputs_cycle), self.config.forward_kwargs)
 
         LOGGER.info("\t+ Warming up the forward pass")
-        for _ in range(self.config.warmup_runs):
-            _ = backend.forward(forward_input, self.config.forward_kwargs)
+        self.set_phase("forward.warmup")
+        self.run_warmup(backend, forward, num_runs=self.config.warmup_runs)
 
         LOGGER.info("\t+ Tracking forward pass latency and throughput")
+        self.set_phase("forward")
         latency_tracker = LatencyTracker(device=backend.device, backend=backend.NAME)
-        while sum(self.forward_latencies) < self.config.duration:
-            with latency_tracker.track():
-                _ = backend.forward(forward_input, self.config.forward_kwargs)
-            self.forward_latencies = latency_tracker.get_latencies()
+        self.run_latency_tracking(latency_tracker, forward)
+        self.forward_latencies = latency_tracker.get_latencies()
         LOGGER.info(f"\t+ Forward pass latency: {self.forward_latency:.2e} (s)")
         LOGGER.info(f"\t+ Forward pass throughput: {self.forward_throughput:.2f} (samples/s)")
 
@@ -87,38 +244,44 @@ class InferenceBenchmark(Benchmark[InferenceConfig]):
         if self.config.energy:
             LOGGER.info("\t+ Tracking forward pass energy consumption")
             num_forward_passes = 0
-            energy_tracker = EnergyTracker()
+            energy_tracker = get_energy_tracker(self.config.energy_tracker)
             with energy_tracker.track(interval=1, file_prefix="forward"):
                 while energy_tracker.get_elapsed_time() < self.config.duration:
-                    _ = backend.forward(forward_input, self.config.forward_kwargs)
+                    _ = forward()
                     num_forward_passes += 1
 
             num_forward_samples = num_forward_passes * self.config.input_shapes["batch_size"]
             self.forward_energy = extract_three_significant_digits(
                 energy_tracker.get_total_energy() / num_forward_samples
             )
-            self.forward_emissions = extract_three_significant_digits(
-                energy_tracker.get_total_emissions() / num_forward_samples
-            )
             LOGGER.info(f"\t+ Forward pass energy consumption: {self.forward_energy} (kWh/sample)")
-            LOGGER.info(f"\t+ Forward pass carbon emissions: {self.forward_emissions} (kgCO2eq/sample)")
-            LOGGER.info(f"\t+ Full details in the CodeCarbon report: {os.getcwd()}/forward_codecarbon.csv")
+            if energy_tracker.get_total_emissions() is not None:
+                self.forward_emissions = extract_three_significant_digits(
+                    energy_tracker.get_total_emissions() / num_forward_samples
+                )
+                LOGGER.info(f"\t+ Forward pass carbon emissions: {self.forward_emissions} (kgCO2eq/sample)")
+            else:
+                self.forward_emissions = None
+            LOGGER.info(f"\t+ Full details in the energy report: {os.getcwd()}/{energy_tracker.report_file}")
 
     def run_generate_tracking(self, backend: "Backend") -> None:
-        generate_input = self.input_generator.generate(mode="generate")
+        LOGGER.info(f"\t+ Preparing {self.config.input_pool_size} input(s) for the generation pass")
+        generate_inputs = self.generate_input_pool(backend, mode="generate")
+        generate_input = generate_inputs[0]
+        generate_inputs_cycle = itertools.cycle(generate_inputs)
 
-        LOGGER.info("\t+ Preparing input for the generation pass")
-        generate_input = backend.prepare_input(generate_input)
+        def generate() -> Any:
+            return backend.generate(next(generate_inputs_cycle), self.config.generate_kwargs)
 
         LOGGER.info("\t+ Warming up the generation pass")
-        _ = backend.generate(generate_input, self.config.generate_kwargs)
+        self.set_phase("generate.warmup")
+        self.run_warmup(backend, generate, num_runs=1)
 
         LOGGER.info("\t+ Tracking generation latency and throughput")
+        self.set_phase("generate")
         latency_tracker = LatencyTracker(device=backend.device, backend=backend.NAME)
-        while sum(self.generate_latencies) < self.config.duration:
-            with latency_tracker.track():
-                _ = backend.generate(generate_input, self.config.generate_kwargs)
-            self.generate_latencies = latency_tracker.get_latencies()
+        self.run_latency_tracking(latency_tracker, generate)
+        self.generate_latencies = latency_tracker.get_latencies()
         LOGGER.info(f"\t+ Generation pass latency: {self.generate_latency:.2e} (s)")
         LOGGER.info(f"\t+ Generation pass throughput: {self.generate_throughput:.2f} (tokens/s)")
 
@@ -130,13 +293,28 @@ class InferenceBenchmark(Benchmark[InferenceConfig]):
             self.generate_peak_memory = memory_tracker.get_peak_memory()
             LOGGER.info(f"\t+ Generation pass peak memory: {self.generate_peak_memory} (MB)")
 
+        if self.config.token_latency:
+            LOGGER.info("\t+ Tracking generation pass time to first token and inter-token latency")
+            token_latency_tracker = TokenLatencyTracker()
+            while token_latency_tracker.get_total_latency() < self.config.duration:
+                with token_latency_tracker.track() as streamer:
+                    _ = backend.generate(
+                        next(generate_inputs_cycle), {**self.config.generate_kwargs, "streamer": streamer}
+                    )
+            self.generate_prefill_latencies = token_latency_tracker.get_prefill_latencies()
+            self.generate_decode_latencies = token_latency_tracker.get_decode_latencies()
+            self.generate_inter_token_latencies = token_latency_tracker.get_inter_token_latencies()
+            LOGGER.info(f"\t+ Generation pass time to first token: {self.generate_prefill_latency:.2e} (s)")
+            LOGGER.info(f"\t+ Generation pass inter-token latency: {self.generate_inter_token_latency:.2e} (s)")
+            LOGGER.info(f"\t+ Generation pass decode throughput: {self.generate_decode_throughput:.2f} (tokens/s)")
+
         if self.config.energy:
             LOGGER.info("\t+ Tracking generation pass energy consumption")
             num_generate_passes = 0
-            energy_tracker = EnergyTracker()
+            energy_tracker = get_energy_tracker(self.config.energy_tracker)
             with energy_tracker.track(interval=1, file_prefix="generate"):
                 while energy_tracker.get_elapsed_time() < self.config.duration:
-                    _ = backend.generate(generate_input, self.config.generate_kwargs)
+                    _ = generate()
                     num_generate_passes += 1
 
             num_generated_tokens = (
@@ -147,12 +325,71 @@ class InferenceBenchmark(Benchmark[InferenceConfig]):
             self.generate_energy = extract_three_significant_digits(
                 energy_tracker.get_total_energy() / num_generated_tokens
             )
-            self.generate_emissions = extract_three_significant_digits(
-                energy_tracker.get_total_emissions() / num_generated_tokens
-            )
             LOGGER.info(f"\t+ Generation pass energy consumption: {self.generate_energy} (kWh/token)")
-            LOGGER.info(f"\t+ Generation pass carbon emissions: {self.generate_emissions} (kgCO2eq/token)")
-            LOGGER.info(f"\t+ Full details in the CodeCarbon report: {os.getcwd()}/generate_codecarbon.csv")
+            if energy_tracker.get_total_emissions() is not None:
+                self.generate_emissions = extract_three_significant_digits(
+                    energy_tracker.get_total_emissions() / num_generated_tokens
+                )
+                LOGGER.info(f"\t+ Generation pass carbon emissions: {self.generate_emissions} (kgCO2eq/token)")
+            else:
+                self.generate_emissions = None
+            LOGGER.info(f"\t+ Full details in the energy report: {os.getcwd()}/{energy_tracker.report_file}")
+
+    def run_warmup(self, backend: "Backend", run: Callable[[], Any], num_runs: int) -> None:
+        if not self.config.adaptive:
+            for _ in range(num_runs):
+                _ = run()
+            return
+
+        warmup_tracker = LatencyTracker(device=backend.device, backend=backend.NAME)
+        while warmup_tracker.get_count() < self.config.max_warmup_runs:
+            with warmup_tracker.track():
+                _ = run()
+
+            if warmup_tracker.get_count() >= num_runs and is_steady_state(
+                warmup_tracker.get_last_latencies(2 * self.config.warmup_window),
+                window=self.config.warmup_window,
+                tolerance=self.config.warmup_tolerance,
+            ):
+                LOGGER.info(f"\t+ Latency stabilized after {warmup_tracker.get_count()} warmup runs")
+                return
+
+        LOGGER.warning(f"\t+ Latency did not stabilize after {self.config.max_warmup_runs} warmup runs")
+
+    def run_latency_tracking(self, latency_tracker: LatencyTracker, run: Callable[[], Any]) -> None:
+        while not self.is_latency_tracking_done(latency_tracker):
+            with latency_tracker.track():
+                _ = run()
+
+        if self.config.adaptive:
+            relative_ci = get_relative_confidence_interval(
+                count=latency_tracker.get_count(),
+                mean=latency_tracker.get_mean_latency(),
+                stdev=latency_tracker.get_stdev_latency(),
+            )
+            LOGGER.info(
+                f"\t+ Tracked {latency_tracker.get_count()} runs in {latency_tracker.get_total_latency():.2f} (s) "
+                f"with a relative confidence interval of {relative_ci:.2%}"
+            )
+
+    def is_latency_tracking_done(self, latency_tracker: LatencyTracker) -> bool:
+        total_latency = latency_tracker.get_total_latency()
+
+        if not self.config.adaptive:
+            return total_latency >= self.config.duration
+
+        if total_latency < self.config.min_duration:
+            return False
+
+        if total_latency >= self.config.duration:
+            return True
+
+        relative_ci = get_relative_confidence_interval(
+            count=latency_tracker.get_count(),
+            mean=latency_tracker.get_mean_latency(),
+            stdev=latency_tracker.get_stdev_latency(),
+        )
+        return relative_ci <= self.config.target_relative_ci
 
     # Metrics
     ## Forward pass metrics
@@ -181,6 +418,26 @@ class InferenceBenchmark(Benchmark[InferenceConfig]):
             / self.generate_latency
         )
 
+    @property
+    @three_significant_digits_wrapper
+    def generate_prefill_latency(self) -> float:
+        return statistics.mean(self.generate_prefill_latencies)
+
+    @property
+    @three_significant_digits_wrapper
+    def generate_inter_token_latency(self) -> float:
+        return statistics.mean(self.generate_inter_token_latencies)
+
+    @property
+    @three_significant_digits_wrapper
+    def generate_decode_throughput(self) -> float:
+        # the first token is produced by the prefill, the remaining ones by the decoding steps
+        return (
+            (self.config.generate_kwargs["min_new_tokens"] - 1)
+            * self.config.input_shapes["batch_size"]
+            / statistics.mean(self.generate_decode_latencies)
+        )
+
     ## Diffusion pass metrics
     @property
     @three_significant_digits_wrapper
@@ -191,11 +448,74 @@ class InferenceBenchmark(Benchmark[InferenceConfig]):
             / self.forward_latency
         )
 
+    ## Analytic costs
+    @property
+    def forward_cost(self) -> Cost:
+        return get_forward_cost(
+            self.transformer_dimensions,
+            batch_size=self.config.input_shapes["batch_size"],
+            sequence_length=self.config.input_shapes["sequence_length"],
+            dtype_bytes=self.dtype_bytes,
+            lm_head=self.config.can_generate,
+            # encoders (e.g. bert) don't cache keys and values
+            kv_cache=self.config.can_generate,
+        )
+
+    @property
+    def generate_decode_costs(self) -> List[Cost]:
+        # the first new token comes out of the prefill, each one after it is a decoding step
+        sequence_length = self.config.input_shapes["sequence_length"]
+        return [
+            get_decode_cost(
+                self.transformer_dimensions,
+                batch_size=self.config.input_shapes["batch_size"],
+                context_length=sequence_length + step,
+                dtype_bytes=self.dtype_bytes,
+            )
+            for step in range(1, self.config.generate_kwargs["min_new_tokens"])
+        ]
+
+    def get_cost_metrics(self, prefix: str, cost: Cost, latency: float) -> Dict[str, Any]:
+        achieved_tflops = cost.flops / latency / 1e12
+        achieved_bandwidth = cost.bytes / latency / 1e9
+
+        metrics = {
+            f"{prefix}.flops(GFLOP)": cost.flops / 1e9,
+            f"{prefix}.memory_traffic(GB)": cost.bytes / 1e9,
+            f"{prefix}.arithmetic_intensity(FLOP/B)": cost.arithmetic_intensity,
+            f"{prefix}.achieved_compute(TFLOPS)": achieved_tflops,
+            f"{prefix}.achieved_bandwidth(GB/s)": achieved_bandwidth,
+        }
+        if self.config.peak_tflops is not None:
+            metrics[f"{prefix}.mfu"] = achieved_tflops / self.config.peak_tflops
+        if self.config.peak_bandwidth is not None:
+            metrics[f"{prefix}.mbu"] = achieved_bandwidth / self.config.peak_bandwidth
+        metrics = {key: extract_three_significant_digits(value) for key, value in metrics.items()}
+
+        if self.config.peak_tflops is not None and self.config.peak_bandwidth is not None:
+            # the roofline's ridge point, below it the peak bandwidth caps the achievable compute
+            ridge_point = self.config.peak_tflops * 1e12 / (self.config.peak_bandwidth * 1e9)
+            metrics[f"{prefix}.bound"] = "compute" if cost.arithmetic_intensity >= ridge_point else "bandwidth"
+
+        return metrics
+
     def get_results_df(self) -> DataFrame:
+        if self.config.scenarios:
+            return concat(self.scenarios_results_dfs, ignore_index=True)
+
+        return self.get_scenario_results_df()
+
+    def get_scenario_results_df(self) -> DataFrame:
         results_dict = {}
 
         results_dict["forward.latency(s)"] = self.forward_latency
         results_dict["forward.throughput(samples/s)"] = self.forward_throughput
+        for key, value in get_latency_statistics(self.forward_latencies).items():
+            results_dict[f"forward.latency.{key}(s)"] = value
+
+        if self.config.auto_batch_size:
+            results_dict["auto_batch_size.max_batch_size"] = get_max_fitting_batch_size(self.batch_size_measurements)
+            results_dict["auto_batch_size.knee_batch_size"] = self.config.input_shapes["batch_size"]
 
         if self.config.can_diffuse:
             results_dict["diffusion.throughput(images/s)"] = self.diffusion_throughput
@@ -203,20 +523,57 @@ class InferenceBenchmark(Benchmark[InferenceConfig]):
         if self.config.memory:
             results_dict["forward.peak_memory(MB)"] = self.forward_peak_memory
 
+        if self.config.flops and self.transformer_dimensions is not None:
+            results_dict.update(self.get_cost_metrics("forward", self.forward_cost, self.forward_latency))
+
         if self.config.energy:
             results_dict["forward.energy_consumption(kWh/sample)"] = self.forward_energy
-            results_dict["forward.carbon_emissions(kgCO2eq/sample)"] = self.forward_emissions
+            if self.forward_emissions is not None:
+                results_dict["forward.carbon_emissions(kgCO2eq/sample)"] = self.forward_emissions
 
         if self.config.can_generate:
             results_dict["generate.latency(s)"] = self.generate_latency
             results_dict["generate.throughput(tokens/s)"] = self.generate_throughput
+            for key, value in get_latency_statistics(self.generate_latencies).items():
+                results_dict[f"generate.latency.{key}(s)"] = value
+
+            if self.config.token_latency:
+                results_dict["generate.ttft(s)"] = self.generate_prefill_latency
+                for key, value in get_latency_statistics(self.generate_prefill_latencies).items():
+                    results_dict[f"generate.ttft.{key}(s)"] = value
+                results_dict["generate.inter_token_latency(s)"] = self.generate_inter_token_latency
+                for key, value in get_latency_statistics(self.generate_inter_token_latencies).items():
+                    results_dict[f"generate.inter_token_latency.{key}(s)"] = value
+                results_dict["generate.decode.throughput(tokens/s)"] = self.generate_decode_throughput
+
+            if self.config.flops and self.transformer_dimensions is not None:
+                decode_costs = self.generate_decode_costs
+                generate_cost = Cost(
+                    flops=self.forward_cost.flops + sum(cost.flops for cost in decode_costs),
+                    bytes=self.forward_cost.bytes + sum(cost.bytes for cost in decode_costs),
+                )
+                results_dict.update(self.get_cost_metrics("generate", generate_cost, self.generate_latency))
+
+                if self.config.token_latency:
+                    # average decoding step, over the whole range of context lengths
+                    decode_cost = Cost(
+                        flops=sum(cost.flops for cost in decode_costs) / len(decode_costs),
+                        bytes=sum(cost.bytes for cost in decode_costs) / len(decode_costs),
+                    )
+                    results_dict.update(
+                        self.get_cost_metrics("generate.prefill", self.forward_cost, self.generate_prefill_latency)
+                    )
+                    results_dict.update(
+                        self.get_cost_metrics("generate.decode", decode_cost, self.generate_inter_token_latency)
+                    )
 
             if self.config.memory:
                 results_dict["generate.peak_memory(MB)"] = self.generate_peak_memory
 
             if self.config.energy:
                 results_dict["generate.energy_consumption(kWh/token)"] = self.generate_energy
-                results_dict["generate.carbon_emissions(kgCO2eq/token)"] = self.generate_emissions
+                if self.generate_emissions is not None:
+                    results_dict["generate.carbon_emissions(kgCO2eq/token)"] = self.generate_emissions
 
         return DataFrame(results_dict, index=[0])
 
@@ -224,3 +581,23 @@ class InferenceBenchmark(Benchmark[InferenceConfig]):
         LOGGER.info("Saving inference results")
         results_df = self.get_results_df()
         results_df.to_csv("inference_results.csv")
+
+        if self.config.auto_batch_size:
+            LOGGER.info("Saving batch size search results")
+            get_batch_size_search_df(self.batch_size_measurements).to_csv("batch_size_search_results.csv")
+
+        # scenarios' raw latencies are saved as they're run
+        if not self.config.scenarios:
+            self.save_raw_latencies()
+
+    def save_raw_latencies(self, suffix: str = "") -> None:
+        LOGGER.info("Saving raw latencies")
+        np.save(f"forward_latencies{suffix}.npy", np.asarray(self.forward_latencies, dtype=np.float64))
+        if self.config.can_generate:
+            np.save(f"generate_latencies{suffix}.npy", np.asarray(self.generate_latencies, dtype=np.float64))
+            if self.config.token_latency:
+                np.save(f"generate_ttft{suffix}.npy", np.asarray(self.generate_prefill_latencies, dtype=np.float64))
+                np.save(
+                    f"generate_inter_token_latencies{suffix}.npy",
+                    np.asarray(self.generate_inter_token_latencies, dtype=np.float64),
+                )
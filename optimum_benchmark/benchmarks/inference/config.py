@@ -1,6 +1,7 @@
+import copy
 from dataclasses import dataclass, field
 from logging import getLogger
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from omegaconf import OmegaConf
 
@@ -11,6 +12,7 @@ LOGGER = getLogger("inference")
 
 OmegaConf.register_new_resolver("can_generate", lambda task: task in TEXT_GENERATION_TASKS)
 OmegaConf.register_new_resolver("can_diffuse", lambda task: task in DIFFUSION_TASKS)
+OmegaConf.register_new_resolver("is_tgi", lambda backend_name: backend_name == "tgi")
 
 GENERATE_CONFIG = {
     "max_new_tokens": 100,
@@ -21,10 +23,15 @@ GENERATE_CONFIG = {
     "num_beams": 1,
 }
 
+ENERGY_TRACKERS = ["codecarbon", "rapl"]
+
 DIFUSION_CONFIG = {
     "num_images_per_prompt": 1,
 }
 
+# the options a scenario can override, e.g. {"input_shapes": {"batch_size": 4}, "generate_kwargs": {...}}
+SCENARIO_KEYS = ["input_shapes", "forward_kwargs", "generate_kwargs"]
+
 
 @dataclass
 class InferenceConfig(BenchmarkConfig):
@@ -36,9 +43,38 @@ class InferenceConfig(BenchmarkConfig):
     warmup_runs: int = 10
     benchmark_duration: Optional[int] = None  # deprecated
 
+    # adaptive measurement options
+    # warmup runs until latencies stabilize (at least `warmup_runs`, at most `max_warmup_runs`)
+    # and measurement runs until the mean latency's relative 95% confidence interval is below
+    # `target_relative_ci` (for at least `min_duration` and at most `duration` seconds)
+    adaptive: bool = False
+    min_duration: int = 1
+    max_warmup_runs: int = 1000
+    warmup_window: int = 5
+    warmup_tolerance: float = 0.05
+    target_relative_ci: float = 0.02
+
+    # automatic batch size search options
+    # searches for the largest batch size that fits (no out of memory error and peak memory within
+    # `memory_budget` MB) and for the throughput knee, i.e. the smallest batch size reaching
+    # `knee_threshold` times the best throughput, the benchmark is then run with the knee batch size
+    auto_batch_size: bool = False
+    max_batch_size: int = 1024
+    memory_budget: Optional[int] = None
+    knee_threshold: float = 0.9
+
     # additional/optional metrics
     memory: bool = False
     energy: bool = False
+    # codecarbon or rapl (linux powercap counters, falls back to codecarbon when not readable)
+    energy_tracker: str = "codecarbon"
+    # time to first token and inter-token latency of the generation pass
+    token_latency: bool = False
+    # analytic flops and memory traffic estimated from the model's config and the input shapes,
+    # reported as achieved TFLOPS/bandwidth and, when the host's peaks are given, as utilizations
+    flops: bool = False
+    peak_tflops: Optional[float] = None
+    peak_bandwidth: Optional[float] = None  # GB/s
 
     # input options
     input_shapes: Dict = field(
@@ -57,11 +93,16 @@ class InferenceConfig(BenchmarkConfig):
         },
     )
 
+    # number of input batches generated (and moved to the device) before the measurements,
+    # the measurement loops rotate through them so that the same input isn't served from caches
+    input_pool_size: int = 1
+
     # TODO: deprecate this and use `benchamrk.generate_kwargs`
     new_tokens: Optional[int] = None
 
     can_diffuse: bool = "${can_diffuse:${task}}"
     can_generate: bool = "${can_generate:${task}}"
+    is_tgi: bool = "${is_tgi:${backend.name}}"
 
     # forward options
     forward_kwargs: Dict[str, Any] = field(default_factory=dict)
@@ -69,15 +110,25 @@ class InferenceConfig(BenchmarkConfig):
     # generation options
     generate_kwargs: Dict[str, Any] = field(default_factory=dict)
 
+    # scenarios options
+    # each scenario overrides some of the input shapes and forward/generate kwargs above, all of them
+    # are run against the same loaded model and reported as one row each of the results
+    scenarios: List[Dict[str, Any]] = field(default_factory=list)
+
     def __post_init__(self):
+        if self.energy_tracker not in ENERGY_TRACKERS:
+            raise ValueError(f"`energy_tracker` must be one of {ENERGY_TRACKERS}. Got {self.energy_tracker} instead.")
+
         if self.can_diffuse:
             self.forward_kwargs = OmegaConf.to_object(OmegaConf.merge(self.forward_kwargs, DIFUSION_CONFIG))
 
         if self.can_generate:
+            if self.token_latency and self.is_tgi:
+                raise ValueError("`token_latency` is not supported by the text-generation-inference backend.")
+
             self.generate_kwargs = OmegaConf.to_object(OmegaConf.merge(self.generate_kwargs, GENERATE_CONFIG))
 
-            if self.generate_kwargs["max_new_tokens"] != self.generate_kwargs["min_new_tokens"]:
-                raise ValueError("`max_new_tokens` and `min_new_tokens` must be equal for fixed length output.")
+            check_generate_kwargs(self.generate_kwargs, self.token_latency)
 
         if self.new_tokens is not None:
             LOGGER.warning(
@@ -93,3 +144,60 @@ class InferenceConfig(BenchmarkConfig):
                 "`duration` will be set to the value of `benchmark_duration`."
             )
             self.duration = self.benchmark_duration
+
+        if self.input_pool_size < 1:
+            raise ValueError("`input_pool_size` must be at least 1.")
+
+        if self.peak_tflops is not None and self.peak_tflops <= 0:
+            raise ValueError("`peak_tflops` must be strictly positive.")
+
+        if self.peak_bandwidth is not None and self.peak_bandwidth <= 0:
+            raise ValueError("`peak_bandwidth` must be strictly positive.")
+
+        if self.auto_batch_size and not 0 < self.knee_threshold <= 1:
+            raise ValueError("`knee_threshold` must be in ]0, 1].")
+
+        if self.scenarios:
+            if self.auto_batch_size:
+                raise ValueError("`auto_batch_size` can't be used with `scenarios`, which set their own batch sizes.")
+
+            for scenario in self.scenarios:
+                for key in scenario:
+                    if key not in SCENARIO_KEYS:
+                        raise ValueError(f"Scenario keys must be one of {SCENARIO_KEYS}. Got {key} instead.")
+
+                # validates the scenario's merged options
+                get_scenario_config(self, scenario)
+
+        if self.adaptive:
+            if self.min_duration > self.duration:
+                raise ValueError("`min_duration` must be smaller than or equal to `duration` in adaptive mode.")
+
+            if self.warmup_runs > self.max_warmup_runs:
+                raise ValueError("`warmup_runs` must be smaller than or equal to `max_warmup_runs` in adaptive mode.")
+
+
+def get_scenario_config(config: InferenceConfig, scenario: Dict[str, Any]) -> InferenceConfig:
+    scenario_config = copy.deepcopy(config)
+    scenario_config.scenarios = []
+    for key, value in scenario.items():
+        getattr(scenario_config, key).update(value)
+
+    if scenario_config.can_generate:
+        try:
+            check_generate_kwargs(scenario_config.generate_kwargs, scenario_config.token_latency)
+        except ValueError as e:
+            raise ValueError(f"{e} Got scenario {scenario}.") from e
+
+    return scenario_config
+
+
+def check_generate_kwargs(generate_kwargs: Dict[str, Any], token_latency: bool) -> None:
+    if generate_kwargs["max_new_tokens"] != generate_kwargs["min_new_tokens"]:
+        raise ValueError("`max_new_tokens` and `min_new_tokens` must be equal for fixed length output.")
+
+    if token_latency and generate_kwargs["num_beams"] > 1:
+        raise ValueError("`token_latency` relies on a generation streamer which doesn't support beam search.")
+
+    if token_latency and generate_kwargs["min_new_tokens"] < 2:
+        raise ValueError("`token_latency` requires generating at least 2 tokens to measure decoding.")
@@ -0,0 +1,162 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+import numpy as np
+import torch
+from pandas import DataFrame
+
+from ...generators.input_generator import InputGenerator
+from ..base import Benchmark
+from ..utils import extract_three_significant_digits, get_latency_statistics
+from .config import LoadConfig
+
+if TYPE_CHECKING:
+    from ...backends.base import Backend
+
+LOGGER = getLogger("load")
+
+
+class LoadBenchmark(Benchmark[LoadConfig]):
+    NAME = "load"
+
+    def __init__(self):
+        # initialize load results, one entry per load level
+        self.load_results: List[Dict[str, Any]] = []
+
+    def configure(self, config: "LoadConfig"):
+        super().configure(config)
+
+    def run(self, backend: "Backend") -> None:
+        LOGGER.info("Running load benchmark")
+        self.config.input_shapes.update(backend.model_shapes)
+
+        input_generator = InputGenerator(
+            task=backend.task,
+            pretrained_config=backend.pretrained_config,
+            input_shapes=self.config.input_shapes,
+        )
+        forward_input = input_generator.generate(mode="forward")
+
+        LOGGER.info("\t+ Preparing input for the forward pass")
+        forward_input = backend.prepare_input(forward_input)
+
+        # for backends that require compilation with static shapes
+        backend.prepare_for_inference(input_shapes=self.config.input_shapes)
+
+        LOGGER.info("\t+ Warming up the forward pass")
+        self.set_phase("forward.warmup")
+        for _ in range(self.config.warmup_runs):
+            self.send_request(backend, forward_input)
+
+        self.set_phase("requests")
+        if self.config.mode == "closed_loop":
+            for concurrency in self.config.concurrency_levels:
+                self.run_closed_loop(backend, forward_input, concurrency)
+        else:
+            for request_rate in self.config.request_rates:
+                self.run_open_loop(backend, forward_input, request_rate)
+
+    def send_request(self, backend: "Backend", forward_input: Dict[str, Any]) -> None:
+        _ = backend.forward(forward_input, self.config.forward_kwargs)
+
+        if backend.device.type == "cuda" and backend.NAME == "pytorch":
+            # pytorch kernels are launched asynchronously
+            torch.cuda.current_stream().synchronize()
+
+    def get_executor(self, max_workers: int) -> ThreadPoolExecutor:
+        # grad mode is thread local, workers must inherit the one set by the backend
+        return ThreadPoolExecutor(
+            max_workers=max_workers,
+            initializer=torch.set_grad_enabled,
+            initargs=(torch.is_grad_enabled(),),
+        )
+
+    def run_closed_loop(self, backend: "Backend", forward_input: Dict[str, Any], concurrency: int) -> None:
+        LOGGER.info(f"\t+ Running closed loop load with {concurrency} concurrent worker(s)")
+        deadline = time.perf_counter() + self.config.duration
+
+        def worker() -> List[float]:
+            latencies = []
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                self.send_request(backend, forward_input)
+                latencies.append(time.perf_counter() - start)
+            return latencies
+
+        start = time.perf_counter()
+        with self.get_executor(max_workers=concurrency) as executor:
+            futures = [executor.submit(worker) for _ in range(concurrency)]
+            latencies = [latency for future in futures for latency in future.result()]
+        elapsed = time.perf_counter() - start
+
+        # a closed loop never queues requests, a worker only sends one when it's free
+        self.record_load_level(
+            {"concurrency": concurrency},
+            latencies=latencies,
+            queueing_delays=[0.0] * len(latencies),
+            elapsed=elapsed,
+        )
+
+    def run_open_loop(self, backend: "Backend", forward_input: Dict[str, Any], request_rate: float) -> None:
+        LOGGER.info(f"\t+ Running open loop load at {request_rate} request(s)/s")
+        num_requests = max(1, int(request_rate * self.config.duration))
+        if self.config.arrival_distribution == "poisson":
+            rng = np.random.default_rng(self.config.seed)
+            inter_arrival_times = rng.exponential(1 / request_rate, size=num_requests)
+        else:
+            inter_arrival_times = np.full(num_requests, 1 / request_rate)
+        arrival_offsets = np.cumsum(inter_arrival_times)
+
+        def serve(arrival: float) -> Tuple[float, float]:
+            start = time.perf_counter()
+            self.send_request(backend, forward_input)
+            end = time.perf_counter()
+            return start - arrival, end - arrival
+
+        start = time.perf_counter()
+        with self.get_executor(max_workers=self.config.max_concurrency) as executor:
+            futures = []
+            for arrival_offset in arrival_offsets:
+                # delays are measured from the scheduled arrival, so a late dispatch counts as queueing
+                arrival = start + arrival_offset
+                time.sleep(max(0.0, arrival - time.perf_counter()))
+                futures.append(executor.submit(serve, arrival))
+            queueing_delays, latencies = zip(*[future.result() for future in futures])
+        elapsed = time.perf_counter() - start
+
+        self.record_load_level(
+            {"request_rate": request_rate},
+            latencies=list(latencies),
+            queueing_delays=list(queueing_delays),
+            elapsed=elapsed,
+        )
+
+    def record_load_level(
+        self, load_level: Dict[str, Any], latencies: List[float], queueing_delays: List[float], elapsed: float
+    ) -> None:
+        num_requests = len(latencies)
+        achieved_qps = extract_three_significant_digits(num_requests / elapsed)
+        throughput = extract_three_significant_digits(num_requests * self.config.input_shapes["batch_size"] / elapsed)
+
+        load_result = {"mode": self.config.mode, **load_level, "num_requests": num_requests}
+        load_result["achieved_qps(requests/s)"] = achieved_qps
+        load_result["throughput(samples/s)"] = throughput
+        for key, value in get_latency_statistics(latencies).items():
+            load_result[f"latency.{key}(s)"] = value
+        for key, value in get_latency_statistics(queueing_delays).items():
+            load_result[f"queueing_delay.{key}(s)"] = value
+
+        LOGGER.info(f"\t+ Achieved QPS: {achieved_qps} (requests/s)")
+        LOGGER.info(f"\t+ Latency p50: {load_result['latency.p50(s)']:.2e} (s)")
+        LOGGER.info(f"\t+ Latency p99: {load_result['latency.p99(s)']:.2e} (s)")
+        self.load_results.append(load_result)
+
+    def get_results_df(self) -> DataFrame:
+        return DataFrame(self.load_results)
+
+    def save(self) -> None:
+        LOGGER.info("Saving load results")
+        results_df = self.get_results_df()
+        results_df.to_csv("load_results.csv")
@@ -0,0 +1,91 @@
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import Any, Dict, List
+
+from omegaconf import OmegaConf
+
+from ..base import BenchmarkConfig
+
+LOGGER = getLogger("load")
+
+LOAD_MODES = ["closed_loop", "open_loop"]
+ARRIVAL_DISTRIBUTIONS = ["poisson", "constant"]
+# backends whose model can't be called from several threads at once,
+# e.g. openvino's OVModel runs every call through the same infer request
+NON_THREAD_SAFE_BACKENDS = ["openvino"]
+
+OmegaConf.register_new_resolver("is_thread_safe", lambda backend_name: backend_name not in NON_THREAD_SAFE_BACKENDS)
+
+
+@dataclass
+class LoadConfig(BenchmarkConfig):
+    name: str = "load"
+    _target_: str = "optimum_benchmark.benchmarks.load.benchmark.LoadBenchmark"
+
+    # benchmark options
+    duration: int = 10  # per load level
+    warmup_runs: int = 10
+
+    # load options
+    # closed_loop: each of the N concurrent workers sends a new request as soon as its previous one is done
+    # open_loop: requests arrive at a target rate, independently of how fast they are served
+    mode: str = "closed_loop"
+    # closed loop load levels (number of concurrent workers)
+    concurrency_levels: List[int] = field(default_factory=lambda: [1, 2, 4])
+    # open loop load levels (requests per second)
+    request_rates: List[float] = field(default_factory=lambda: [1.0, 2.0, 4.0])
+    # open loop inter-arrival times distribution
+    arrival_distribution: str = "poisson"
+    # open loop maximum number of requests served concurrently, the rest are queued
+    max_concurrency: int = 4
+    seed: int = 42
+    # the workers share the backend's model, only thread safe backends can serve concurrent requests
+    thread_safe: bool = "${is_thread_safe:${backend.name}}"
+
+    # input options
+    input_shapes: Dict = field(
+        default_factory=lambda: {
+            # used with all tasks
+            "batch_size": 1,
+            # used with text input tasks
+            "sequence_length": 16,
+            # used with multiple choice tasks where input
+            # is of shape (batch_size, num_choices, sequence_length)
+            "num_choices": 1,
+            # used with audio input tasks
+            "feature_size": 80,
+            "nb_max_frames": 3000,
+            "audio_sequence_length": 16000,
+        },
+    )
+
+    # forward options
+    forward_kwargs: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if self.mode not in LOAD_MODES:
+            raise ValueError(f"`mode` must be one of {LOAD_MODES}. Got {self.mode} instead.")
+
+        if self.arrival_distribution not in ARRIVAL_DISTRIBUTIONS:
+            raise ValueError(
+                f"`arrival_distribution` must be one of {ARRIVAL_DISTRIBUTIONS}. Got {self.arrival_distribution} instead."
+            )
+
+        if self.mode == "closed_loop" and any(level < 1 for level in self.concurrency_levels):
+            raise ValueError("`concurrency_levels` must all be strictly positive.")
+
+        if self.mode == "open_loop" and any(rate <= 0 for rate in self.request_rates):
+            raise ValueError("`request_rates` must all be strictly positive.")
+
+        if not self.thread_safe:
+            if self.mode == "closed_loop" and any(level > 1 for level in self.concurrency_levels):
+                raise ValueError(
+                    "The backend can't serve concurrent requests, `concurrency_levels` must all be 1 with it. "
+                    f"Got {self.concurrency_levels} instead."
+                )
+
+            if self.mode == "open_loop" and self.max_concurrency > 1:
+                raise ValueError(
+                    "The backend can't serve concurrent requests, `max_concurrency` must be 1 with it. "
+                    f"Got {self.max_concurrency} instead."
+                )
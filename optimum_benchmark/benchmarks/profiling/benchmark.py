@@ -0,0 +1,97 @@
+from collections import defaultdict
+from logging import getLogger
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+from pandas import DataFrame
+
+from ...generators.input_generator import InputGenerator
+from ..base import Benchmark
+from ..utils import extract_three_significant_digits, get_latency_statistics
+from .config import ProfilingConfig
+
+if TYPE_CHECKING:
+    from ...backends.base import Backend
+
+LOGGER = getLogger("profiling")
+
+# backends whose prepare_for_profiling wraps the model in a profiler
+PROFILING_BACKENDS = ["pytorch", "onnxruntime"]
+
+
+class ProfilingBenchmark(Benchmark[ProfilingConfig]):
+    NAME = "profiling"
+
+    def __init__(self):
+        # initialize profiling results, one list of (name, op type, latency) records per profiled run
+        self.run_profiling_records: List[List[Tuple[str, str, float]]] = []
+
+    def configure(self, config: "ProfilingConfig"):
+        super().configure(config)
+
+    def run(self, backend: "Backend") -> None:
+        LOGGER.info("Running profiling benchmark")
+        if backend.NAME not in PROFILING_BACKENDS:
+            raise NotImplementedError(f"Profiling is only supported by the {PROFILING_BACKENDS} backends.")
+
+        self.config.input_shapes.update(backend.model_shapes)
+
+        input_generator = InputGenerator(
+            task=backend.task,
+            pretrained_config=backend.pretrained_config,
+            input_shapes=self.config.input_shapes,
+        )
+        forward_input = input_generator.generate(mode="forward")
+
+        # symbolic tracing requires the input names, in the order they're passed to the model
+        backend.prepare_for_profiling(input_names=list(forward_input.keys()))
+
+        LOGGER.info("\t+ Preparing input for the forward pass")
+        forward_input = backend.prepare_input(forward_input)
+
+        LOGGER.info("\t+ Warming up the forward pass")
+        self.set_phase("forward.warmup")
+        for _ in range(self.config.warmup_runs):
+            _ = backend.forward(forward_input, {})
+
+        LOGGER.info(f"\t+ Profiling {self.config.profiling_runs} forward passes")
+        self.set_phase("forward")
+        for _ in range(self.config.profiling_runs):
+            _ = backend.forward(forward_input, {})
+
+        # warmup runs are profiled as well, only the last ones are kept
+        run_profiling_records = backend.pretrained_model.get_run_profiling_records()
+        self.run_profiling_records = run_profiling_records[-self.config.profiling_runs :]
+
+        hotspots_df = self.get_hotspots_df(key="op_type")
+        for op_type, share in hotspots_df[["op_type", "share(%)"]].head(5).itertuples(index=False):
+            LOGGER.info(f"\t+ {op_type}: {share}% of the forward pass")
+
+    def get_hotspots_df(self, key: str) -> DataFrame:
+        # latency of each node or op type per run, summed over the nodes of the same op type
+        num_runs = len(self.run_profiling_records)
+        run_latencies: Dict[Tuple[str, ...], List[float]] = defaultdict(lambda: [0.0] * num_runs)
+        for run_index, run_records in enumerate(self.run_profiling_records):
+            for name, op_type, latency in run_records:
+                hotspot = (name, op_type) if key == "node" else (op_type,)
+                run_latencies[hotspot][run_index] += latency
+
+        total_latency = sum(sum(latencies) for latencies in run_latencies.values())
+
+        hotspots = []
+        for hotspot, latencies in run_latencies.items():
+            row = dict(zip(["node", "op_type"] if key == "node" else ["op_type"], hotspot))
+            for stat, value in get_latency_statistics(latencies).items():
+                row[f"latency.{stat}(s)"] = value
+            row["share(%)"] = extract_three_significant_digits(100 * sum(latencies) / total_latency)
+            hotspots.append(row)
+
+        return DataFrame(hotspots).sort_values("share(%)", ascending=False, ignore_index=True)
+
+    def get_results_df(self) -> DataFrame:
+        return self.get_hotspots_df(key="node")
+
+    def save(self) -> None:
+        LOGGER.info("Saving profiling results")
+        results_df = self.get_results_df()
+        results_df.to_csv("profiling_results.csv")
+        self.get_hotspots_df(key="op_type").to_csv("profiling_op_type_results.csv")
@@ -0,0 +1,41 @@
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import Dict
+
+from ..base import BenchmarkConfig
+
+LOGGER = getLogger("profiling")
+
+
+@dataclass
+class ProfilingConfig(BenchmarkConfig):
+    name: str = "profiling"
+    _target_: str = "optimum_benchmark.benchmarks.profiling.benchmark.ProfilingBenchmark"
+
+    # benchmark options
+    warmup_runs: int = 10
+    profiling_runs: int = 10
+
+    # input options
+    input_shapes: Dict = field(
+        default_factory=lambda: {
+            # used with all tasks
+            "batch_size": 1,
+            # used with text input tasks
+            "sequence_length": 16,
+            # used with multiple choice tasks where input
+            # is of shape (batch_size, num_choices, sequence_length)
+            "num_choices": 1,
+            # used with audio input tasks
+            "feature_size": 80,
+            "nb_max_frames": 3000,
+            "audio_sequence_length": 16000,
+        },
+    )
+
+    def __post_init__(self):
+        if self.warmup_runs < 0:
+            raise ValueError("`warmup_runs` must be positive.")
+
+        if self.profiling_runs < 1:
+            raise ValueError("`profiling_runs` must be strictly positive.")
@@ -0,0 +1,128 @@
+import statistics
+from logging import getLogger
+from typing import TYPE_CHECKING, Any, Dict, List
+
+import torch
+from pandas import DataFrame
+
+from ...generators.input_generator import InputGenerator
+from ...trackers.latency import LatencyTracker
+from ...trackers.startup import track_startup_phase
+from ..base import Benchmark
+from ..utils import extract_three_significant_digits, get_latency_statistics
+from .config import StartupConfig
+
+if TYPE_CHECKING:
+    from ...backends.base import Backend
+
+LOGGER = getLogger("startup")
+
+# the phases a user waits for before getting their first output
+COLD_START_PHASES = ["init", "configure", "prepare_for_inference", "first_inference"]
+
+
+class StartupBenchmark(Benchmark[StartupConfig]):
+    NAME = "startup"
+
+    def __init__(self):
+        # initialize startup results
+        self.steady_state_latencies: List[float] = []
+
+    def configure(self, config: "StartupConfig"):
+        super().configure(config)
+
+    def run(self, backend: "Backend") -> None:
+        LOGGER.info("Running startup benchmark")
+        if self.startup_tracker is None:
+            raise RuntimeError("The startup benchmark must be run with a startup tracker started before the backend.")
+
+        self.config.input_shapes.update(backend.model_shapes)
+
+        input_generator = InputGenerator(
+            task=backend.task,
+            pretrained_config=backend.pretrained_config,
+            input_shapes=self.config.input_shapes,
+        )
+        forward_input = input_generator.generate(mode="forward")
+
+        LOGGER.info("\t+ Preparing input for the forward pass")
+        forward_input = backend.prepare_input(forward_input)
+
+        # for backends that require compilation with static shapes
+        with track_startup_phase("prepare_for_inference"):
+            backend.prepare_for_inference(input_shapes=self.config.input_shapes)
+
+        # lazy initializations (torch.compile, cudnn autotuning, memory arenas, ...) happen here
+        LOGGER.info("\t+ Running the first forward pass")
+        self.set_phase("first_inference")
+        with track_startup_phase("first_inference"):
+            self.forward(backend, forward_input)
+
+        LOGGER.info(f"\t+ Tracking {self.config.steady_state_runs} steady state forward passes")
+        self.set_phase("steady_state")
+        latency_tracker = LatencyTracker(device=backend.device, backend=backend.NAME)
+        for _ in range(self.config.steady_state_runs):
+            with latency_tracker.track():
+                _ = backend.forward(forward_input, self.config.forward_kwargs)
+        self.steady_state_latencies = latency_tracker.get_latencies()
+
+        LOGGER.info(f"\t+ Cold start: {self.cold_start_time:.2e} (s)")
+        LOGGER.info(f"\t+ First inference: {self.first_inference_latency:.2e} (s)")
+        LOGGER.info(f"\t+ Steady state latency: {self.steady_state_latency:.2e} (s)")
+
+    def forward(self, backend: "Backend", forward_input: Dict[str, Any]) -> None:
+        _ = backend.forward(forward_input, self.config.forward_kwargs)
+
+        if backend.device.type == "cuda" and backend.NAME == "pytorch":
+            # pytorch kernels are launched asynchronously
+            torch.cuda.current_stream().synchronize()
+
+    # Metrics
+    @property
+    def cold_start_time(self) -> float:
+        return extract_three_significant_digits(
+            sum(
+                self.startup_tracker.get_wall_time(phase)
+                for phase in COLD_START_PHASES
+                if phase in self.startup_tracker.get_phases()
+            )
+        )
+
+    @property
+    def first_inference_latency(self) -> float:
+        return extract_three_significant_digits(self.startup_tracker.get_wall_time("first_inference"))
+
+    @property
+    def steady_state_latency(self) -> float:
+        return extract_three_significant_digits(statistics.mean(self.steady_state_latencies))
+
+    def get_breakdown_df(self) -> DataFrame:
+        breakdown_df = self.startup_tracker.get_breakdown_df()
+        breakdown_df["wall_time(s)"] = breakdown_df["wall_time(s)"].apply(extract_three_significant_digits)
+        return breakdown_df
+
+    def get_results_df(self) -> DataFrame:
+        results_dict = {}
+
+        results_dict["cold_start(s)"] = self.cold_start_time
+        for phase in self.startup_tracker.get_phases():
+            results_dict[f"{phase}.wall_time(s)"] = extract_three_significant_digits(
+                self.startup_tracker.get_wall_time(phase)
+            )
+            results_dict[f"{phase}.peak_rss(MB)"] = self.startup_tracker.get_peak_rss(phase)
+
+        results_dict["steady_state.latency(s)"] = self.steady_state_latency
+        for key, value in get_latency_statistics(self.steady_state_latencies).items():
+            results_dict[f"steady_state.latency.{key}(s)"] = value
+        # what the first inference costs on top of a steady state one
+        results_dict["first_inference.overhead(s)"] = extract_three_significant_digits(
+            self.first_inference_latency - self.steady_state_latency
+        )
+
+        return DataFrame(results_dict, index=[0])
+
+    def save(self) -> None:
+        LOGGER.info("Saving startup results")
+        results_df = self.get_results_df()
+        results_df.to_csv("startup_results.csv")
+        self.get_breakdown_df().to_csv("startup_breakdown.csv")
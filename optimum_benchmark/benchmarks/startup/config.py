@@ -0,0 +1,46 @@
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import Any, Dict
+
+from ..base import BenchmarkConfig
+
+LOGGER = getLogger("startup")
+
+
+@dataclass
+class StartupConfig(BenchmarkConfig):
+    name: str = "startup"
+    _target_: str = "optimum_benchmark.benchmarks.startup.benchmark.StartupBenchmark"
+
+    # benchmark options
+    # the first inference is compared to the mean latency of the steady state runs that follow it
+    steady_state_runs: int = 10
+    # peak RSS sampling interval (s)
+    interval: float = 0.01
+
+    # input options
+    input_shapes: Dict = field(
+        default_factory=lambda: {
+            # used with all tasks
+            "batch_size": 1,
+            # used with text input tasks
+            "sequence_length": 16,
+            # used with multiple choice tasks where input
+            # is of shape (batch_size, num_choices, sequence_length)
+            "num_choices": 1,
+            # used with audio input tasks
+            "feature_size": 80,
+            "nb_max_frames": 3000,
+            "audio_sequence_length": 16000,
+        },
+    )
+
+    # forward options
+    forward_kwargs: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if self.steady_state_runs < 1:
+            raise ValueError("`steady_state_runs` must be strictly positive.")
+
+        if self.interval <= 0:
+            raise ValueError("`interval` must be strictly positive.")
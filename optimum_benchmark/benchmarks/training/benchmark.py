@@ -1,18 +1,51 @@
+import gc
+import os
+import statistics
+from contextlib import nullcontext
 from logging import getLogger
-from typing import TYPE_CHECKING, Any, Dict
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
 
+import numpy as np
+import torch
 from pandas import DataFrame
 
+from ...backends.ddp_utils import get_cores_per_rank
 from ...generators.dataset_generator import DatasetGenerator
+from ...trackers.memory import MemoryTracker
 from ..base import Benchmark
-from ..utils import MeasurementCallback, get_data_collator
+from ..utils import (
+    STEP_PHASES,
+    AllReduceCallback,
+    EnergyCallback,
+    MeasurementCallback,
+    MemoryCallback,
+    StepBreakdownCallback,
+    extract_three_significant_digits,
+    get_batch_size_search_df,
+    get_data_collator,
+    get_knee_batch_size,
+    get_latency_statistics,
+    get_max_fitting_batch_size,
+    get_memory_timeline_df,
+    get_peak_memories,
+    get_scaling_df,
+    get_step_breakdown_df,
+    is_out_of_memory_error,
+    search_batch_sizes,
+)
 from .config import TrainingConfig
 
 if TYPE_CHECKING:
+    from datasets import Dataset
+    from transformers import TrainerState
+
     from ...backends.base import Backend
 
 LOGGER = getLogger("training")
 
+# number of measured training steps (after one warmup step) per batch size during the automatic batch size search
+AUTO_BATCH_SIZE_STEPS = 3
+
 
 class TrainingBenchmark(Benchmark[TrainingConfig]):
     NAME = "training"
@@ -20,6 +53,11 @@ class TrainingBenchmark(Benchmark[TrainingConfig]):
     def __init__(self):
         # initialize training results
         self.training_metrics: Dict[str, Any] = {}
+        self.batch_size_measurements: Dict[int, Optional[Dict[str, float]]] = {}
+        self.step_times: List[float] = []
+        self.step_breakdown: Dict[str, List[float]] = {}
+        self.memory_timeline_df: Optional[DataFrame] = None
+        self.scaling_measurements: Dict[int, Dict[str, float]] = {}
 
     def configure(self, config: TrainingConfig):
         super().configure(config)
@@ -27,19 +65,58 @@ class TrainingBenchmark(Benchmark[TrainingConfig]):
     def run(self, backend: "Backend") -> None:
         LOGGER.info("Running training benchmark")
         task = backend.task
+
+        if self.config.auto_batch_size:
+            self.set_phase("auto_batch_size")
+            self.run_batch_size_search(backend)
+
+        self.set_phase("training")
         dataset_shapes = {**self.config.dataset_shapes, **backend.model_shapes}
-        dataset_generator = DatasetGenerator(task=task, dataset_shapes=dataset_shapes)
+        dataset_generator = DatasetGenerator(task=task, dataset_shapes=dataset_shapes, seed=backend.config.seed)
 
         training_dataset = dataset_generator.generate()
         training_data_collator = get_data_collator(task=task)
+
+        if self.config.scaling:
+            self.set_phase("scaling")
+            self.run_scaling(backend, training_dataset, training_data_collator)
+            self.set_phase("training")
+
+        use_ddp = getattr(backend.config, "use_ddp", False)
         training_callbacks = [MeasurementCallback(warmup_steps=self.config.warmup_steps)]
+        if use_ddp:
+            training_callbacks.append(AllReduceCallback())
+        if self.config.step_breakdown:
+            training_callbacks.append(
+                StepBreakdownCallback(
+                    warmup_steps=self.config.warmup_steps,
+                    synchronize=backend.device.type == "cuda",
+                )
+            )
+        if self.config.memory:
+            training_callbacks.append(
+                MemoryCallback(
+                    warmup_steps=self.config.warmup_steps,
+                    interval=self.config.memory_timeline_interval,
+                )
+            )
+        if self.config.energy:
+            training_callbacks.append(
+                EnergyCallback(
+                    warmup_steps=self.config.warmup_steps,
+                    energy_tracker=self.config.energy_tracker,
+                )
+            )
 
-        trainer_state = backend.train(
-            training_dataset=training_dataset,
-            training_callbacks=training_callbacks,
-            training_data_collator=training_data_collator,
-            training_arguments=self.config.training_arguments,
-        )
+        # the host memory is tracked by the workers themselves, the devices' memory covers all of them
+        memory_tracker = MemoryTracker(device=backend.device)
+        with memory_tracker.track() if self.config.memory and backend.device.type == "cuda" else nullcontext():
+            trainer_state = backend.train(
+                training_dataset=training_dataset,
+                training_callbacks=training_callbacks,
+                training_data_collator=training_data_collator,
+                training_arguments=self.config.training_arguments,
+            )
 
         self.training_metrics = {
             # warmup metrics
@@ -53,6 +130,190 @@ class TrainingBenchmark(Benchmark[TrainingConfig]):
             "overall_training.throughput(samles/s)": (trainer_state.overall_training_samples_per_second),
         }
 
+        if use_ddp:
+            self.training_metrics["training.allreduce_time(s)"] = extract_three_significant_digits(
+                trainer_state.allreduce_time
+            )
+
+        self.step_times = trainer_state.step_times
+        for key, value in get_latency_statistics(self.step_times).items():
+            self.training_metrics[f"training.step_time.{key}(s)"] = value
+
+        tokens_per_sample = None
+        if "input_ids" in training_dataset.column_names:
+            # all samples are padded to the same shape, e.g. (num_choices, sequence_length)
+            tokens_per_sample = training_dataset[0]["input_ids"].numel()
+            self.training_metrics["training.throughput(tokens/s)"] = extract_three_significant_digits(
+                trainer_state.training_samples_per_second * tokens_per_sample
+            )
+
+        if self.config.memory:
+            self.memory_timeline_df = get_memory_timeline_df(trainer_state.memory_timelines)
+            for phase in ["warmup", "training"]:
+                self.training_metrics.update(get_peak_memories(self.memory_timeline_df, phase))
+            if backend.device.type == "cuda":
+                self.training_metrics["training.peak_memory(MB)"] = memory_tracker.get_peak_memory()
+            LOGGER.info(f"\t+ Training peak RSS: {self.training_metrics['training.peak_rss(MB)']} (MB)")
+
+        if self.config.energy:
+            self.training_metrics.update(self.get_energy_metrics(trainer_state, tokens_per_sample))
+
+        if self.config.step_breakdown:
+            if sum(trainer_state.step_breakdown["forward"]) > 0:
+                self.step_breakdown = trainer_state.step_breakdown
+                self.training_metrics.update(self.get_step_breakdown_metrics())
+            else:
+                # e.g. onnxruntime's ORTModule runs the exported graph instead of the model's forward
+                LOGGER.warning("\t+ The model's forward hooks were never called, the step breakdown is unavailable")
+
+        if self.config.auto_batch_size:
+            self.training_metrics["auto_batch_size.max_batch_size"] = get_max_fitting_batch_size(
+                self.batch_size_measurements
+            )
+            self.training_metrics["auto_batch_size.knee_batch_size"] = self.config.training_arguments[
+                "per_device_train_batch_size"
+            ]
+
+    def run_scaling(self, backend: "Backend", training_dataset: "Dataset", training_data_collator: Callable) -> None:
+        if not getattr(backend.config, "use_ddp", False):
+            raise ValueError("The training scaling mode requires a backend with `use_ddp` enabled.")
+
+        ddp_config, ddp_cores_per_rank = backend.config.ddp_config, backend.config.ddp_cores_per_rank
+        world_sizes = self.config.scaling_world_sizes or list(range(1, ddp_config["nproc_per_node"] + 1))
+        LOGGER.info(f"\t+ Measuring the training scaling over world sizes {world_sizes}")
+
+        if backend.device.type == "cpu":
+            # each rank keeps the cores it would have with the largest world size
+            backend.config.ddp_cores_per_rank = get_cores_per_rank(
+                max(world_sizes + [ddp_config["nproc_per_node"]]), ddp_cores_per_rank
+            )
+
+        try:
+            for world_size in world_sizes:
+                LOGGER.info(f"\t+ Training with {world_size} ranks")
+                backend.config.ddp_config = {**ddp_config, "nproc_per_node": world_size}
+                trainer_state = backend.train(
+                    training_dataset=training_dataset,
+                    training_callbacks=[
+                        MeasurementCallback(warmup_steps=self.config.warmup_steps),
+                        AllReduceCallback(),
+                    ],
+                    training_data_collator=training_data_collator,
+                    training_arguments=self.config.training_arguments,
+                )
+                self.scaling_measurements[world_size] = {
+                    "throughput": trainer_state.training_samples_per_second,
+                    "allreduce_time": trainer_state.allreduce_time,
+                }
+                LOGGER.info(
+                    f"\t+ Training throughput with {world_size} ranks: "
+                    f"{trainer_state.training_samples_per_second:.3g} (samples/s)"
+                )
+        finally:
+            backend.config.ddp_config, backend.config.ddp_cores_per_rank = ddp_config, ddp_cores_per_rank
+
+    def run_batch_size_search(self, backend: "Backend") -> None:
+        LOGGER.info("\t+ Searching for the maximum batch size and the throughput knee")
+        self.batch_size_measurements = search_batch_sizes(
+            lambda batch_size: self.measure_batch_size(backend, batch_size),
+            max_batch_size=self.config.max_batch_size,
+        )
+        knee_batch_size = get_knee_batch_size(self.batch_size_measurements, threshold=self.config.knee_threshold)
+        LOGGER.info(f"\t+ Maximum batch size: {get_max_fitting_batch_size(self.batch_size_measurements)}")
+        LOGGER.info(f"\t+ Throughput knee batch size: {knee_batch_size}")
+        self.config.training_arguments["per_device_train_batch_size"] = knee_batch_size
+
+    def measure_batch_size(self, backend: "Backend", batch_size: int) -> Optional[Dict[str, float]]:
+        LOGGER.info(f"\t+ Trying batch size {batch_size}")
+        num_steps = 1 + AUTO_BATCH_SIZE_STEPS
+        dataset_shapes = {
+            **self.config.dataset_shapes,
+            **backend.model_shapes,
+            "dataset_size": batch_size * num_steps,
+        }
+        training_arguments = {
+            **self.config.training_arguments,
+            "per_device_train_batch_size": batch_size,
+            "max_steps": num_steps,
+        }
+        try:
+            training_dataset = DatasetGenerator(
+                task=backend.task, dataset_shapes=dataset_shapes, seed=backend.config.seed
+            ).generate()
+            # with ddp, only the main process' memory is tracked on cpu
+            memory_tracker = MemoryTracker(device=backend.device)
+            with memory_tracker.track():
+                trainer_state = backend.train(
+                    training_dataset=training_dataset,
+                    training_callbacks=[MeasurementCallback(warmup_steps=1)],
+                    training_data_collator=get_data_collator(task=backend.task),
+                    training_arguments=training_arguments,
+                )
+            measurement = {
+                "peak_memory(MB)": memory_tracker.get_peak_memory(),
+                "training.throughput(samples/s)": trainer_state.training_samples_per_second,
+                "throughput": trainer_state.training_samples_per_second,
+            }
+        except Exception as e:
+            if not is_out_of_memory_error(e):
+                raise e
+            LOGGER.info(f"\t+ Batch size {batch_size} ran out of memory")
+            measurement = None
+        finally:
+            training_dataset = None
+            gc.collect()
+            if backend.device.type == "cuda":
+                torch.cuda.empty_cache()
+
+        if measurement is None:
+            return None
+
+        if self.config.memory_budget is not None and measurement["peak_memory(MB)"] > self.config.memory_budget:
+            LOGGER.info(f"\t+ Batch size {batch_size} exceeds the memory budget of {self.config.memory_budget} (MB)")
+            return None
+
+        return measurement
+
+    def get_energy_metrics(self, trainer_state: "TrainerState", tokens_per_sample: Optional[int]) -> Dict[str, float]:
+        energy_metrics = {
+            "training.energy_consumption(kWh/sample)": extract_three_significant_digits(
+                trainer_state.training_energy / trainer_state.num_training_samples
+            ),
+        }
+        if tokens_per_sample is not None:
+            energy_metrics["training.energy_consumption(kWh/token)"] = extract_three_significant_digits(
+                trainer_state.training_energy / (trainer_state.num_training_samples * tokens_per_sample)
+            )
+        if trainer_state.training_emissions is not None:
+            energy_metrics["training.carbon_emissions(kgCO2eq/sample)"] = extract_three_significant_digits(
+                trainer_state.training_emissions / trainer_state.num_training_samples
+            )
+
+        training_energy = energy_metrics["training.energy_consumption(kWh/sample)"]
+        LOGGER.info(f"\t+ Training energy consumption: {training_energy} (kWh/sample)")
+        LOGGER.info(f"\t+ Full details in the energy report: {os.getcwd()}/{trainer_state.energy_report_file}")
+
+        return energy_metrics
+
+    def get_step_breakdown_metrics(self) -> Dict[str, float]:
+        step_breakdown_metrics = {}
+        total_time = sum(sum(phase_times) for phase_times in self.step_breakdown.values())
+        for phase in STEP_PHASES:
+            step_breakdown_metrics[f"training.{phase}.mean(s)"] = extract_three_significant_digits(
+                statistics.mean(self.step_breakdown[phase])
+            )
+            step_breakdown_metrics[f"training.{phase}.share(%)"] = extract_three_significant_digits(
+                100 * sum(self.step_breakdown[phase]) / total_time
+            )
+
+        # time spent waiting for inputs vs time spent computing on them
+        step_breakdown_metrics["training.input_bound(%)"] = step_breakdown_metrics["training.data.share(%)"]
+        step_breakdown_metrics["training.compute_bound(%)"] = extract_three_significant_digits(
+            100 - step_breakdown_metrics["training.data.share(%)"]
+        )
+
+        return step_breakdown_metrics
+
     def get_results_df(self) -> DataFrame:
         return DataFrame(self.training_metrics, index=[0])
 
@@ -60,3 +321,20 @@ class TrainingBenchmark(Benchmark[TrainingConfig]):
         LOGGER.info("Saving training results")
         results_df = self.get_results_df()
         results_df.to_csv("training_results.csv")
+        np.save("training_step_times.npy", np.asarray(self.step_times, dtype=np.float64))
+
+        if self.memory_timeline_df is not None:
+            LOGGER.info("Saving training memory timeline")
+            self.memory_timeline_df.to_csv("training_memory_timeline.csv")
+
+        if self.config.scaling:
+            LOGGER.info("Saving training scaling results")
+            get_scaling_df(self.scaling_measurements).to_csv("training_scaling.csv")
+
+        if len(self.step_breakdown) > 0:
+            LOGGER.info("Saving training step breakdown")
+            get_step_breakdown_df(self.step_breakdown).to_csv("training_step_breakdown.csv")
+
+        if self.config.auto_batch_size:
+            LOGGER.info("Saving batch size search results")
+            get_batch_size_search_df(self.batch_size_measurements).to_csv("batch_size_search_results.csv")
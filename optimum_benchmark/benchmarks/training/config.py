@@ -1,10 +1,11 @@
 from dataclasses import dataclass, field
 from logging import getLogger
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 from omegaconf import OmegaConf
 
 from ..base import BenchmarkConfig
+from ..inference.config import ENERGY_TRACKERS
 
 LOGGER = getLogger("training")
 
@@ -19,6 +20,34 @@ class TrainingConfig(BenchmarkConfig):
 
     # training options
     warmup_steps: int = 40  # still thinks this too high
+    # split each training step into its dataloader wait, forward, backward, optimizer step and zero_grad times,
+    # saved to training_step_breakdown.csv, cuda is synchronized at each boundary which slightly slows training
+    step_breakdown: bool = False
+
+    # additional/optional metrics
+    # peak RSS/PSS/USS of the warmup and training phases summed over the workers, with their memory timelines
+    # saved to training_memory_timeline.csv, and the device memory on cuda
+    memory: bool = False
+    # energy per training sample and per token, of the steps after the warmup
+    energy: bool = False
+    # codecarbon or rapl (linux powercap counters, falls back to codecarbon when not readable)
+    energy_tracker: str = "codecarbon"
+
+    # automatic batch size search options
+    # searches for the largest batch size that fits (no out of memory error and peak memory within
+    # `memory_budget` MB) and for the throughput knee, i.e. the smallest batch size reaching
+    # `knee_threshold` times the best throughput, training then runs with the knee batch size
+    auto_batch_size: bool = False
+    max_batch_size: int = 1024
+    memory_budget: Optional[int] = None
+    knee_threshold: float = 0.9
+
+    # scaling options
+    # trains with each world size (1 to `backend.ddp_config.nproc_per_node` ranks by default) and reports their
+    # throughput, scaling efficiency and allreduce time in training_scaling.csv, requires `backend.use_ddp`
+    # on cpu, each rank keeps the same number of cores whatever the world size, so that adding ranks adds cores
+    scaling: bool = False
+    scaling_world_sizes: Optional[List[int]] = None
 
     # dataset options
     dataset_shapes: Dict[str, Any] = field(
@@ -53,3 +82,15 @@ class TrainingConfig(BenchmarkConfig):
             "report_to": "none",
         }
     )
+
+    def __post_init__(self):
+        if self.energy_tracker not in ENERGY_TRACKERS:
+            raise ValueError(f"`energy_tracker` must be one of {ENERGY_TRACKERS}. Got {self.energy_tracker} instead.")
+
+        if self.scaling_world_sizes is not None and (
+            len(self.scaling_world_sizes) == 0 or min(self.scaling_world_sizes) < 1
+        ):
+            raise ValueError("`scaling_world_sizes` must be a non-empty list of positive integers.")
+
+        if self.auto_batch_size and not 0 < self.knee_threshold <= 1:
+            raise ValueError("`knee_threshold` must be in ]0, 1].")
@@ -1,10 +1,16 @@
+import math
 import time
+from contextlib import ExitStack
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Any, Callable, Dict
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
 
+import numpy as np
+from pandas import DataFrame, concat
 from transformers import TrainerCallback, default_data_collator
 
 if TYPE_CHECKING:
+    from torch.nn import Module
+    from torch.optim import Optimizer
     from transformers import TrainerControl, TrainerState, TrainingArguments
 
 
@@ -19,6 +25,131 @@ def three_significant_digits_wrapper(func: Callable[..., float]) -> Callable[...
     return wrapper
 
 
+# percentiles reported for every tracked latency distribution
+LATENCY_PERCENTILES = [50, 90, 95, 99, 99.9]
+# two-sided 95% normal quantile, used for the confidence interval on the mean
+CONFIDENCE_Z_SCORE = 1.96
+
+
+def get_latency_statistics(latencies: List[float]) -> Dict[str, float]:
+    """Summarizes a latency distribution with percentiles, spread and a 95% confidence interval on the mean."""
+    latencies = np.asarray(latencies, dtype=np.float64)
+    num_samples = latencies.size
+
+    mean = latencies.mean()
+    stdev = latencies.std(ddof=1) if num_samples > 1 else 0.0
+    margin = CONFIDENCE_Z_SCORE * stdev / math.sqrt(num_samples)
+
+    statistics = {
+        "mean": mean,
+        "stdev": stdev,
+        "min": latencies.min(),
+        "max": latencies.max(),
+        "ci95_low": mean - margin,
+        "ci95_high": mean + margin,
+    }
+    for percentile, value in zip(LATENCY_PERCENTILES, np.percentile(latencies, LATENCY_PERCENTILES)):
+        statistics[f"p{percentile:g}"] = value
+
+    return {key: extract_three_significant_digits(value) for key, value in statistics.items()}
+
+
+def get_relative_confidence_interval(count: int, mean: float, stdev: float) -> float:
+    """Half-width of the 95% confidence interval on the mean, relative to the mean."""
+    if count < 2 or mean == 0:
+        return math.inf
+
+    return CONFIDENCE_Z_SCORE * stdev / math.sqrt(count) / mean
+
+
+def is_steady_state(latencies: List[float], window: int, tolerance: float) -> bool:
+    """Whether the mean latency of the last `window` runs is within `tolerance` (relative) of the previous window's."""
+    if len(latencies) < 2 * window:
+        return False
+
+    previous_mean = np.mean(latencies[-2 * window : -window])
+    current_mean = np.mean(latencies[-window:])
+
+    return abs(current_mean - previous_mean) <= tolerance * previous_mean
+
+
+def is_out_of_memory_error(error: Exception) -> bool:
+    """Whether an error raised by a backend is an allocation failure (pytorch cpu/cuda, onnxruntime, etc)."""
+    if isinstance(error, MemoryError):
+        return True
+
+    message = str(error).lower()
+    return any(pattern in message for pattern in ["out of memory", "can't allocate memory", "failed to allocate"])
+
+
+def search_batch_sizes(
+    measure: Callable[[int], Optional[Dict[str, float]]], max_batch_size: int
+) -> Dict[int, Optional[Dict[str, float]]]:
+    """Measures batch sizes growing exponentially until one doesn't fit, then bisects between the largest one that
+    fits and the smallest one that doesn't. `measure` returns None when a batch size doesn't fit."""
+    measurements = {}
+
+    batch_size = 1
+    while batch_size <= max_batch_size:
+        measurements[batch_size] = measure(batch_size)
+        if measurements[batch_size] is None:
+            break
+        batch_size *= 2
+
+    fitting_batch_sizes = [batch_size for batch_size, measurement in measurements.items() if measurement is not None]
+    if len(fitting_batch_sizes) == 0:
+        raise RuntimeError("Batch size 1 doesn't fit, the automatic batch size search can't proceed.")
+
+    low = max(fitting_batch_sizes)
+    high = min(batch_size, max_batch_size + 1)
+    while high - low > 1:
+        middle = (low + high) // 2
+        measurements[middle] = measure(middle)
+        if measurements[middle] is None:
+            high = middle
+        else:
+            low = middle
+
+    return dict(sorted(measurements.items()))
+
+
+def get_max_fitting_batch_size(measurements: Dict[int, Optional[Dict[str, float]]]) -> int:
+    return max(batch_size for batch_size, measurement in measurements.items() if measurement is not None)
+
+
+def get_knee_batch_size(measurements: Dict[int, Optional[Dict[str, float]]], threshold: float) -> int:
+    """Smallest batch size whose throughput reaches `threshold` times the best measured throughput."""
+    throughputs = {
+        batch_size: measurement["throughput"]
+        for batch_size, measurement in measurements.items()
+        if measurement is not None
+    }
+    best_throughput = max(throughputs.values())
+
+    return min(
+        batch_size for batch_size, throughput in throughputs.items() if throughput >= threshold * best_throughput
+    )
+
+
+def get_batch_size_search_df(measurements: Dict[int, Optional[Dict[str, float]]]) -> DataFrame:
+    """The throughput/memory vs batch size curve, one row per measured batch size."""
+    rows = []
+    for batch_size, measurement in measurements.items():
+        row = {"batch_size": batch_size, "fits": measurement is not None}
+        if measurement is not None:
+            # the generic throughput key is already reported under its unit-specific name
+            row.update(
+                {
+                    key: extract_three_significant_digits(value)
+                    for key, value in measurement.items()
+                    if key != "throughput"
+                }
+            )
+        rows.append(row)
+
+    return DataFrame(rows)
+
+
 @dataclass
 class MeasurementCallback(TrainerCallback):
     warmup_steps: int
@@ -37,6 +168,10 @@ class MeasurementCallback(TrainerCallback):
         state.warmup_start = time.time_ns() * 1e-9
         state.overall_training_start = time.time_ns() * 1e-9
 
+        # the time of each training step (after the warmup), from the end of the previous one
+        state.step_times = []
+        state.last_step_end = state.overall_training_start
+
     def on_step_begin(self, args: "TrainingArguments", state: "TrainerState", control: "TrainerControl", **kwargs):
         if state.global_step == self.warmup_steps:
             state.warmup_end = time.time_ns() * 1e-9
@@ -44,6 +179,12 @@ class MeasurementCallback(TrainerCallback):
         elif state.global_step > state.max_steps - 1:
             raise ValueError("global_step > state.max_steps - 1")
 
+    def on_step_end(self, args: "TrainingArguments", state: "TrainerState", control: "TrainerControl", **kwargs):
+        step_end = time.time_ns() * 1e-9
+        if state.global_step > self.warmup_steps:
+            state.step_times.append(step_end - state.last_step_end)
+        state.last_step_end = step_end
+
     def on_train_end(self, args: "TrainingArguments", state: "TrainerState", control: "TrainerControl", **kwargs):
         state.training_end = time.time_ns() * 1e-9
         state.overall_training_end = time.time_ns() * 1e-9
@@ -69,6 +210,250 @@ class MeasurementCallback(TrainerCallback):
         state.overall_training_steps_per_second = state.num_training_steps / state.overall_training_runtime
 
 
+# the phases of a training step, in the order they run
+STEP_PHASES = ["data", "forward", "backward", "optimizer", "zero_grad"]
+
+
+@dataclass
+class StepBreakdownCallback(TrainerCallback):
+    """Splits each training step (after the warmup) into the time spent waiting for the dataloader, in the forward
+    and backward passes, in the optimizer step (with gradient clipping) and in zero_grad (with the lr scheduler step).
+    The phases are delimited by hooks on the model's forward, on the loss' backward and on the optimizer's step, so
+    the model's forward has to run in pytorch. With `synchronize`, cuda kernels are waited for at each boundary."""
+
+    warmup_steps: int
+    synchronize: bool = False
+
+    def on_train_begin(
+        self,
+        args: "TrainingArguments",
+        state: "TrainerState",
+        control: "TrainerControl",
+        model: Optional["Module"] = None,
+        optimizer: Optional["Optimizer"] = None,
+        **kwargs,
+    ):
+        # accelerate wraps the optimizer, the hooks must be registered on the one it steps
+        optimizer = getattr(optimizer, "optimizer", optimizer)
+        self.handles = [
+            model.register_forward_pre_hook(self.on_forward_begin),
+            model.register_forward_hook(self.on_forward_end),
+            optimizer.register_step_pre_hook(self.on_optimizer_begin),
+            optimizer.register_step_post_hook(self.on_optimizer_end),
+        ]
+
+        state.step_breakdown = {phase: [] for phase in STEP_PHASES}
+        self.step_times = dict.fromkeys(STEP_PHASES, 0.0)
+        self.last_event = "train_begin"
+        self.last_time = self.get_time()
+
+    def get_time(self) -> float:
+        if self.synchronize:
+            import torch
+
+            torch.cuda.synchronize()
+
+        return time.perf_counter()
+
+    def add_time(self, phase: str, event: str) -> None:
+        # the time since the previous event is attributed to the phase it closes
+        now = self.get_time()
+        self.step_times[phase] += now - self.last_time
+        self.last_event = event
+        self.last_time = now
+
+    def on_forward_begin(self, module: "Module", inputs: Any) -> None:
+        # with gradient accumulation, there's one forward per micro-batch and each one waits for its own
+        self.add_time("data", "forward_begin")
+
+    def on_forward_end(self, module: "Module", inputs: Any, outputs: Any) -> None:
+        self.add_time("forward", "forward_end")
+
+        loss = outputs.get("loss") if isinstance(outputs, dict) else None
+        if loss is not None and loss.requires_grad:
+            loss.register_hook(self.on_backward_begin)
+
+    def on_backward_begin(self, grad: Any) -> Any:
+        from torch.autograd import Variable
+
+        # called by the autograd engine once the whole backward pass is done
+        Variable._execution_engine.queue_callback(self.on_backward_end)
+        return grad
+
+    def on_backward_end(self) -> None:
+        self.add_time("backward", "backward_end")
+
+    def on_optimizer_begin(self, optimizer: "Optimizer", args: Any, kwargs: Any) -> None:
+        # without a loss in the outputs, the end of the backward pass can't be observed
+        self.add_time("backward" if self.last_event == "forward_end" else "optimizer", "optimizer_begin")
+
+    def on_optimizer_end(self, optimizer: "Optimizer", args: Any, kwargs: Any) -> None:
+        self.add_time("optimizer", "optimizer_end")
+
+    def on_step_end(self, args: "TrainingArguments", state: "TrainerState", control: "TrainerControl", **kwargs):
+        self.add_time("zero_grad", "step_end")
+
+        if state.global_step > self.warmup_steps:
+            for phase, step_time in self.step_times.items():
+                state.step_breakdown[phase].append(step_time)
+        self.step_times = dict.fromkeys(STEP_PHASES, 0.0)
+
+    def on_train_end(self, args: "TrainingArguments", state: "TrainerState", control: "TrainerControl", **kwargs):
+        for handle in self.handles:
+            handle.remove()
+        self.handles = []
+
+
+@dataclass
+class MemoryCallback(TrainerCallback):
+    """Samples the memory of the worker's process throughout the training, labeled with its phase (warmup or
+    training). Each worker tracks its own process, in the state's `memory_timelines` under its rank."""
+
+    warmup_steps: int
+    interval: float = 0.01
+
+    def on_train_begin(self, args: "TrainingArguments", state: "TrainerState", control: "TrainerControl", **kwargs):
+        from ..trackers.memory import MemoryTimelineTracker
+
+        self.memory_timeline_tracker = MemoryTimelineTracker(interval=self.interval)
+        self.memory_timeline_tracker.start()
+        self.memory_timeline_tracker.set_phase("warmup")
+
+    def on_step_begin(self, args: "TrainingArguments", state: "TrainerState", control: "TrainerControl", **kwargs):
+        if state.global_step == self.warmup_steps:
+            self.memory_timeline_tracker.set_phase("training")
+
+    def on_train_end(self, args: "TrainingArguments", state: "TrainerState", control: "TrainerControl", **kwargs):
+        self.memory_timeline_tracker.stop()
+        timeline_df = self.memory_timeline_tracker.get_timeline_df()
+        state.memory_timelines = {args.process_index: timeline_df.to_dict("list")}
+
+
+@dataclass
+class EnergyCallback(TrainerCallback):
+    """Tracks the energy consumed by the training steps after the warmup, from the main worker. With multiple
+    workers, the energy of the whole machine is tracked since the other workers' processes aren't the main one's."""
+
+    warmup_steps: int
+    energy_tracker: str = "codecarbon"
+
+    def on_train_begin(self, args: "TrainingArguments", state: "TrainerState", control: "TrainerControl", **kwargs):
+        self.exit_stack = ExitStack()
+        self.tracker = None
+
+    def on_step_begin(self, args: "TrainingArguments", state: "TrainerState", control: "TrainerControl", **kwargs):
+        if state.global_step == self.warmup_steps and state.is_world_process_zero:
+            from ..trackers.energy import get_energy_tracker
+
+            tracking_mode = "machine" if args.world_size > 1 else "process"
+            self.tracker = get_energy_tracker(self.energy_tracker, tracking_mode=tracking_mode)
+            self.exit_stack.enter_context(self.tracker.track(interval=1, file_prefix="training"))
+
+    def on_train_end(self, args: "TrainingArguments", state: "TrainerState", control: "TrainerControl", **kwargs):
+        self.exit_stack.close()
+        if self.tracker is not None:
+            state.training_energy = self.tracker.get_total_energy()
+            state.training_emissions = self.tracker.get_total_emissions()
+            state.energy_report_file = self.tracker.report_file
+
+
+@dataclass
+class AllReduceCallback(TrainerCallback):
+    """Times the allreduce between the ddp workers of a buffer the size of the model's trainable parameters, i.e. the
+    gradients' synchronization of a training step, once the training is done. DDP overlaps it with the backward pass,
+    bucket by bucket, so it's an upper bound of the communication time a step is exposed to."""
+
+    num_runs: int = 10
+
+    def on_train_end(
+        self,
+        args: "TrainingArguments",
+        state: "TrainerState",
+        control: "TrainerControl",
+        model: Optional["Module"] = None,
+        **kwargs,
+    ):
+        import torch
+        import torch.distributed as dist
+
+        if not (dist.is_available() and dist.is_initialized()):
+            state.allreduce_time = 0.0
+            return
+
+        parameters = [parameter for parameter in model.parameters() if parameter.requires_grad]
+        gradients = torch.zeros(
+            sum(parameter.numel() for parameter in parameters), dtype=parameters[0].dtype, device=args.device
+        )
+        # the first one sets up the communication buffers
+        dist.all_reduce(gradients)
+        dist.barrier()
+
+        start = time.perf_counter()
+        for _ in range(self.num_runs):
+            dist.all_reduce(gradients)
+        if gradients.is_cuda:
+            torch.cuda.synchronize()
+        state.allreduce_time = (time.perf_counter() - start) / self.num_runs
+
+
+def get_scaling_df(measurements: Dict[int, Dict[str, float]]) -> DataFrame:
+    """The throughput and allreduce time of each world size, with the scaling efficiency relative to the smallest
+    one, i.e. the fraction of the throughput it would reach if it scaled linearly with the number of ranks."""
+    base_world_size = min(measurements)
+    base_throughput = measurements[base_world_size]["throughput"] / base_world_size
+
+    rows = []
+    for world_size, measurement in sorted(measurements.items()):
+        rows.append(
+            {
+                "world_size": world_size,
+                "training.throughput(samples/s)": extract_three_significant_digits(measurement["throughput"]),
+                "training.throughput_per_rank(samples/s)": extract_three_significant_digits(
+                    measurement["throughput"] / world_size
+                ),
+                "training.scaling_efficiency(%)": extract_three_significant_digits(
+                    100 * measurement["throughput"] / (world_size * base_throughput)
+                ),
+                "training.allreduce_time(s)": extract_three_significant_digits(measurement["allreduce_time"]),
+            }
+        )
+
+    return DataFrame(rows)
+
+
+def get_memory_timeline_df(memory_timelines: Dict[int, Dict[str, List[Any]]]) -> DataFrame:
+    """The memory timelines of all the workers, one row per sample, with the rank of the worker it was taken in."""
+    timeline_dfs = []
+    for rank, memory_timeline in sorted(memory_timelines.items()):
+        timeline_df = DataFrame(memory_timeline)
+        timeline_df.insert(0, "rank", rank)
+        timeline_dfs.append(timeline_df)
+
+    return concat(timeline_dfs, ignore_index=True)
+
+
+def get_peak_memories(memory_timeline_df: DataFrame, phase: str) -> Dict[str, float]:
+    """The peak RSS/PSS/USS of a phase, summed over the workers. The workers' peaks don't necessarily happen at the
+    same time, so it's an upper bound of the peak of the whole training, tight when all the workers run in lockstep.
+    Summing PSS counts memory shared between the workers (e.g. a memory-mapped dataset) only once."""
+    phase_df = memory_timeline_df[memory_timeline_df["phase"] == phase]
+    worker_peaks_df = phase_df.groupby("rank")[["rss(MB)", "pss(MB)", "uss(MB)"]].max()
+
+    return {
+        f"{phase}.peak_{column}": extract_three_significant_digits(worker_peaks_df[column].sum(skipna=False))
+        for column in worker_peaks_df.columns
+    }
+
+
+def get_step_breakdown_df(step_breakdown: Dict[str, List[float]]) -> DataFrame:
+    """The time of each phase of each training step, one row per step."""
+    step_breakdown_df = DataFrame({f"{phase}(s)": step_breakdown[phase] for phase in STEP_PHASES})
+    step_breakdown_df["step(s)"] = step_breakdown_df.sum(axis=1)
+    step_breakdown_df.index.name = "step"
+
+    return step_breakdown_df
+
+
 def get_data_collator(task: str) -> callable:
     if task == "object-detection":
         return object_detection_data_collator
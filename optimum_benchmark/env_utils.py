@@ -1,8 +1,12 @@
+import glob
+import json
+import os
 import platform
 import re
 import subprocess
+from functools import lru_cache
 from logging import getLogger
-from typing import Optional
+from typing import Any, Dict, List, Optional, Set
 
 import psutil
 
@@ -10,6 +14,12 @@ from .import_utils import is_py3nvml_available
 
 LOGGER = getLogger("utils")
 
+BOOT_ID_PATH = "/proc/sys/kernel/random/boot_id"
+ENVIRONMENT_CACHE_DIR = os.environ.get(
+    "OPTIMUM_BENCHMARK_ENVIRONMENT_CACHE",
+    os.path.join(os.path.expanduser("~/.cache"), "optimum-benchmark", "environment"),
+)
+
 
 def bytes_to_mega_bytes(bytes: int) -> int:
     # Reference: https://en.wikipedia.org/wiki/Byte#Multiple-byte_units
@@ -25,11 +35,10 @@ def get_cpu() -> Optional[str]:
         return str(subprocess.check_output(command).strip())
 
     elif platform.system() == "Linux":
-        command = "cat /proc/cpuinfo"
-        all_info = subprocess.check_output(command, shell=True).decode().strip()
-        for line in all_info.split("\n"):
-            if "model name" in line:
-                return re.sub(".*model name.*:", "", line, 1)
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if "model name" in line:
+                    return re.sub(".*model name.*:", "", line.rstrip("\n"), 1)
         return "Could not find device name"
 
     else:
@@ -55,3 +64,110 @@ def get_gpus():
         gpus = ["py3nvml not available"]
 
     return gpus
+
+
+def get_boot_id() -> str:
+    # changes on every reboot, which is the only time the host's hardware can change
+    if os.path.exists(BOOT_ID_PATH):
+        with open(BOOT_ID_PATH) as f:
+            return f.read().strip()
+    return str(int(psutil.boot_time()))
+
+
+@lru_cache(maxsize=None)
+def get_host_fingerprint() -> Dict[str, Any]:
+    """
+    Returns the host's hardware (cpu, ram, gpus). Probing the gpus initializes nvml which is slow, so the
+    fingerprint is cached on disk per host and boot and only probed once per boot instead of once per experiment.
+    """
+    host_cache_dir = os.path.join(ENVIRONMENT_CACHE_DIR, platform.node())
+    cache_path = os.path.join(host_cache_dir, f"{get_boot_id()}.json")
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            LOGGER.warning(f"Could not read the cached host fingerprint {cache_path}, probing the host instead: {e}")
+
+    fingerprint = {
+        "cpu": get_cpu(),
+        "cpu_count": os.cpu_count(),
+        "cpu_ram_mb": get_cpu_ram_mb(),
+        "gpus": get_gpus(),
+    }
+
+    # without py3nvml there's nothing slow to cache, and it might be installed before the next experiment
+    if is_py3nvml_available():
+        try:
+            os.makedirs(host_cache_dir, exist_ok=True)
+            # fingerprints of previous boots are stale
+            for stale_path in glob.glob(os.path.join(host_cache_dir, "*.json")):
+                if stale_path != cache_path:
+                    os.remove(stale_path)
+            # written to a temporary file first so that concurrent experiments never read a partial fingerprint
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(fingerprint, f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            LOGGER.warning(f"Could not cache the host fingerprint in {cache_path}: {e}")
+
+    return fingerprint
+
+
+def parse_cpu_list(cpu_list: str) -> Set[int]:
+    # e.g. "0-3,8,10-11"
+    cpus = set()
+    for part in cpu_list.strip().split(","):
+        if "-" in part:
+            start, end = part.split("-")
+            cpus.update(range(int(start), int(end) + 1))
+        elif part:
+            cpus.add(int(part))
+    return cpus
+
+
+def format_cpu_list(cpus: List[int]) -> str:
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and ranges[-1][1] == cpu - 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(f"{start}-{end}" if start != end else f"{start}" for start, end in ranges)
+
+
+def get_cpu_affinity() -> Optional[str]:
+    if not hasattr(os, "sched_getaffinity"):
+        return None
+    return format_cpu_list(list(os.sched_getaffinity(0)))
+
+
+def get_numa_nodes() -> List[List[int]]:
+    # the cpus of each numa node this process is allowed to run on, a single node when numa isn't exposed
+    available_cpus = os.sched_getaffinity(0) if hasattr(os, "sched_getaffinity") else set(range(os.cpu_count()))
+
+    numa_nodes = []
+    node_paths = glob.glob("/sys/devices/system/node/node[0-9]*/cpulist")
+    for node_path in sorted(node_paths, key=lambda path: int(re.search(r"node(\d+)", path).group(1))):
+        with open(node_path) as f:
+            node_cpus = parse_cpu_list(f.read()) & available_cpus
+        if node_cpus:
+            numa_nodes.append(sorted(node_cpus))
+
+    return numa_nodes or [sorted(available_cpus)]
+
+
+def get_physical_cores(cpus: List[int]) -> List[List[int]]:
+    # groups the logical cpus (hyperthreads) sharing a physical core
+    physical_cores: Dict[int, List[int]] = {}
+    for cpu in cpus:
+        siblings_path = f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list"
+        if os.path.exists(siblings_path):
+            with open(siblings_path) as f:
+                core_id = min(parse_cpu_list(f.read()))
+        else:
+            core_id = cpu
+        physical_cores.setdefault(core_id, []).append(cpu)
+
+    return [sorted(core_cpus) for _, core_cpus in sorted(physical_cores.items())]
@@ -2,7 +2,7 @@ import os
 import platform
 from dataclasses import dataclass, field
 from logging import getLogger
-from typing import TYPE_CHECKING, Any, Dict, Type
+from typing import TYPE_CHECKING, Any, Dict, Optional, Type
 
 import hydra
 from hydra.core.config_store import ConfigStore
@@ -15,23 +15,37 @@ from .backends.openvino.config import OVConfig
 from .backends.pytorch.config import PyTorchConfig
 from .backends.text_generation_inference.config import TGIConfig
 from .benchmarks.inference.config import InferenceConfig
+from .benchmarks.load.config import LoadConfig
+from .benchmarks.profiling.config import ProfilingConfig
+from .benchmarks.startup.config import StartupConfig
 from .benchmarks.training.config import TrainingConfig
-from .env_utils import get_cpu, get_cpu_ram_mb, get_gpus
+from .env_utils import get_cpu_affinity, get_host_fingerprint
 from .import_utils import (
     accelerate_version,
     diffusers_version,
     optimum_version,
     transformers_version,
 )
+from .isolation_utils import run_isolated
+from .result_cache import get_experiment_key, load_cached_results, save_results_to_cache
 from .task_utils import infer_task_from_model_name_or_path
+from .trackers.memory import MemoryTimelineTracker
+from .trackers.startup import StartupTracker, track_startup_phase
 
 if TYPE_CHECKING:
+    from pandas import DataFrame
+
     from .backends.base import Backend
     from .benchmarks.base import Benchmark
 
 LOGGER = getLogger("experiment")
 
-OmegaConf.register_new_resolver("infer_task", lambda model: infer_task_from_model_name_or_path(model))
+OmegaConf.register_new_resolver(
+    "infer_task",
+    lambda model, revision=None, force_download=False: infer_task_from_model_name_or_path(
+        model, revision=revision, refresh=force_download
+    ),
+)
 
 
 @dataclass
@@ -49,7 +63,20 @@ class ExperimentConfig:
     # Device name or path (cpu, cuda, cuda:0, ...)
     device: str
     # Task name (text-classification, image-classification, ...)
-    task: str = "${infer_task:${model}}"
+    task: str = "${infer_task:${model}, ${hub_kwargs.revision}, ${hub_kwargs.force_download}}"
+
+    # ISOLATION CONFIGURATION
+    # Run the experiment (loading, benchmarking, saving) in a freshly spawned process
+    isolation: bool = False
+    # Kill the isolated process after this many seconds or once its RSS exceeds this many MB
+    isolation_timeout: Optional[int] = None
+    isolation_max_memory: Optional[int] = None
+
+    # RESULT CACHE CONFIGURATION
+    # Reuse the results of an identical experiment (same resolved config and environment) when available
+    cache_results: bool = False
+    # Rerun the experiment even if its results are cached, and overwrite them
+    force: bool = False
 
     # ADDITIONAL MODEL CONFIGURATION: Model revision, use_auth_token, trust_remote_code
     hub_kwargs: Dict = field(
@@ -63,6 +90,7 @@ class ExperimentConfig:
 
     # ENVIRONMENT CONFIGURATION
     # TODO: add gpu info when available
+    # the host's hardware is probed once per boot, see `get_host_fingerprint`
     environment: Dict = field(
         default_factory=lambda: {
             "optimum_version": optimum_version(),
@@ -71,10 +99,11 @@ class ExperimentConfig:
             "diffusers_version": diffusers_version(),
             "python_version": platform.python_version(),
             "system": platform.system(),
-            "cpu": get_cpu(),
-            "cpu_count": os.cpu_count(),
-            "cpu_ram_mb": get_cpu_ram_mb(),
-            "gpus": get_gpus(),
+            "cpu": get_host_fingerprint()["cpu"],
+            "cpu_count": get_host_fingerprint()["cpu_count"],
+            "cpu_affinity": get_cpu_affinity(),
+            "cpu_ram_mb": get_host_fingerprint()["cpu_ram_mb"],
+            "gpus": get_host_fingerprint()["gpus"],
         }
     )
 
@@ -110,50 +139,111 @@ cs.store(group="backend", name="neural_compressor", node=INCConfig)
 cs.store(group="backend", name="text-generation-inference", node=TGIConfig)
 cs.store(group="benchmark", name="inference", node=InferenceConfig)
 cs.store(group="benchmark", name="training", node=TrainingConfig)
+cs.store(group="benchmark", name="load", node=LoadConfig)
+cs.store(group="benchmark", name="profiling", node=ProfilingConfig)
+cs.store(group="benchmark", name="startup", node=StartupConfig)
 
 
 @hydra.main(version_base=None)
-def run_experiment(experiment: DictConfig) -> None:
+def run_experiment(experiment: DictConfig) -> "DataFrame":
     # This is required to trigger __post_init__. Reference: https://github.com/omry/omegaconf/issues/377
     experiment: ExperimentConfig = OmegaConf.to_object(experiment)
 
     # Save the config
     OmegaConf.save(experiment, "hydra_config.yaml", resolve=True)
 
-    # Allocate requested backend
-    backend_factory: Type["Backend"] = get_class(experiment.backend._target_)
-    backend: "Backend" = backend_factory(
-        task=experiment.task,
-        model=experiment.model,
-        device=experiment.device,
-        hub_kwargs=experiment.hub_kwargs,
-    )
-    try:
-        # Configure the backend
-        backend.configure(experiment.backend)
-    except Exception as e:
-        LOGGER.error("Error during backend configuration: %s", e)
-        backend.clean()
-        raise e
-
-    # Allocate requested benchmark
-    benchmark_factory: Type["Benchmark"] = get_class(experiment.benchmark._target_)
-    benchmark: "Benchmark" = benchmark_factory()
-    try:
-        benchmark.configure(experiment.benchmark)
-    except Exception as e:
-        LOGGER.error("Error during benchmark configuration: %s", e)
-        backend.clean()
-        raise e
+    if experiment.cache_results:
+        experiment_key = get_experiment_key(experiment)
+        results_file = f"{experiment.benchmark.name}_results.csv"
+        if not experiment.force:
+            results_df = load_cached_results(experiment_key, results_file)
+            if results_df is not None:
+                return results_df
+
+    if experiment.isolation:
+        results_df = run_isolated(
+            run,
+            args=(experiment,),
+            timeout=experiment.isolation_timeout,
+            max_memory=experiment.isolation_max_memory,
+        )
+    else:
+        results_df = run(experiment)
+
+    if experiment.cache_results:
+        save_results_to_cache(experiment_key, experiment, results_file)
+
+    return results_df
+
+
+def run(experiment: ExperimentConfig) -> "DataFrame":
+    # Start the memory timeline before the model is loaded
+    memory_timeline_tracker = None
+    if experiment.benchmark.memory_timeline:
+        memory_timeline_tracker = MemoryTimelineTracker(interval=experiment.benchmark.memory_timeline_interval)
+        memory_timeline_tracker.start()
+        memory_timeline_tracker.set_phase("load")
+
+    # Start timing the cold start phases before anything is loaded
+    startup_tracker = None
+    if experiment.benchmark.name == "startup":
+        startup_tracker = StartupTracker(interval=experiment.benchmark.interval)
+        startup_tracker.start()
 
     try:
-        # Run the benchmark
-        benchmark.run(backend)
-        # Save the benchmark results
-        benchmark.save()
-        # Clean up the backend
-        backend.clean()
-    except Exception as e:
-        LOGGER.error("Error during benchmark execution: %s", e)
-        backend.clean()
-        raise e
+        # Allocate requested backend
+        backend_factory: Type["Backend"] = get_class(experiment.backend._target_)
+        with track_startup_phase("init"):
+            backend: "Backend" = backend_factory(
+                task=experiment.task,
+                model=experiment.model,
+                device=experiment.device,
+                hub_kwargs=experiment.hub_kwargs,
+            )
+        try:
+            # Configure the backend
+            with track_startup_phase("configure"):
+                backend.configure(experiment.backend)
+        except Exception as e:
+            LOGGER.error("Error during backend configuration: %s", e)
+            backend.clean()
+            raise e
+
+        # Allocate requested benchmark
+        benchmark_factory: Type["Benchmark"] = get_class(experiment.benchmark._target_)
+        benchmark: "Benchmark" = benchmark_factory()
+        benchmark.memory_timeline_tracker = memory_timeline_tracker
+        benchmark.startup_tracker = startup_tracker
+        try:
+            benchmark.configure(experiment.benchmark)
+        except Exception as e:
+            LOGGER.error("Error during benchmark configuration: %s", e)
+            backend.clean()
+            raise e
+
+        try:
+            # Run the benchmark
+            benchmark.run(backend)
+            if startup_tracker is not None:
+                startup_tracker.stop()
+            # Save the benchmark results
+            benchmark.save()
+            # Clean up the backend
+            benchmark.set_phase("clean")
+            backend.clean()
+            # Save the memory timeline
+            if memory_timeline_tracker is not None:
+                memory_timeline_tracker.stop()
+                memory_timeline_tracker.save("memory_timeline.csv")
+        except Exception as e:
+            LOGGER.error("Error during benchmark execution: %s", e)
+            backend.clean()
+            raise e
+    finally:
+        # Clear the global startup tracker and stop the sampling threads, even if the benchmark failed
+        if startup_tracker is not None:
+            startup_tracker.stop()
+        if memory_timeline_tracker is not None:
+            memory_timeline_tracker.stop()
+
+    return benchmark.get_results_df()
@@ -1,6 +1,11 @@
+import hashlib
+import json
+import os
 from logging import getLogger
-from typing import Dict
+from typing import Any, Dict
 
+import numpy as np
+import pyarrow as pa
 from datasets import Dataset
 
 from optimum_benchmark.generators.task_generator import (
@@ -10,18 +15,57 @@ from optimum_benchmark.generators.task_generator import (
 
 LOGGER = getLogger("dataset_generator")
 
+DATASET_CACHE_DIR = os.environ.get(
+    "OPTIMUM_BENCHMARK_DATASET_CACHE",
+    os.path.join(os.path.expanduser("~/.cache"), "optimum-benchmark", "datasets"),
+)
+# the dataset is generated and written in chunks of about this size, so memory stays flat whatever its size
+CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def to_arrow_array(value: Any) -> pa.Array:
+    if isinstance(value, np.ndarray):
+        # nested lists over the array's flat buffer, without going through python objects
+        array = pa.array(np.ascontiguousarray(value).reshape(-1))
+        for size in reversed(value.shape[1:]):
+            offsets = np.arange(0, len(array) + 1, size, dtype=np.int32)
+            array = pa.ListArray.from_arrays(pa.array(offsets), array)
+        return array
+
+    # e.g. the object detection labels, a list of dicts of arrays
+    return pa.array(to_python_objects(value))
+
+
+def to_python_objects(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, dict):
+        return {key: to_python_objects(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [to_python_objects(item) for item in value]
+    return value
+
 
 class DatasetGenerator:
     task_generator: TaskGenerator
 
-    def __init__(self, task: str, dataset_shapes: Dict[str, int]):
+    def __init__(self, task: str, dataset_shapes: Dict[str, int], seed: int):
         dataset_shapes["batch_size"] = dataset_shapes.pop("dataset_size")
+        self.dataset_size = dataset_shapes["batch_size"]
+
+        # the content of the dataset only depends on these, so it's reused across runs
+        self.dataset_key = hashlib.sha256(
+            json.dumps(
+                {"task": task, "dataset_shapes": dataset_shapes, "seed": seed}, sort_keys=True, default=str
+            ).encode()
+        ).hexdigest()[:16]
 
         if task in TASKS_TO_GENERATORS:
             LOGGER.info(f"Using {task} task generator")
             self.task_generator = TASKS_TO_GENERATORS[task](
                 shapes=dataset_shapes,
                 with_labels=True,
+                seed=seed,
             )
         else:
             raise NotImplementedError(
@@ -31,9 +75,52 @@ class DatasetGenerator:
                 "please submit a PR or a feature request to optimum-benchmark. \n"
             )
 
+    @property
+    def dataset_path(self) -> str:
+        return os.path.join(DATASET_CACHE_DIR, f"{self.dataset_key}.arrow")
+
+    def get_chunk_size(self) -> int:
+        # the number of samples of a chunk, estimated from the size of a single sample
+        probe_generator = type(self.task_generator)(
+            shapes={**self.task_generator.shapes, "batch_size": 1}, with_labels=True, seed=0
+        )
+        sample_bytes = sum(
+            value.nbytes if isinstance(value, np.ndarray) else 0 for value in probe_generator.generate().values()
+        )
+        return max(1, CHUNK_BYTES // max(1, sample_bytes))
+
+    def write(self) -> None:
+        chunk_size = self.get_chunk_size()
+        LOGGER.info(f"\t+ Writing {self.dataset_size} samples to {self.dataset_path} in chunks of {chunk_size}")
+
+        os.makedirs(DATASET_CACHE_DIR, exist_ok=True)
+        # written to a temporary file first so that concurrent runs never read a partial dataset
+        tmp_path = f"{self.dataset_path}.{os.getpid()}.tmp"
+        try:
+            writer = None
+            with pa.OSFile(tmp_path, "wb") as sink:
+                for start in range(0, self.dataset_size, chunk_size):
+                    self.task_generator.shapes["batch_size"] = min(chunk_size, self.dataset_size - start)
+                    chunk = {key: to_arrow_array(value) for key, value in self.task_generator.generate().items()}
+                    record_batch = pa.RecordBatch.from_arrays(list(chunk.values()), names=list(chunk.keys()))
+                    if writer is None:
+                        # the same stream format as the arrow files of datasets
+                        writer = pa.ipc.new_stream(sink, record_batch.schema)
+                    writer.write_batch(record_batch)
+                writer.close()
+            os.replace(tmp_path, self.dataset_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
     def generate(self) -> Dataset:
-        task_dataset = self.task_generator.generate()
-        task_dataset = Dataset.from_dict(task_dataset)
+        if os.path.exists(self.dataset_path):
+            LOGGER.info(f"\t+ Loading the cached dataset {self.dataset_path}")
+        else:
+            self.write()
+
+        # memory-mapped, only the accessed samples are read from disk
+        task_dataset = Dataset.from_file(self.dataset_path)
         task_dataset.set_format(
             type="torch",  # for now we're using pytorch tensors
             columns=list(task_dataset.features.keys()),
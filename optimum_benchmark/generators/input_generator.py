@@ -4,7 +4,10 @@ from typing import TYPE_CHECKING, Any, Dict, Optional
 if TYPE_CHECKING:
     from transformers import PretrainedConfig
 
-from ..generators.model_type_generator import SUPPURTED_MODEL_TYPES, ModelTypeGenerator
+from ..generators.model_type_generator import (
+    ModelTypeGenerator,
+    get_supported_model_types,
+)
 from ..generators.task_generator import TASKS_TO_GENERATORS, TaskGenerator
 
 LOGGER = getLogger("input_generator")
@@ -22,7 +25,7 @@ class InputGenerator:
     ):
         model_type = pretrained_config.model_type if pretrained_config is not None else task
 
-        if model_type in SUPPURTED_MODEL_TYPES:
+        if model_type in get_supported_model_types():
             self.used_generator = "model_type"
             LOGGER.info(f"Using {model_type} model type generator")
             self.model_type_generator = ModelTypeGenerator(
@@ -44,13 +47,12 @@ class InputGenerator:
                 f"Available tasks: {list(TASKS_TO_GENERATORS.keys())}. "
                 "If you want to add support for this task, "
                 "please submit a PR or a feature request to optimum-benchmark. "
-                f"Available model types: {SUPPURTED_MODEL_TYPES}. "
+                f"Available model types: {get_supported_model_types()}. "
                 "If you want to add support for this model type, "
                 "please submit a PR or a feature request to optimum."
             )
 
-    # TODO: we can drop the torch dependency here by returning a dict of numpy arrays
-    # and then converting them to torch tensors in backend.prepare_for_inference
+    # returns numpy arrays, backend.prepare_input converts them to the inputs of its runtime without copying
     def generate(self, mode: str) -> Dict[str, Any]:
         if self.used_generator == "model_type":
             dummy_input = self.model_type_generator.generate()
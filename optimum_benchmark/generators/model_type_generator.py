@@ -1,8 +1,8 @@
+from functools import lru_cache
 from logging import getLogger
 from typing import Dict, List
 
-import torch
-from optimum.exporters.tasks import TasksManager
+import numpy as np
 from transformers import PretrainedConfig
 
 from ..import_utils import is_onnx_available
@@ -10,9 +10,17 @@ from ..import_utils import is_onnx_available
 LOGGER = getLogger("model_type_generator")
 
 EXPORTER = "onnx"  # used for its configs as input generators
-SUPPURTED_MODEL_TYPES: List[str] = (
-    list(TasksManager._SUPPORTED_MODEL_TYPE.keys()) if is_onnx_available() else []
-)  # should be empty if onnx is not available
+
+
+@lru_cache(maxsize=None)
+def get_supported_model_types() -> List[str]:
+    # importing optimum's exporters builds all of their tasks tables, so it's deferred until an input is generated
+    if not is_onnx_available():
+        return []  # should be empty if onnx is not available
+
+    from optimum.exporters.tasks import TasksManager
+
+    return list(TasksManager._SUPPORTED_MODEL_TYPE.keys())
 
 
 class ModelTypeGenerator:
@@ -27,6 +35,8 @@ class ModelTypeGenerator:
         shapes: Dict[str, int],
         pretrained_config: PretrainedConfig,
     ):
+        from optimum.exporters.tasks import TasksManager
+
         self.shapes = shapes
 
         self.onnx_config = TasksManager.get_exporter_config_constructor(
@@ -35,10 +45,10 @@ class ModelTypeGenerator:
             model_type=model_type,
         )(pretrained_config)
 
-    def generate(self) -> Dict[str, int]:
-        dummy_input = self.onnx_config.generate_dummy_inputs(framework="pt", **self.shapes)
+    def generate(self) -> Dict[str, np.ndarray]:
+        dummy_input = self.onnx_config.generate_dummy_inputs(framework="np", **self.shapes)
 
         if "attention_mask" in dummy_input:
-            dummy_input["attention_mask"] = torch.ones_like(dummy_input["attention_mask"])
+            dummy_input["attention_mask"] = np.ones_like(dummy_input["attention_mask"])
 
         return dummy_input
@@ -1,24 +1,25 @@
 from abc import ABC
 from logging import getLogger
-from typing import Tuple
+from typing import Optional, Tuple
 
-import torch
+import numpy as np
 
 LOGGER = getLogger("task_generator")
 
 
 class TaskGenerator(ABC):
-    def __init__(self, shapes, with_labels: bool):
+    def __init__(self, shapes, with_labels: bool, seed: Optional[int] = None):
         self.shapes = shapes
         self.with_labels = with_labels
+        # numpy's global random state, which is seeded by the backend, unless a seed is given
+        self.random_state = np.random.RandomState(seed) if seed is not None else np.random
 
-    @staticmethod
-    def generate_random_integers(min_value: int, max_value: int, shape: Tuple[int]):
-        return torch.randint(min_value, max_value, shape)
+    # numpy arrays (with torch's default dtypes) that backends can wrap without copying
+    def generate_random_integers(self, min_value: int, max_value: int, shape: Tuple[int]):
+        return self.random_state.randint(min_value, max_value, size=shape, dtype=np.int64)
 
-    @staticmethod
-    def generate_random_floats(min_value: float, max_value: float, shape: Tuple[int]):
-        return torch.rand(shape) * (max_value - min_value) + min_value
+    def generate_random_floats(self, min_value: float, max_value: float, shape: Tuple[int]):
+        return (self.random_state.random_sample(shape) * (max_value - min_value) + min_value).astype(np.float32)
 
     def generate(self):
         raise NotImplementedError("Generator must implement generate method")
@@ -8,7 +8,6 @@ _optimum_available = importlib.util.find_spec("optimum") is not None
 _torch_available = importlib.util.find_spec("torch") is not None
 _onnx_available = importlib.util.find_spec("onnx") is not None
 _py3nvml_available = importlib.util.find_spec("py3nvml") is not None
-_torch_distributed_available = importlib.util.find_spec("torch.distributed")
 _onnxruntime_available = importlib.util.find_spec("onnxruntime") is not None
 _openvino_available = importlib.util.find_spec("openvino") is not None
 _neural_compressor_available = importlib.util.find_spec("neural_compressor") is not None
@@ -35,7 +34,8 @@ def is_torch_available():
 
 
 def is_torch_distributed_available():
-    return _torch_distributed_available
+    # looking up a submodule imports its parent, so torch is only imported when this is actually needed
+    return _torch_available and importlib.util.find_spec("torch.distributed") is not None
 
 
 def torch_version():
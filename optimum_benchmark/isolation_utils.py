@@ -0,0 +1,162 @@
+import json
+import logging
+import multiprocessing
+import sys
+import time
+import traceback
+from logging import getLogger
+from logging.handlers import QueueHandler
+from multiprocessing.connection import Connection
+from typing import Any, Callable, List, Optional
+
+import psutil
+
+from .env_utils import bytes_to_mega_bytes
+
+LOGGER = getLogger("isolation")
+
+# how often the parent checks the child's messages, runtime and memory
+POLLING_INTERVAL = 0.1
+
+
+class ConnectionQueue:
+    # the minimal queue interface QueueHandler needs, on top of a pipe
+    def __init__(self, connection: Connection):
+        self.connection = connection
+
+    def put_nowait(self, record: logging.LogRecord) -> None:
+        self.connection.send(("log", record))
+
+
+def isolated_worker(connection: Connection, target: Callable, args: tuple, log_level: int) -> None:
+    # a spawned process starts without any logging configuration, its records are handled by the parent
+    root_logger = logging.getLogger()
+    root_logger.handlers = [QueueHandler(ConnectionQueue(connection))]
+    root_logger.setLevel(log_level)
+
+    try:
+        result = target(*args)
+        connection.send(("result", result))
+    except Exception:
+        # the traceback is logged by the parent
+        connection.send(("error", traceback.format_exc()))
+        sys.exit(1)
+    finally:
+        connection.close()
+
+
+def get_process_tree_memory(process: psutil.Process) -> int:
+    # includes the processes spawned by the child, e.g. ddp workers
+    memory = 0
+    for p in get_process_tree(process):
+        try:
+            memory += p.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return memory
+
+
+def kill_process_tree(process: psutil.Process) -> None:
+    for p in reversed(get_process_tree(process)):
+        try:
+            p.kill()
+        except psutil.NoSuchProcess:
+            pass
+
+
+def get_process_tree(process: psutil.Process) -> List[psutil.Process]:
+    try:
+        return [process, *process.children(recursive=True)]
+    except psutil.NoSuchProcess:
+        return []
+
+
+def run_isolated(
+    target: Callable,
+    args: tuple = (),
+    timeout: Optional[float] = None,
+    max_memory: Optional[int] = None,
+    report_file: str = "isolation_report.json",
+) -> Any:
+    """
+    Runs `target(*args)` in a freshly spawned process, so that no allocator state, thread pool or leaked tensor
+    is shared with the previous or the next experiment. The child's logs and result are sent over a pipe,
+    the parent kills it when it exceeds `timeout` (s) or `max_memory` (MB of RSS) and records its exit cause.
+    """
+    context = multiprocessing.get_context("spawn")
+    parent_connection, child_connection = context.Pipe(duplex=False)
+    process = context.Process(
+        target=isolated_worker,
+        args=(child_connection, target, args, logging.getLogger().getEffectiveLevel()),
+        daemon=False,
+    )
+
+    LOGGER.info("Running experiment in an isolated process")
+    start = time.perf_counter()
+    process.start()
+    child_connection.close()
+    child = psutil.Process(process.pid)
+
+    result, error, exit_cause = None, None, None
+    peak_memory = 0
+    while True:
+        # the pipe is also readable once the child closed it, which ends the loop with an EOFError
+        if parent_connection.poll(POLLING_INTERVAL):
+            try:
+                kind, payload = parent_connection.recv()
+            except EOFError:
+                break
+            if kind == "log":
+                logging.getLogger(payload.name).handle(payload)
+            elif kind == "result":
+                result = payload
+            elif kind == "error":
+                error = payload
+        elif not process.is_alive():
+            break
+
+        runtime = time.perf_counter() - start
+        if timeout is not None and runtime > timeout:
+            LOGGER.error(f"Isolated process exceeded the timeout of {timeout} (s), killing it")
+            kill_process_tree(child)
+            exit_cause = "timeout"
+            break
+
+        memory = get_process_tree_memory(child)
+        peak_memory = max(peak_memory, memory)
+        if max_memory is not None and bytes_to_mega_bytes(memory) > max_memory:
+            LOGGER.error(f"Isolated process exceeded the memory limit of {max_memory} (MB), killing it")
+            kill_process_tree(child)
+            exit_cause = "memory_limit"
+            break
+
+    process.join()
+    runtime = time.perf_counter() - start
+
+    if exit_cause is None:
+        if process.exitcode == 0:
+            exit_cause = "success"
+        elif error is not None:
+            exit_cause = "error"
+        elif process.exitcode < 0:
+            # e.g. SIGKILL from the kernel's out of memory killer
+            exit_cause = f"signal_{-process.exitcode}"
+        else:
+            exit_cause = f"exit_code_{process.exitcode}"
+
+    with open(report_file, "w") as f:
+        json.dump(
+            {
+                "exit_cause": exit_cause,
+                "exit_code": process.exitcode,
+                "runtime(s)": runtime,
+                "peak_memory(MB)": bytes_to_mega_bytes(peak_memory),
+            },
+            f,
+            indent=4,
+        )
+
+    if exit_cause != "success":
+        raise RuntimeError(f"Isolated experiment failed with exit cause: {exit_cause}\n{error or ''}")
+
+    return result
@@ -0,0 +1,186 @@
+import json
+import os
+import re
+import shutil
+import time
+from logging import getLogger
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    from transformers import PretrainedConfig
+
+    from .backends.utils import PreTrainedProcessor
+
+LOGGER = getLogger("metadata_cache")
+
+METADATA_CACHE_DIR = os.environ.get(
+    "OPTIMUM_BENCHMARK_METADATA_CACHE",
+    os.path.join(os.path.expanduser("~/.cache"), "optimum-benchmark", "metadata"),
+)
+# the metadata of a branch or tag (e.g. main) is fetched again once it's older than this many seconds
+METADATA_CACHE_TTL = int(os.environ.get("OPTIMUM_BENCHMARK_METADATA_CACHE_TTL", 24 * 60 * 60))
+METADATA_FILE = "metadata.json"
+CONFIG_DIR = "config"
+PROCESSOR_DIR = "processor"
+
+COMMIT_PATTERN = re.compile(r"[0-9a-f]{40}")
+
+
+def is_local_model(model: str) -> bool:
+    return os.path.isdir(model)
+
+
+def get_entry_dir(model: str, revision: Optional[str]) -> Path:
+    # same naming as the hub's cache, e.g. models--google--vit-base-patch16-224/main
+    return Path(METADATA_CACHE_DIR) / ("models--" + model.replace("/", "--")) / (revision or "main").replace("/", "--")
+
+
+def read_metadata(entry_dir: Path) -> Dict[str, Any]:
+    if not (entry_dir / METADATA_FILE).exists():
+        return {}
+
+    try:
+        with open(entry_dir / METADATA_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        LOGGER.warning(f"\t+ Could not read the cached metadata {entry_dir / METADATA_FILE}: {e}")
+        return {}
+
+
+def is_expired(metadata: Dict[str, Any], name: str, revision: Optional[str]) -> bool:
+    # a commit's metadata never changes, while a branch or tag may be moved to another commit
+    if revision is not None and COMMIT_PATTERN.fullmatch(revision):
+        return False
+
+    return time.time() - metadata.get("fetched_at", {}).get(name, 0) > METADATA_CACHE_TTL
+
+
+def update_metadata(entry_dir: Path, fetched: Optional[str] = None, **metadata: Any) -> None:
+    try:
+        entry_dir.mkdir(parents=True, exist_ok=True)
+        cached_metadata = read_metadata(entry_dir)
+        fetched_at = cached_metadata.get("fetched_at", {})
+        if fetched is not None:
+            fetched_at = {**fetched_at, fetched: time.time()}
+        metadata = {**cached_metadata, **metadata, "fetched_at": fetched_at, "updated_at": time.time()}
+        # written to a temporary file first so that concurrent experiments never read a partial file
+        tmp_path = entry_dir / f"{METADATA_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(metadata, f, indent=4)
+        os.replace(tmp_path, entry_dir / METADATA_FILE)
+    except OSError as e:
+        LOGGER.warning(f"\t+ Could not cache the metadata in {entry_dir}: {e}")
+
+
+def get_cached_metadata(
+    model: str, revision: Optional[str], name: str, fetch: Callable[[], Any], refresh: bool = False
+) -> Any:
+    """
+    Returns the `name` metadata (task, commit, ...) of a revision of a hub model from the cache, or fetches and caches
+    it on a miss. Local models aren't cached, the metadata of a branch expires after `METADATA_CACHE_TTL` seconds, and
+    `refresh` fetches the metadata again even when it's cached.
+    """
+    if is_local_model(model):
+        return fetch()
+
+    entry_dir = get_entry_dir(model, revision)
+    metadata = read_metadata(entry_dir)
+    if name in metadata and not refresh and not is_expired(metadata, name, revision):
+        return metadata[name]
+
+    value = fetch()
+    update_metadata(entry_dir, fetched=name, model=model, revision=revision, **{name: value})
+
+    return value
+
+
+def load_pretrained(auto_class: Any, model: str, hub_kwargs: Dict[str, Any], name: str) -> Any:
+    """
+    Loads a pretrained artifact (config, processor) of a hub model from its copy in the cache, or from the hub and
+    saves a copy of it in the cache. The copy expires like the other metadata, and `hub_kwargs.force_download`
+    refreshes it.
+    """
+    if is_local_model(model):
+        return auto_class.from_pretrained(model, **hub_kwargs)
+
+    entry_dir = get_entry_dir(model, hub_kwargs.get("revision"))
+    cached_dir = entry_dir / name
+    if (
+        cached_dir.exists()
+        and not hub_kwargs.get("force_download", False)
+        and not is_expired(read_metadata(entry_dir), name, hub_kwargs.get("revision"))
+    ):
+        try:
+            pretrained = auto_class.from_pretrained(
+                cached_dir, trust_remote_code=hub_kwargs.get("trust_remote_code", False)
+            )
+            LOGGER.info(f"\t+ Loaded the {name} of {model} from the metadata cache")
+            return pretrained
+        except Exception as e:
+            LOGGER.warning(f"\t+ Could not load the cached {name} of {model}, fetching it instead: {e}")
+
+    pretrained = auto_class.from_pretrained(model, **hub_kwargs)
+
+    try:
+        entry_dir.mkdir(parents=True, exist_ok=True)
+        tmp_dir = entry_dir / f".{name}.{os.getpid()}.tmp"
+        pretrained.save_pretrained(tmp_dir)
+        shutil.rmtree(cached_dir, ignore_errors=True)
+        os.replace(tmp_dir, cached_dir)
+        update_metadata(entry_dir, fetched=name, model=model, revision=hub_kwargs.get("revision"))
+    except OSError as e:
+        LOGGER.warning(f"\t+ Could not cache the {name} of {model}: {e}")
+
+    return pretrained
+
+
+def load_pretrained_config(model: str, hub_kwargs: Dict[str, Any]) -> "PretrainedConfig":
+    from transformers import AutoConfig
+
+    pretrained_config = load_pretrained(AutoConfig, model, hub_kwargs, CONFIG_DIR)
+    # not the cache directory it might have been loaded from
+    pretrained_config.name_or_path = model
+
+    return pretrained_config
+
+
+def load_pretrained_processor(model: str, hub_kwargs: Dict[str, Any]) -> Optional["PreTrainedProcessor"]:
+    """
+    Returns the model's processor, or None if it doesn't have one, which is cached as well.
+    """
+    from transformers import AutoProcessor
+
+    if is_local_model(model):
+        try:
+            return AutoProcessor.from_pretrained(model, **hub_kwargs)
+        except ValueError:
+            return None
+
+    entry_dir = get_entry_dir(model, hub_kwargs.get("revision"))
+    metadata = read_metadata(entry_dir)
+    if (
+        metadata.get("has_processor") is False
+        and not hub_kwargs.get("force_download", False)
+        and not is_expired(metadata, "has_processor", hub_kwargs.get("revision"))
+    ):
+        return None
+
+    try:
+        pretrained_processor = load_pretrained(AutoProcessor, model, hub_kwargs, PROCESSOR_DIR)
+    except ValueError:
+        # sometimes the processor is not available or can't be determined/detected
+        pretrained_processor = None
+
+    has_processor = pretrained_processor is not None
+    expired = is_expired(metadata, "has_processor", hub_kwargs.get("revision"))
+    if metadata.get("has_processor") is not has_processor or expired:
+        update_metadata(
+            entry_dir,
+            fetched="has_processor",
+            model=model,
+            revision=hub_kwargs.get("revision"),
+            has_processor=has_processor,
+        )
+
+    return pretrained_processor
@@ -14,8 +14,10 @@ class FXProfilingWrapper(Interpreter):
     def __init__(self, module: GraphModule):
         super().__init__(module)
         self.profiling_records: List[Tuple[str, str, float]] = []
+        self.run_profiling_records: List[List[Tuple[str, str, float]]] = []
 
     def run(self, *args) -> Any:
+        self.run_profiling_records.append([])
         return super().run(*args)
 
     def run_node(self, node: Node) -> Any:
@@ -34,13 +36,27 @@ class FXProfilingWrapper(Interpreter):
             node_runtime = (end - start) / 1e9
 
         LOGGER.debug(f"Node {node.name} took {node_runtime:.2e} seconds")
-        self.profiling_records.append((node.name, node.op, node_runtime))
+        record = (node.name, self.get_op_type(node), node_runtime)
+        self.profiling_records.append(record)
+        self.run_profiling_records[-1].append(record)
 
         return return_val
 
     def __call__(self, **kwargs) -> Any:
         args = kwargs.values()
-        return super().run(*args)
+        return self.run(*args)
+
+    def get_op_type(self, node: Node) -> str:
+        # the module class or the function name is more telling than the node's opcode
+        if node.op == "call_module":
+            return type(self.module.get_submodule(node.target)).__name__
+        elif node.op in ["call_function", "call_method"]:
+            return getattr(node.target, "__name__", str(node.target))
+        else:
+            return node.op
 
     def get_profiling_records(self) -> List[Tuple[str, str, float]]:
         return self.profiling_records
+
+    def get_run_profiling_records(self) -> List[List[Tuple[str, str, float]]]:
+        return self.run_profiling_records
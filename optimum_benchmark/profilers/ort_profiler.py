@@ -1,6 +1,7 @@
 import json
+from bisect import bisect_right
 from logging import getLogger
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 import pandas as pd
 from optimum.onnxruntime import ORTModel
@@ -12,20 +13,30 @@ class ORTProfilingWrapper:
     def __init__(self, module: ORTModel):
         self.module = module
         self.profiling_records: List[Tuple[str, str, float]] = []
+        self.profiling_json: Optional[str] = None
 
     def __call__(self, *args, **kwargs):
         return self.module(*args, **kwargs)
 
-    def get_profiling_records(self) -> List[Tuple[str, str, float]]:
-        profiling_json = self.module.model.end_profiling()  # type: ignore
-        with open(profiling_json) as file_obj:
+    def load_profiling_data(self) -> List[dict]:
+        # profiling can only be ended once per session
+        if self.profiling_json is None:
+            self.profiling_json = self.module.model.end_profiling()  # type: ignore
+
+        with open(self.profiling_json) as file_obj:
             profiling_data = json.load(file_obj)
             if isinstance(profiling_data, dict):
                 profiling_data = profiling_data["traceEvents"]
 
-        profiling_records = extract_last_run_records(profiling_data)
+        return profiling_data
+
+    def get_profiling_records(self) -> List[Tuple[str, str, float]]:
+        profiling_records = extract_last_run_records(self.load_profiling_data())
         return normalize_records(profiling_records)
 
+    def get_run_profiling_records(self) -> List[List[Tuple[str, str, float]]]:
+        return [normalize_records(run_records) for run_records in split_run_records(self.load_profiling_data())]
+
 
 def normalize_records(data) -> List[Tuple[str, str, float]]:
     records = []
@@ -62,3 +73,16 @@ def extract_last_run_records(data):
         .reset_index()
         .to_dict(orient="records")
     )
+
+
+def split_run_records(data) -> List[List[dict]]:
+    # every session run is traced as a `model_run` event spanning the events of its nodes
+    run_starts = sorted(item["ts"] for item in data if item.get("cat") == "Session" and item["name"] == "model_run")
+    runs = [[] for _ in run_starts]
+    for item in data:
+        if item.get("cat") in ["Kernel", "Node"] and "ts" in item:
+            run_index = bisect_right(run_starts, item["ts"]) - 1
+            if run_index >= 0:
+                runs[run_index].append(item)
+
+    return runs
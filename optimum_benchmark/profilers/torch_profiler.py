@@ -0,0 +1,84 @@
+from contextlib import contextmanager
+from logging import getLogger
+from typing import Any, Dict
+
+import torch
+from pandas import DataFrame
+from torch.profiler import ProfilerActivity, profile, record_function, schedule
+
+LOGGER = getLogger("torch_profiler")
+
+
+class TorchProfiler:
+    """
+    Runs torch.profiler over the model's forward/generate calls, each call being one profiler step.
+    At the end of every active cycle, a Chrome trace (viewable in Perfetto or chrome://tracing)
+    and a key averages table sorted by `sort_by` are exported to the working directory.
+    """
+
+    def __init__(self, device: torch.device, config: Dict[str, Any]):
+        self.config = config
+
+        activities = [ProfilerActivity.CPU]
+        if device.type == "cuda":
+            activities.append(ProfilerActivity.CUDA)
+
+        self.profiler = profile(
+            activities=activities,
+            schedule=schedule(
+                wait=self.config["wait"],
+                warmup=self.config["warmup"],
+                active=self.config["active"],
+                repeat=self.config["repeat"],
+            ),
+            on_trace_ready=self.on_trace_ready,
+            record_shapes=self.config["record_shapes"],
+            profile_memory=self.config["profile_memory"],
+            with_stack=self.config["with_stack"],
+        )
+
+    def start(self) -> None:
+        LOGGER.warning("torch.profiler adds overhead to every profiled call, latencies will be affected")
+        self.profiler.start()
+
+    def stop(self) -> None:
+        self.profiler.stop()
+
+    @contextmanager
+    def step(self, name: str):
+        with record_function(name):
+            yield
+        self.profiler.step()
+
+    def on_trace_ready(self, profiler: profile) -> None:
+        trace_file = f"torch_profiler_trace_{profiler.step_num}.json"
+        LOGGER.info(f"Exporting torch.profiler trace to {trace_file}")
+        profiler.export_chrome_trace(trace_file)
+
+        key_averages = profiler.key_averages(group_by_input_shape=self.config["record_shapes"])
+        key_averages_file = f"torch_profiler_key_averages_{profiler.step_num}"
+        LOGGER.info(f"Exporting torch.profiler key averages to {key_averages_file}.txt/.csv")
+        with open(f"{key_averages_file}.txt", "w") as f:
+            f.write(key_averages.table(sort_by=self.config["sort_by"], row_limit=self.config["row_limit"]))
+        get_key_averages_df(key_averages, sort_by=self.config["sort_by"]).to_csv(f"{key_averages_file}.csv")
+
+
+def get_key_averages_df(key_averages, sort_by: str) -> DataFrame:
+    # times are in microseconds and memory usages in bytes, as reported by the profiler
+    rows = []
+    for event in key_averages:
+        rows.append(
+            {
+                "name": event.key,
+                "input_shapes": str(event.input_shapes) if event.input_shapes else None,
+                "count": event.count,
+                "self_cpu_time_total": event.self_cpu_time_total,
+                "cpu_time_total": event.cpu_time_total,
+                "self_cuda_time_total": event.self_cuda_time_total,
+                "cuda_time_total": event.cuda_time_total,
+                "self_cpu_memory_usage": event.self_cpu_memory_usage,
+                "self_cuda_memory_usage": event.self_cuda_memory_usage,
+            }
+        )
+
+    return DataFrame(rows).sort_values(sort_by, ascending=False, ignore_index=True)
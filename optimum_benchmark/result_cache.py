@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from argparse import ArgumentParser
+from logging import getLogger
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from omegaconf import OmegaConf
+
+from .env_utils import parse_cpu_list
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+    from .experiment import ExperimentConfig
+
+LOGGER = getLogger("result_cache")
+
+RESULT_CACHE_DIR = os.environ.get(
+    "OPTIMUM_BENCHMARK_CACHE", os.path.join(os.path.expanduser("~/.cache"), "optimum-benchmark", "results")
+)
+METADATA_FILE = "metadata.json"
+CONFIG_FILE = "experiment_config.yaml"
+
+# fields that don't change the results of an experiment
+COSMETIC_FIELDS = [
+    "experiment_name",
+    "cache_results",
+    "force",
+    "isolation",
+    "isolation_timeout",
+    "isolation_max_memory",
+    "hub_kwargs.cache_dir",
+    "hub_kwargs.force_download",
+    "hub_kwargs.local_files_only",
+    "backend.initial_isolation_check",
+    "backend.continous_isolation_check",
+    "backend.delete_cache",
+]
+# files of the run directory that aren't results
+NON_RESULT_FILES = ["hydra_config.yaml", "isolation_report.json"]
+NON_RESULT_SUFFIXES = [".log"]
+
+
+def get_environment_fingerprint(environment: Dict[str, Any]) -> Dict[str, Any]:
+    # experiments pinned to different but equally sized sets of cpus share their results
+    fingerprint = dict(environment)
+    if fingerprint.get("cpu_affinity") is not None:
+        fingerprint["cpu_affinity"] = len(parse_cpu_list(fingerprint["cpu_affinity"]))
+    return fingerprint
+
+
+def get_experiment_key(experiment: "ExperimentConfig") -> str:
+    config = OmegaConf.to_container(OmegaConf.structured(experiment), resolve=True)
+    for field in COSMETIC_FIELDS:
+        *parents, name = field.split(".")
+        node = config
+        for parent in parents:
+            node = node.get(parent, {})
+        node.pop(name, None)
+    config["environment"] = get_environment_fingerprint(config["environment"])
+
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def is_result_file(path: Path) -> bool:
+    return path.is_file() and path.name not in NON_RESULT_FILES and path.suffix not in NON_RESULT_SUFFIXES
+
+
+def load_cached_results(key: str, results_file: str) -> Optional["DataFrame"]:
+    """
+    Copies the cached result files of the experiment to the working directory and returns its results dataframe,
+    or None on a cache miss.
+    """
+    import pandas as pd
+
+    entry_dir = Path(RESULT_CACHE_DIR) / key
+    if not (entry_dir / METADATA_FILE).exists():
+        return None
+
+    LOGGER.info(f"Found cached results for experiment {key} in {entry_dir}")
+    for path in entry_dir.iterdir():
+        if path.name not in [METADATA_FILE, CONFIG_FILE]:
+            shutil.copy2(path, path.name)
+
+    return pd.read_csv(results_file, index_col=0)
+
+
+def save_results_to_cache(key: str, experiment: "ExperimentConfig", results_file: str) -> None:
+    entry_dir = Path(RESULT_CACHE_DIR) / key
+    # concurrent experiments may save the same entry, it's written elsewhere then moved in place at once
+    tmp_dir = Path(RESULT_CACHE_DIR) / f".{key}.{os.getpid()}.tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+
+    for path in Path.cwd().iterdir():
+        if is_result_file(path):
+            shutil.copy2(path, tmp_dir / path.name)
+    OmegaConf.save(experiment, tmp_dir / CONFIG_FILE, resolve=True)
+    with open(tmp_dir / METADATA_FILE, "w") as f:
+        json.dump(
+            {
+                "key": key,
+                "experiment_name": experiment.experiment_name,
+                "model": experiment.model,
+                "backend": experiment.backend.name,
+                "benchmark": experiment.benchmark.name,
+                "results_file": results_file,
+                "source_dir": os.getcwd(),
+                "created_at": time.time(),
+            },
+            f,
+            indent=4,
+        )
+
+    shutil.rmtree(entry_dir, ignore_errors=True)
+    try:
+        os.rename(tmp_dir, entry_dir)
+        LOGGER.info(f"Cached results of experiment {key} in {entry_dir}")
+    except OSError:
+        # another experiment with the same key was cached in the meantime
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def list_cache_entries() -> List[Dict[str, Any]]:
+    entries = []
+    if not os.path.isdir(RESULT_CACHE_DIR):
+        return entries
+
+    for entry_dir in Path(RESULT_CACHE_DIR).iterdir():
+        metadata_path = entry_dir / METADATA_FILE
+        if metadata_path.exists():
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+            metadata["size(MB)"] = sum(path.stat().st_size for path in entry_dir.iterdir()) / 1e6
+            entries.append(metadata)
+
+    return sorted(entries, key=lambda metadata: metadata["created_at"])
+
+
+def prune_cache_entries(older_than: Optional[float] = None, experiment_name: Optional[str] = None) -> int:
+    num_pruned = 0
+    for metadata in list_cache_entries():
+        if older_than is not None and time.time() - metadata["created_at"] < older_than * 24 * 3600:
+            continue
+        if experiment_name is not None and metadata["experiment_name"] != experiment_name:
+            continue
+        shutil.rmtree(Path(RESULT_CACHE_DIR) / metadata["key"], ignore_errors=True)
+        num_pruned += 1
+
+    return num_pruned
+
+
+def manage_cache():
+    parser = ArgumentParser(description=f"Manage the experiment result cache ({RESULT_CACHE_DIR}).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="List the cached experiments.")
+
+    inspect_parser = subparsers.add_parser("inspect", help="Show a cached experiment's config and results.")
+    inspect_parser.add_argument("key", type=str, help="The key of the cached experiment.")
+
+    prune_parser = subparsers.add_parser("prune", help="Delete cached experiments (all of them by default).")
+    prune_parser.add_argument(
+        "--older-than", type=float, required=False, help="Only delete experiments cached more than this many days ago."
+    )
+    prune_parser.add_argument(
+        "--experiment-name", type=str, required=False, help="Only delete experiments with this name."
+    )
+
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    if args.command == "list":
+        entries = list_cache_entries()
+        if len(entries) == 0:
+            print("The result cache is empty")
+            return
+        columns = ["key", "experiment_name", "model", "backend", "benchmark", "size(MB)"]
+        entries_df = pd.DataFrame(entries)
+        entries_df["created_at"] = pd.to_datetime(entries_df["created_at"], unit="s").dt.strftime("%Y-%m-%d %H:%M")
+        print(entries_df[columns + ["created_at"]].to_string(index=False))
+
+    elif args.command == "inspect":
+        entry_dir = Path(RESULT_CACHE_DIR) / args.key
+        if not (entry_dir / METADATA_FILE).exists():
+            raise ValueError(f"No cached experiment with key {args.key}")
+        with open(entry_dir / METADATA_FILE) as f:
+            metadata = json.load(f)
+        print((entry_dir / CONFIG_FILE).read_text())
+        print(pd.read_csv(entry_dir / metadata["results_file"], index_col=0).T.to_string(header=False))
+        print(f"\nFiles: {', '.join(sorted(path.name for path in entry_dir.iterdir()))}")
+
+    elif args.command == "prune":
+        num_pruned = prune_cache_entries(older_than=args.older_than, experiment_name=args.experiment_name)
+        print(f"Pruned {num_pruned} cached experiment(s)")
@@ -1,8 +1,11 @@
+import json
 import os
 from typing import Optional
 
 import huggingface_hub
 
+from .metadata_cache import get_cached_metadata
+
 # constants from https://github.com/huggingface/optimum/blob/main/optimum/exporters/tasks.py
 TASKS_TO_AUTOMODELS = {
     "conversational": ("AutoModelForCausalLM", "AutoModelForSeq2SeqLM"),
@@ -70,46 +73,111 @@ def map_from_synonym(task: str) -> str:
 
 # adapted from https://github.com/huggingface/optimum/blob/main/optimum/exporters/tasks.py without torch dependency
 def infer_task_from_model_name_or_path(
-    model_name_or_path: str, subfolder: str = "", revision: Optional[str] = None
+    model_name_or_path: str, subfolder: str = "", revision: Optional[str] = None, refresh: bool = False
 ) -> str:
-    inferred_task_name = None
     is_local = os.path.isdir(os.path.join(model_name_or_path, subfolder))
 
     if is_local:
-        # TODO: maybe implement that.
-        raise RuntimeError("Cannot infer the task from a local directory yet, please specify the task manually.")
+        return infer_task_from_local_directory(os.path.join(model_name_or_path, subfolder))
     else:
         if subfolder != "":
             raise RuntimeError(
                 "Cannot infer the task from a model repo with a subfolder yet, please specify the task manually."
             )
 
-        model_info = huggingface_hub.model_info(model_name_or_path, revision=revision)
-        if model_info.library_name == "diffusers":
-            # TODO : getattr(model_info, "model_index") defining auto_model_class_name currently set to None
-            for task in ("stable-diffusion-xl", "stable-diffusion"):
-                if task in model_info.tags:
-                    inferred_task_name = task
-                    break
+        # fetched from the hub once per revision, until it expires or is refreshed
+        return get_cached_metadata(
+            model_name_or_path,
+            revision,
+            "task",
+            lambda: infer_task_from_hub(model_name_or_path, revision),
+            refresh=refresh,
+        )
+
+
+def infer_task_from_hub(model_name_or_path: str, revision: Optional[str] = None) -> str:
+    inferred_task_name = None
+    auto_model_class_name = None
+
+    model_info = huggingface_hub.model_info(model_name_or_path, revision=revision)
+    if model_info.library_name == "diffusers":
+        # TODO : getattr(model_info, "model_index") defining auto_model_class_name currently set to None
+        for task in ("stable-diffusion-xl", "stable-diffusion"):
+            if task in model_info.tags:
+                inferred_task_name = task
+                break
+    else:
+        pipeline_tag = getattr(model_info, "pipeline_tag", None)
+        # conversational is not a supported task per se, just an alias that may map to
+        # text-generaton or text2text-generation
+        if pipeline_tag is not None and pipeline_tag != "conversational":
+            inferred_task_name = map_from_synonym(model_info.pipeline_tag)
         else:
-            pipeline_tag = getattr(model_info, "pipeline_tag", None)
-            # conversational is not a supported task per se, just an alias that may map to
-            # text-generaton or text2text-generation
-            if pipeline_tag is not None and pipeline_tag != "conversational":
-                inferred_task_name = map_from_synonym(model_info.pipeline_tag)
+            transformers_info = model_info.transformersInfo
+            if transformers_info is not None and transformers_info.get("pipeline_tag") is not None:
+                inferred_task_name = map_from_synonym(transformers_info["pipeline_tag"])
             else:
-                transformers_info = model_info.transformersInfo
-                if transformers_info is not None and transformers_info.get("pipeline_tag") is not None:
-                    inferred_task_name = map_from_synonym(transformers_info["pipeline_tag"])
-                else:
-                    # transformersInfo does not always have a pipeline_tag attribute
-                    auto_model_class_name = transformers_info["auto_model"]
-                    for task_name, class_name_for_task in TASKS_TO_AUTOMODELS.items():
-                        if class_name_for_task == auto_model_class_name:
-                            inferred_task_name = task_name
-                            break
+                # transformersInfo does not always have a pipeline_tag attribute
+                auto_model_class_name = transformers_info["auto_model"]
+                for task_name, class_name_for_task in TASKS_TO_AUTOMODELS.items():
+                    if class_name_for_task == auto_model_class_name:
+                        inferred_task_name = task_name
+                        break
 
     if inferred_task_name is None:
         raise KeyError(f"Could not find the proper task name for {auto_model_class_name}.")
 
     return inferred_task_name
+
+
+def infer_task_from_local_directory(model_dir: str) -> str:
+    # diffusers pipelines are described by their model_index.json, transformers models by their config.json
+    if os.path.isfile(os.path.join(model_dir, "model_index.json")):
+        with open(os.path.join(model_dir, "model_index.json")) as f:
+            pipeline_class_name = json.load(f).get("_class_name", "")
+
+        for task, prefix in (("stable-diffusion-xl", "StableDiffusionXL"), ("stable-diffusion", "StableDiffusion")):
+            if pipeline_class_name.startswith(prefix):
+                return task
+
+        raise KeyError(f"Could not find the proper task name for the pipeline {pipeline_class_name}.")
+
+    if not os.path.isfile(os.path.join(model_dir, "config.json")):
+        raise RuntimeError(
+            f"Cannot infer the task from {model_dir} which has no config.json, please specify the task manually."
+        )
+
+    with open(os.path.join(model_dir, "config.json")) as f:
+        architectures = json.load(f).get("architectures") or []
+
+    # the auto classes' mappings are plain dicts of class names, they don't import torch
+    from transformers.models.auto import modeling_auto
+
+    # generation tasks first, as some generic mappings also list generative classes,
+    # e.g. the masked lm mapping maps bart and mbart to their *ForConditionalGeneration classes
+    task_names = TEXT_GENERATION_TASKS + [task for task in TASKS_TO_AUTOMODELS if task not in TEXT_GENERATION_TASKS]
+
+    for architecture in architectures:
+        for task_name in task_names:
+            class_names_for_task = TASKS_TO_AUTOMODELS[task_name]
+            # conversational is just an alias of text-generation and text2text-generation
+            if task_name in DIFFUSION_TASKS or task_name == "conversational":
+                continue
+
+            if isinstance(class_names_for_task, str):
+                class_names_for_task = (class_names_for_task,)
+
+            for class_name_for_task in class_names_for_task:
+                auto_model_class = getattr(modeling_auto, class_name_for_task, None)
+                if auto_model_class is None:
+                    continue
+
+                # e.g. {"bert": "BertForSequenceClassification", ...}, some model types map to several classes
+                model_class_names = auto_model_class._model_mapping._model_mapping.values()
+                for model_class_name in model_class_names:
+                    if architecture == model_class_name or (
+                        isinstance(model_class_name, tuple) and architecture in model_class_name
+                    ):
+                        return task_name
+
+    raise KeyError(f"Could not find the proper task name for the architectures {architectures} of {model_dir}.")
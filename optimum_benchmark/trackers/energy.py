@@ -1,23 +1,31 @@
+import glob
 import os
+import threading
+import time
 from contextlib import contextmanager
 from logging import getLogger
+from typing import Dict, Optional, Union
 
 from codecarbon import EmissionsTracker, OfflineEmissionsTracker
+from pandas import DataFrame
 
 LOGGER = getLogger("latency_tracker")
 
 
 class EnergyTracker:
-    def __init__(self):
+    def __init__(self, tracking_mode: str = "process"):
+        # "machine" to track the energy of other processes too, e.g. ddp workers
+        self.tracking_mode = tracking_mode
         self.total_energy: float = 0
         self.total_emissions: float = 0
 
     @contextmanager
     def track(self, interval=1, file_prefix=""):
+        self.report_file = f"{file_prefix}_codecarbon.csv"
         try:
             self.emission_tracker = EmissionsTracker(
                 log_level="error",  # "info" for more verbosity
-                tracking_mode="process",  # "machine" for machine-level tracking
+                tracking_mode=self.tracking_mode,
                 measure_power_secs=interval,
                 output_file=f"{file_prefix}_codecarbon.csv",
                 gpu_ids=os.environ.get("CUDA_VISIBLE_DEVICES", None),
@@ -32,7 +40,7 @@ class EnergyTracker:
                 )
             self.emission_tracker = OfflineEmissionsTracker(
                 log_level="error",
-                tracking_mode="process",
+                tracking_mode=self.tracking_mode,
                 measure_power_secs=interval,
                 country_iso_code=country_iso_code,
                 output_file=f"{file_prefix}_codecarbon.csv",
@@ -53,3 +61,116 @@ class EnergyTracker:
 
     def get_elapsed_time(self) -> float:
         return self.emission_tracker._last_measured_time - self.emission_tracker._start_time
+
+
+RAPL_PATH = "/sys/class/powercap"
+JOULES_PER_KWH = 3.6e6
+
+
+def get_rapl_domains() -> Dict[str, str]:
+    """Maps the sysfs directory of every package and dram RAPL domain to its name.
+    Core/uncore domains are skipped because they're already accounted for in their package's energy,
+    and so is psys because it covers the whole platform."""
+    domains = {}
+    for domain_path in sorted(glob.glob(os.path.join(RAPL_PATH, "intel-rapl:*"))):
+        with open(os.path.join(domain_path, "name")) as f:
+            domain_name = f.read().strip()
+        if domain_name.startswith("package") or domain_name == "dram":
+            domains[domain_path] = domain_name
+
+    return domains
+
+
+def read_rapl_counter(domain_path: str, counter: str = "energy_uj") -> int:
+    with open(os.path.join(domain_path, counter)) as f:
+        return int(f.read())
+
+
+def is_rapl_available() -> bool:
+    try:
+        domains = get_rapl_domains()
+        for domain_path in domains:
+            read_rapl_counter(domain_path)
+    except (OSError, ValueError):
+        # energy counters are only readable by root on most recent kernels
+        return False
+
+    return len(domains) > 0
+
+
+class RAPLEnergyTracker:
+    """Reads the Linux powercap/RAPL energy counters of the cpu packages and dram directly, without CodeCarbon.
+    Counters are read at the exact start and end of tracking, and sampled in between to handle wraparounds."""
+
+    def __init__(self):
+        self.domains = get_rapl_domains()
+        self.max_energy_ranges = {
+            domain_path: read_rapl_counter(domain_path, "max_energy_range_uj") for domain_path in self.domains
+        }
+        self.total_energy: float = 0
+        self.domain_energies: Dict[str, float] = {}
+
+    @contextmanager
+    def track(self, interval=1, file_prefix=""):
+        self.report_file = f"{file_prefix}_rapl.csv"
+        self.domain_energies = dict.fromkeys(self.domains, 0)
+        self.last_readings = {domain_path: read_rapl_counter(domain_path) for domain_path in self.domains}
+        self.start_time = time.perf_counter()
+
+        stop_event = threading.Event()
+        sampling_thread = threading.Thread(target=self._sample, args=(interval, stop_event), daemon=True)
+        sampling_thread.start()
+        yield
+        stop_event.set()
+        sampling_thread.join()
+        self._accumulate()
+
+        self.total_energy = sum(self.domain_energies.values()) * 1e-6 / JOULES_PER_KWH
+        self.save_report()
+
+    def _sample(self, interval: float, stop_event: threading.Event) -> None:
+        # sampling more often than the counters' wraparound period is enough to never miss one
+        while not stop_event.wait(interval):
+            self._accumulate()
+
+    def _accumulate(self) -> None:
+        for domain_path in self.domains:
+            reading = read_rapl_counter(domain_path)
+            delta = reading - self.last_readings[domain_path]
+            if delta < 0:
+                # the counter wrapped around
+                delta += self.max_energy_ranges[domain_path]
+            self.domain_energies[domain_path] += delta
+            self.last_readings[domain_path] = reading
+
+    def save_report(self) -> None:
+        report = DataFrame(
+            {
+                "domain": [os.path.basename(domain_path) for domain_path in self.domains],
+                "name": list(self.domains.values()),
+                "energy(J)": [self.domain_energies[domain_path] * 1e-6 for domain_path in self.domains],
+            }
+        )
+        report.to_csv(self.report_file)
+
+    def get_total_energy(self) -> float:
+        return self.total_energy
+
+    def get_total_emissions(self) -> Optional[float]:
+        # emissions depend on the grid's carbon intensity which RAPL knows nothing about
+        return None
+
+    def get_elapsed_time(self) -> float:
+        return time.perf_counter() - self.start_time
+
+
+def get_energy_tracker(
+    name: str = "codecarbon", tracking_mode: str = "process"
+) -> Union[EnergyTracker, RAPLEnergyTracker]:
+    if name == "rapl":
+        # the counters cover the whole machine anyway
+        if is_rapl_available():
+            return RAPLEnergyTracker()
+        LOGGER.warning("RAPL energy counters are not available or not readable, falling back to CodeCarbon")
+
+    return EnergyTracker(tracking_mode=tracking_mode)
@@ -1,18 +1,28 @@
+import math
 import time
 from contextlib import contextmanager
 from logging import getLogger
 from typing import List
 
+import numpy as np
 import torch
+from transformers.generation.streamers import BaseStreamer
 
 LOGGER = getLogger("latency_tracker")
 
 
 class LatencyTracker:
-    def __init__(self, device: torch.device, backend: str):
+    def __init__(self, device: torch.device, backend: str, capacity: int = 1024):
         self.device = device
         self.backend = backend
-        self.latencies: List[float] = []
+
+        # latencies are stored in a preallocated buffer (doubled when full) along with running statistics
+        # so that stopping criteria can be checked in constant time after every tracked call
+        self.latencies = np.empty(capacity, dtype=np.float64)
+        self.count: int = 0
+        self.total_latency: float = 0.0
+        self.mean_latency: float = 0.0
+        self.squared_deviations: float = 0.0
 
         if self.device.type == "cuda" and self.backend == "pytorch":
             # because pytorch will always see devices as 0, 1, 2, ... CUDA_VISIBLE_DEVICES doesn't matter
@@ -26,8 +36,35 @@ class LatencyTracker:
         else:
             yield from self._cpu_latency()
 
-    def get_latencies(self):
-        return self.latencies
+    def get_latencies(self) -> List[float]:
+        return self.latencies[: self.count].tolist()
+
+    def get_last_latencies(self, num_latencies: int) -> np.ndarray:
+        return self.latencies[max(0, self.count - num_latencies) : self.count]
+
+    def get_count(self) -> int:
+        return self.count
+
+    def get_total_latency(self) -> float:
+        return self.total_latency
+
+    def get_mean_latency(self) -> float:
+        return self.mean_latency
+
+    def get_stdev_latency(self) -> float:
+        return math.sqrt(self.squared_deviations / (self.count - 1)) if self.count > 1 else 0.0
+
+    def append(self, latency: float) -> None:
+        if self.count == self.latencies.size:
+            self.latencies = np.concatenate([self.latencies, np.empty_like(self.latencies)])
+
+        self.latencies[self.count] = latency
+        self.count += 1
+        self.total_latency += latency
+        # Welford's online algorithm
+        delta = latency - self.mean_latency
+        self.mean_latency += delta / self.count
+        self.squared_deviations += delta * (latency - self.mean_latency)
 
     def _cuda_latency(self):
         start_event = torch.cuda.Event(enable_timing=True)
@@ -47,7 +84,7 @@ class LatencyTracker:
         latency = latency_ms / 1e3
 
         LOGGER.debug(f"Tracked CUDA latency: {latency:.2e}s")
-        self.latencies.append(latency)
+        self.append(latency)
 
     def _cpu_latency(self):
         start = time.perf_counter_ns()
@@ -57,4 +94,66 @@ class LatencyTracker:
         latency = latency_ns / 1e9
 
         LOGGER.debug(f"Tracked CPU latency: {latency:.2e}s")
-        self.latencies.append(latency)
+        self.append(latency)
+
+
+class TokenLatencyStreamer(BaseStreamer):
+    """A generation streamer that timestamps every generated token without altering the generation loop."""
+
+    def __init__(self):
+        self.prompt_received = False
+        self.timestamps: List[int] = []
+
+    def put(self, value: torch.Tensor) -> None:
+        # the first call is made with the prompt's input ids, before any token is generated
+        if not self.prompt_received:
+            self.prompt_received = True
+            return
+
+        # generated tokens are moved to cpu before being streamed, which synchronizes the device
+        self.timestamps.append(time.perf_counter_ns())
+
+    def end(self) -> None:
+        pass
+
+
+class TokenLatencyTracker:
+    def __init__(self):
+        self.prefill_latencies: List[float] = []
+        self.decode_latencies: List[float] = []
+        self.inter_token_latencies: List[float] = []
+        self.total_latency: float = 0.0
+
+    @contextmanager
+    def track(self):
+        streamer = TokenLatencyStreamer()
+        start = time.perf_counter_ns()
+        yield streamer
+
+        if len(streamer.timestamps) == 0:
+            raise RuntimeError("No generated token was streamed, make sure the backend supports `streamer`.")
+
+        # time to first token includes the encoder pass for encoder-decoder models
+        prefill_latency = (streamer.timestamps[0] - start) / 1e9
+        decode_latency = (streamer.timestamps[-1] - streamer.timestamps[0]) / 1e9
+        inter_token_latencies = [
+            (current - previous) / 1e9 for previous, current in zip(streamer.timestamps[:-1], streamer.timestamps[1:])
+        ]
+
+        LOGGER.debug(f"Tracked prefill latency: {prefill_latency:.2e}s, decode latency: {decode_latency:.2e}s")
+        self.prefill_latencies.append(prefill_latency)
+        self.decode_latencies.append(decode_latency)
+        self.inter_token_latencies.extend(inter_token_latencies)
+        self.total_latency += prefill_latency + decode_latency
+
+    def get_prefill_latencies(self) -> List[float]:
+        return self.prefill_latencies
+
+    def get_decode_latencies(self) -> List[float]:
+        return self.decode_latencies
+
+    def get_inter_token_latencies(self) -> List[float]:
+        return self.inter_token_latencies
+
+    def get_total_latency(self) -> float:
+        return self.total_latency
@@ -1,19 +1,26 @@
 import os
+import threading
+import time
 from contextlib import contextmanager
 from logging import getLogger
 from multiprocessing import Pipe, Process
 from multiprocessing.connection import Connection
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
+import numpy as np
 import psutil
-import torch
 
 from ..env_utils import bytes_to_mega_bytes
 
+if TYPE_CHECKING:
+    import torch
+    from pandas import DataFrame
+
 LOGGER = getLogger("memory_tracker")
 
 
 class MemoryTracker:
-    def __init__(self, device: torch.device):
+    def __init__(self, device: "torch.device"):
         self.device = device
         self.peak_memory: int = 0
 
@@ -81,9 +88,9 @@ class PeakMemoryMeasureProcess(Process):
         self.connection.send(0)
         stop = False
 
+        process = psutil.Process(self.process_id)
+        meminfo_attr = "memory_info" if hasattr(process, "memory_info") else "get_memory_info"
         while True:
-            process = psutil.Process(self.process_id)
-            meminfo_attr = "memory_info" if hasattr(process, "memory_info") else "get_memory_info"
             memory = getattr(process, meminfo_attr)()[0]
             self.mem_usage = max(self.mem_usage, memory)
 
@@ -94,3 +101,132 @@ class PeakMemoryMeasureProcess(Process):
         # send results to parent pipe
         self.connection.send(self.mem_usage)
         self.connection.close()
+
+
+STATM_PATH = "/proc/self/statm"
+SMAPS_ROLLUP_PATH = "/proc/self/smaps_rollup"
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def read_statm() -> Tuple[int, float, float]:
+    # statm only exposes the resident set size, in pages
+    with open(STATM_PATH) as f:
+        resident = int(f.read().split()[1])
+    return resident * PAGE_SIZE, float("nan"), float("nan")
+
+
+def read_smaps_rollup() -> Tuple[int, float, float]:
+    # smaps_rollup aggregates the process' mappings, in kB
+    fields = {}
+    with open(SMAPS_ROLLUP_PATH) as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if value.endswith("kB\n"):
+                fields[key] = int(value.split()[0]) * 1024
+
+    # the unique set size is the memory that would be freed if the process exited
+    uss = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0) + fields.get("Private_Hugetlb", 0)
+    return fields["Rss"], fields["Pss"], uss
+
+
+class MemoryTimelineTracker:
+    """
+    Samples the process' memory from a background thread into a bounded ring buffer,
+    tagging every sample with the benchmark phase it was taken in (load, warmup, forward, generate, ...).
+    """
+
+    def __init__(self, interval: float = 0.01, capacity: int = 100_000):
+        self.interval = interval
+        self.capacity = capacity
+
+        if os.access(SMAPS_ROLLUP_PATH, os.R_OK):
+            self.read_memory = read_smaps_rollup
+        elif os.access(STATM_PATH, os.R_OK):
+            LOGGER.warning(f"{SMAPS_ROLLUP_PATH} is not readable, only the RSS will be tracked")
+            self.read_memory = read_statm
+        else:
+            LOGGER.warning("/proc is not available, the memory timeline will be empty")
+            self.read_memory = None
+
+        # preallocated ring buffer, the oldest samples are overwritten once it's full
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.phase_ids = np.zeros(capacity, dtype=np.int32)
+        self.rss = np.zeros(capacity, dtype=np.float64)
+        self.pss = np.zeros(capacity, dtype=np.float64)
+        self.uss = np.zeros(capacity, dtype=np.float64)
+        self.num_samples = 0
+
+        self.phases: List[str] = ["start"]
+        self.start_time = time.perf_counter()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.read_memory is None:
+            return
+
+        self.start_time = time.perf_counter()
+        self.sample()
+        self.thread = threading.Thread(target=self._sample_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        if self.thread is None:
+            return
+
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+        self.sample()
+
+    def set_phase(self, phase: str) -> None:
+        LOGGER.debug(f"Memory timeline phase: {phase}")
+        with self.lock:
+            self.phases.append(phase)
+        # a sample at each phase boundary makes short phases visible
+        self.sample()
+
+    def _sample_loop(self) -> None:
+        while not self.stop_event.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        if self.read_memory is None:
+            return
+
+        rss, pss, uss = self.read_memory()
+        with self.lock:
+            index = self.num_samples % self.capacity
+            self.timestamps[index] = time.perf_counter() - self.start_time
+            self.phase_ids[index] = len(self.phases) - 1
+            self.rss[index] = rss
+            self.pss[index] = pss
+            self.uss[index] = uss
+            self.num_samples += 1
+
+    def get_timeline_df(self) -> "DataFrame":
+        from pandas import DataFrame
+
+        with self.lock:
+            if self.num_samples > self.capacity:
+                # unroll the ring buffer, oldest sample first
+                order = np.roll(np.arange(self.capacity), -(self.num_samples % self.capacity))
+            else:
+                order = np.arange(self.num_samples)
+
+            # in (fractional) MB, the pss and uss are nan when only /proc/self/statm is readable
+            return DataFrame(
+                {
+                    "time(s)": self.timestamps[order],
+                    "phase": [self.phases[phase_id] for phase_id in self.phase_ids[order]],
+                    "rss(MB)": self.rss[order] * 1e-6,
+                    "pss(MB)": self.pss[order] * 1e-6,
+                    "uss(MB)": self.uss[order] * 1e-6,
+                }
+            )
+
+    def save(self, path: str = "memory_timeline.csv") -> None:
+        if self.num_samples > self.capacity:
+            LOGGER.warning(f"Memory timeline overflowed, only the last {self.capacity} samples are saved")
+        self.get_timeline_df().to_csv(path)
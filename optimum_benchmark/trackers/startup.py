@@ -0,0 +1,125 @@
+import threading
+import time
+from contextlib import contextmanager
+from logging import getLogger
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import psutil
+
+from ..env_utils import bytes_to_mega_bytes
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+LOGGER = getLogger("startup_tracker")
+
+# the tracker of the running experiment, if any, so that backends can be instrumented without being aware of it
+_STARTUP_TRACKER: Optional["StartupTracker"] = None
+
+
+class StartupTracker:
+    """
+    Times the phases of a cold start (config fetch, weights loading, export, compilation, first inference, ...)
+    and tracks the process' peak RSS during each of them. Phases can be nested, a nested phase is reported
+    under its parent's name (e.g. `configure.export.weights_loading`) and its time is included in its parent's.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.process = psutil.Process()
+
+        self.stack: List[str] = []
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.peak_rss: Dict[str, int] = {}
+
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        global _STARTUP_TRACKER
+        _STARTUP_TRACKER = self
+
+        self.thread = threading.Thread(target=self._sample_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        global _STARTUP_TRACKER
+        _STARTUP_TRACKER = None
+
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+
+    def _sample_loop(self) -> None:
+        while not self.stop_event.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        rss = self.process.memory_info().rss
+        with self.lock:
+            # the peak of a phase is also its parents' peak
+            for phase in self.stack:
+                self.peak_rss[phase] = max(self.peak_rss[phase], rss)
+
+    @contextmanager
+    def track(self, name: str):
+        phase = ".".join([*self.stack[-1:], name])
+        with self.lock:
+            self.stack.append(phase)
+            self.peak_rss.setdefault(phase, 0)
+        self.sample()
+
+        LOGGER.info(f"\t+ Startup phase {phase} started")
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - start
+            self.sample()
+            with self.lock:
+                self.stack.pop()
+                # a phase can be entered several times, e.g. a model with several components to quantize
+                stats = self.phases.setdefault(phase, {"count": 0, "wall_time(s)": 0.0})
+                stats["count"] += 1
+                stats["wall_time(s)"] += wall_time
+            LOGGER.info(f"\t+ Startup phase {phase} took {wall_time:.3f} (s)")
+
+    def get_phases(self) -> List[str]:
+        return list(self.phases.keys())
+
+    def get_wall_time(self, phase: str) -> float:
+        return self.phases[phase]["wall_time(s)"]
+
+    def get_peak_rss(self, phase: str) -> int:
+        return bytes_to_mega_bytes(self.peak_rss[phase])
+
+    def get_breakdown_df(self) -> "DataFrame":
+        from pandas import DataFrame
+
+        # phases are listed in the order they ended, so nested phases come before their parents
+        return DataFrame(
+            [
+                {
+                    "phase": phase,
+                    "count": int(stats["count"]),
+                    "wall_time(s)": stats["wall_time(s)"],
+                    "peak_rss(MB)": self.get_peak_rss(phase),
+                }
+                for phase, stats in self.phases.items()
+            ]
+        )
+
+
+@contextmanager
+def track_startup_phase(name: str):
+    """
+    Times the enclosed code as a startup phase when a startup benchmark is running, does nothing otherwise.
+    Can also be used as a decorator, e.g. `@track_startup_phase("export")`.
+    """
+    if _STARTUP_TRACKER is None:
+        yield
+    else:
+        with _STARTUP_TRACKER.track(name):
+            yield
@@ -1,4 +1,4 @@
-from setuptools import find_packages, setup
+from setuptools import find_namespace_packages, find_packages, setup
 
 OPTIMUM_VERSION = "1.13.0"
 
@@ -11,6 +11,7 @@ INSTALL_REQUIRES = [
     "hydra-core==1.3.2",
     "hydra_colorlog==1.2.0",
     "hydra-joblib-launcher==1.2.0",
+    "cloudpickle",  # slots launcher
     # Other
     "codecarbon==2.3.1",
     "psutil==5.9.0",
@@ -47,13 +48,15 @@ EXTRAS_REQUIRE = {
 setup(
     name="optimum-benchmark",
     version="0.0.1",
-    packages=find_packages(),
+    # hydra discovers launcher plugins in the hydra_plugins namespace package
+    packages=find_packages() + find_namespace_packages(include=["hydra_plugins.*"]),
     install_requires=INSTALL_REQUIRES,
     extras_require=EXTRAS_REQUIRE,
     entry_points={
         "console_scripts": [
             "optimum-benchmark=optimum_benchmark.experiment:run_experiment",
             "optimum-report=optimum_benchmark.report:generate_report",
+            "optimum-benchmark-cache=optimum_benchmark.result_cache:manage_cache",
         ]
     },
 )
@@ -0,0 +1,51 @@
+import subprocess
+import sys
+
+import pytest
+
+# the modules run by the entry points before an experiment starts
+ENTRY_POINTS = ["optimum_benchmark.experiment", "optimum_benchmark.result_cache"]
+# only needed once the experiment runs (in its own process when isolated), each of them takes seconds to import
+HEAVY_MODULES = [
+    "torch",
+    "transformers",
+    "optimum",
+    "diffusers",
+    "onnxruntime",
+    "openvino",
+    "neural_compressor",
+    "pandas",
+]
+# hydra and omegaconf alone take a few hundred milliseconds
+IMPORT_TIME_BUDGET = 2.0  # seconds
+
+
+def get_import_times(module: str):
+    # same as `python -X importtime -c "import module"`, which reports in microseconds on stderr:
+    # import time: self [us] | cumulative | imported package
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+    )
+    assert result.returncode == 0, result.stderr.decode("utf-8")
+
+    import_times = {}
+    for line in result.stderr.decode("utf-8").splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, imported = line[len("import time:") :].split("|")
+        import_times[imported.strip()] = int(cumulative) * 1e-6
+
+    return import_times
+
+
+@pytest.mark.parametrize("module", ENTRY_POINTS)
+def test_import_time(module):
+    import_times = get_import_times(module)
+
+    heavy_imports = sorted(name for name in import_times if name.split(".")[0] in HEAVY_MODULES)
+    assert len(heavy_imports) == 0, f"Importing {module} imports {heavy_imports}, which should be imported lazily."
+
+    assert import_times[module] < IMPORT_TIME_BUDGET, (
+        f"Importing {module} took {import_times[module]:.2f}s, more than the budget of {IMPORT_TIME_BUDGET}s."
+    )
@@ -0,0 +1,19 @@
+import math
+
+from optimum_benchmark.trackers.memory import MemoryTimelineTracker, read_statm
+
+
+def test_memory_timeline_statm_fallback():
+    # only the rss is tracked when /proc/self/smaps_rollup isn't readable
+    tracker = MemoryTimelineTracker(interval=0.001)
+    tracker.read_memory = read_statm
+    tracker.start()
+    tracker.set_phase("forward")
+    tracker.stop()
+
+    timeline_df = tracker.get_timeline_df()
+    assert len(timeline_df) >= 3
+    assert list(timeline_df["phase"].unique()) == ["start", "forward"]
+    assert (timeline_df["rss(MB)"] > 0).all()
+    assert all(math.isnan(pss) for pss in timeline_df["pss(MB)"])
+    assert all(math.isnan(uss) for uss in timeline_df["uss(MB)"])
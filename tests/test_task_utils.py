@@ -0,0 +1,25 @@
+import json
+
+import pytest
+
+from optimum_benchmark.task_utils import infer_task_from_model_name_or_path
+
+pytest.importorskip("transformers")
+
+
+@pytest.mark.parametrize(
+    "architecture,task",
+    [
+        ("BertForMaskedLM", "fill-mask"),
+        ("GPT2LMHeadModel", "text-generation"),
+        # also listed in the masked lm mapping
+        ("BartForConditionalGeneration", "text2text-generation"),
+        ("MBartForConditionalGeneration", "text2text-generation"),
+        ("WhisperForConditionalGeneration", "automatic-speech-recognition"),
+    ],
+)
+def test_infer_task_from_local_directory(tmp_path, architecture, task):
+    with open(tmp_path / "config.json", "w") as f:
+        json.dump({"architectures": [architecture]}, f)
+
+    assert infer_task_from_model_name_or_path(str(tmp_path)) == task